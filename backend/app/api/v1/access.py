@@ -0,0 +1,55 @@
+import hashlib
+import json
+
+from fastapi import APIRouter, Depends, Request, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.app.core.security import AuthContext, get_auth_context
+from backend.app.schemas.access import (
+    AccessCheckRequest,
+    AccessCheckResponse,
+    EffectivePermissions,
+)
+from db.session import get_db
+
+router = APIRouter(prefix="/access")
+
+
+@router.post("/check", response_model=AccessCheckResponse)
+async def check_access(
+    check_in: AccessCheckRequest,
+    auth: AuthContext = Depends(get_auth_context),
+    db: AsyncSession = Depends(get_db),
+):
+    bits = []
+    results = {}
+    for check in check_in.checks:
+        allowed = await auth.has_permission(db, check.object_name, check.action)
+        bits.append("1" if allowed else "0")
+        results[f"{check.object_name}:{check.action}"] = allowed
+    return AccessCheckResponse(bitmap="".join(bits), results=results)
+
+
+@router.get("/permissions", response_model=EffectivePermissions)
+async def get_effective_permissions(
+    request: Request,
+    response: Response,
+    auth: AuthContext = Depends(get_auth_context),
+    db: AsyncSession = Depends(get_db),
+):
+    permissions = await auth.get_permissions(db)
+    effective = EffectivePermissions(
+        is_superuser=bool(auth.user.is_superuser),
+        permissions={
+            name: sorted(actions) for name, actions in sorted(permissions.items())
+        },
+    )
+
+    body = json.dumps(effective.model_dump(), sort_keys=True, separators=(",", ":"))
+    etag = f'"{hashlib.sha256(body.encode()).hexdigest()[:32]}"'
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    response.headers.update(headers)
+    return effective
@@ -0,0 +1,28 @@
+from typing import Literal
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.app.core.permissions import require_superuser
+from backend.app.schemas.users import UserListPage
+from backend.app.services.user import UserService
+from db.session import get_db
+
+router = APIRouter(prefix="/users", dependencies=[Depends(require_superuser)])
+users = UserService()
+
+
+@router.get("", response_model=UserListPage)
+async def search_users(
+    q: str | None = Query(default=None, min_length=1, max_length=255),
+    match: Literal["prefix", "contains"] = "prefix",
+    is_active: bool | None = None,
+    is_verified: bool | None = None,
+    role: str | None = None,
+    cursor: str | None = None,
+    limit: int = Query(default=50, ge=1, le=500),
+    db: AsyncSession = Depends(get_db),
+):
+    return await users.search_users(
+        db, q, match, is_active, is_verified, role, cursor, limit
+    )
@@ -0,0 +1,25 @@
+from fastapi import APIRouter, Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.app.core.permissions import require_superuser
+from backend.app.schemas.api_keys import ApiKeyCreate, ApiKeyCreated, ApiKeyOut
+from backend.app.services.api_key import ApiKeyService
+from db.session import get_db
+
+router = APIRouter(prefix="/api-keys", dependencies=[Depends(require_superuser)])
+api_keys = ApiKeyService()
+
+
+@router.post("", response_model=ApiKeyCreated)
+async def create_api_key(key_in: ApiKeyCreate, db: AsyncSession = Depends(get_db)):
+    return await api_keys.create_api_key(db, key_in)
+
+
+@router.get("", response_model=list[ApiKeyOut])
+async def list_api_keys(user_id: int | None = None, db: AsyncSession = Depends(get_db)):
+    return await api_keys.list_api_keys(db, user_id)
+
+
+@router.delete("/{key_id}")
+async def revoke_api_key(key_id: int, db: AsyncSession = Depends(get_db)):
+    return await api_keys.revoke_api_key(db, key_id)
@@ -0,0 +1,25 @@
+from datetime import datetime
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.app.core.permissions import require_superuser
+from backend.app.schemas.audit import AuthEventPage
+from backend.app.services.audit import AuditService
+from db.session import get_db
+
+router = APIRouter(prefix="/audit", dependencies=[Depends(require_superuser)])
+audit = AuditService()
+
+
+@router.get("/events", response_model=AuthEventPage)
+async def list_auth_events(
+    start: datetime,
+    end: datetime,
+    event_type: str | None = None,
+    user_id: int | None = None,
+    cursor: str | None = None,
+    limit: int = Query(default=100, ge=1, le=1000),
+    db: AsyncSession = Depends(get_db),
+):
+    return await audit.list_events(db, start, end, event_type, user_id, cursor, limit)
@@ -1,11 +1,21 @@
 import os
 
-from fastapi import APIRouter, Response, Depends, BackgroundTasks, Request
+from fastapi import (
+    APIRouter,
+    BackgroundTasks,
+    Depends,
+    HTTPException,
+    Request,
+    Response,
+    status,
+)
+from fastapi.security import HTTPAuthorizationCredentials
 from fastapi.templating import Jinja2Templates
 from slowapi import Limiter
 from slowapi.util import get_remote_address
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from backend.app.core.security import authenticate_request, optional_security
 from backend.app.schemas.auth import UserOut, LoginRequest, UserCreate, TokenResponse
 from backend.app.services.auth import AuthService
 from db.session import get_db
@@ -33,9 +43,10 @@ async def register(
 async def login(
     login_in: LoginRequest,
     response: Response,
+    request: Request,
     db: AsyncSession = Depends(get_db),
 ):
-    return await auth_service.login_user(db, login_in, response)
+    return await auth_service.login_user(db, login_in, response, request)
 
 
 @router.get("/verify-email")
@@ -63,3 +74,33 @@ async def logout(
     db: AsyncSession = Depends(get_db),
 ):
     return await auth_service.logout_user(db, request, response)
+
+
+@router.get(
+    "/validate",
+    status_code=status.HTTP_204_NO_CONTENT,
+    response_class=Response,
+    responses={401: {"description": "Missing, invalid or revoked token"}},
+)
+async def validate(
+    request: Request,
+    credentials: HTTPAuthorizationCredentials | None = Depends(optional_security),
+    db: AsyncSession = Depends(get_db),
+):
+    """Проверка токена для nginx auth_request: 204 с данными пользователя в заголовках или 401"""
+    if credentials is None:
+        return Response(status_code=status.HTTP_401_UNAUTHORIZED)
+    try:
+        auth = await authenticate_request(request, credentials.credentials, db)
+    except HTTPException:
+        return Response(status_code=status.HTTP_401_UNAUTHORIZED)
+
+    roles = await auth.get_roles(db)
+    return Response(
+        status_code=status.HTTP_204_NO_CONTENT,
+        headers={
+            "X-User-Id": str(auth.user.id),
+            "X-User-Roles": ",".join(roles),
+            "X-User-Superuser": "1" if auth.user.is_superuser else "0",
+        },
+    )
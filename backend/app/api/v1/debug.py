@@ -0,0 +1,96 @@
+from typing import Literal
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import PlainTextResponse
+
+from backend.app.config import settings
+from backend.app.core.audit import audit_log
+from backend.app.core.load_shedding import limiters
+from backend.app.core.loop_monitor import loop_monitor
+from backend.app.core.permissions import require_superuser
+from backend.app.core.profiler import (
+    format_collapsed,
+    profile_worker,
+    profiling_in_progress,
+    request_profiles,
+)
+from backend.app.schemas.debug import (
+    AuditLogStats,
+    LimiterStats,
+    LoopLagStats,
+    RequestProfileOut,
+)
+
+router = APIRouter(prefix="/debug", dependencies=[Depends(require_superuser)])
+
+
+@router.get(
+    "/loop",
+    response_model=LoopLagStats,
+    responses={200: {"content": {"text/plain": {}}}},
+)
+async def loop_lag(format: Literal["json", "prometheus"] = "json"):
+    """Задержка event loop текущего воркера и последние блокировки со стеком"""
+    if format == "prometheus":
+        return PlainTextResponse(
+            loop_monitor.prometheus(), media_type="text/plain; version=0.0.4"
+        )
+    return loop_monitor.snapshot()
+
+
+@router.get("/load", response_model=dict[str, LimiterStats])
+async def load_shedding():
+    """Текущие адаптивные лимиты, очереди и число отказов по классам маршрутов"""
+    return {name: limiter.snapshot() for name, limiter in limiters.items()}
+
+
+@router.get(
+    "/audit",
+    response_model=AuditLogStats,
+    responses={200: {"content": {"text/plain": {}}}},
+)
+async def audit_buffer(format: Literal["json", "prometheus"] = "json"):
+    """Буфер журнала аудита воркера: записано, потеряно при переполнении, ошибки"""
+    if format == "prometheus":
+        return PlainTextResponse(
+            audit_log.prometheus(), media_type="text/plain; version=0.0.4"
+        )
+    return audit_log.snapshot()
+
+
+@router.get("/profile", response_class=PlainTextResponse)
+async def profile(
+    seconds: float = Query(default=10, gt=0, le=settings.PROFILER_MAX_SECONDS),
+):
+    """
+    Сэмплирует поток event loop текущего воркера в течение seconds секунд.
+    Ответ — collapsed stacks для flamegraph.pl или speedscope; время простоя
+    loop в стеки не попадает и отдаётся в заголовке X-Profile-Idle-Samples.
+    """
+    if profiling_in_progress():
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Profiling is already running on this worker",
+        )
+    profiler = await profile_worker(seconds, settings.PROFILER_INTERVAL_SECONDS)
+    return PlainTextResponse(
+        format_collapsed(profiler.stacks),
+        headers={
+            "X-Profile-Samples": str(profiler.samples),
+            "X-Profile-Idle-Samples": str(profiler.idle),
+        },
+    )
+
+
+@router.get("/profile/requests", response_model=list[RequestProfileOut])
+async def list_request_profiles():
+    """Последние запросы, профилированные по заголовку X-Profile"""
+    return request_profiles.list()
+
+
+@router.get("/profile/requests/{profile_id}", response_class=PlainTextResponse)
+async def get_request_profile(profile_id: int):
+    profile = request_profiles.get(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return PlainTextResponse(format_collapsed(profile.stacks))
@@ -2,28 +2,30 @@ from fastapi import APIRouter, Depends
 from slowapi import Limiter
 from slowapi.util import get_remote_address
 
-from backend.app.core.permissions import require_permission
-from backend.app.models.user import User
+from backend.app.core.access import RowScope
+from backend.app.core.permissions import require_permission, require_row_scope
+from backend.app.core.principal import Principal
 
 router = APIRouter()
 limiter = Limiter(key_func=get_remote_address)
 
+PRODUCTS = [
+    {"id": 1, "name": "Product 1", "owner_id": 1},
+    {"id": 2, "name": "Product 2", "owner_id": 2},
+]
+
 
 @router.get("/products")
 async def get_products(
-    current_user: User = Depends(require_permission("products", "read"))
+    scope: RowScope = Depends(require_row_scope("products", "read"))
 ):
-    return {
-        "products": [
-            {"id": 1, "name": "Product 1", "owner_id": 1},
-            {"id": 2, "name": "Product 2", "owner_id": 2},
-        ]
-    }
+    # Для таблицы в БД: scope.apply(select(Product), Product.owner_id)
+    return {"products": [p for p in PRODUCTS if scope.allows(p["owner_id"])]}
 
 
 @router.get("/orders")
 async def get_orders(
-    current_user: User = Depends(require_permission("orders", "read"))
+    current_user: Principal = Depends(require_permission("orders", "read"))
 ):
     return {
         "orders": [
@@ -0,0 +1,36 @@
+from typing import Literal
+
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
+
+from backend.app.core.permissions import require_superuser
+from backend.app.services.export import EXPORT_TABLES, ExportService
+from db.session import AsyncSessionLocal
+
+router = APIRouter(prefix="/export", dependencies=[Depends(require_superuser)])
+exporter = ExportService()
+
+MEDIA_TYPES = {"csv": "text/csv", "jsonl": "application/x-ndjson"}
+
+
+@router.get("/{table}")
+async def export_table(
+    table: str,
+    format: Literal["csv", "jsonl"] = "csv",
+    gzip: bool = False,
+):
+    if table not in EXPORT_TABLES:
+        raise HTTPException(status_code=404, detail="Unknown export table")
+
+    async def body():
+        # Отдельная сессия живёт столько же, сколько поток ответа
+        async with AsyncSessionLocal() as db:
+            async for chunk in exporter.stream_export(db, table, format, gzip):
+                yield chunk
+
+    filename = f"{table}.{format}" + (".gz" if gzip else "")
+    return StreamingResponse(
+        body(),
+        media_type="application/gzip" if gzip else MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
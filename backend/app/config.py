@@ -38,12 +38,24 @@ class Settings(BaseSettings):
     SMTP_PORT: int
     SMTP_USERNAME: str
     SMTP_PASSWORD: str
+    # background — отправка BackgroundTasks в воркере, outbox — через таблицу email_outbox
+    EMAIL_DELIVERY_MODE: str = "background"
+    EMAIL_OUTBOX_BATCH_SIZE: int = 50
+    EMAIL_OUTBOX_POLL_INTERVAL_SECONDS: float = 2.0
+    EMAIL_OUTBOX_MAX_ATTEMPTS: int = 5
+    EMAIL_OUTBOX_RETRY_BASE_SECONDS: float = 30.0
+    # Сколько письмо числится за отправителем; после падения процесса его заберёт другой
+    EMAIL_OUTBOX_LEASE_SECONDS: float = 300.0
+    EMAIL_OUTBOX_RETENTION_DAYS: int = 7
+    EMAIL_OUTBOX_PURGE_INTERVAL_SECONDS: float = 3600.0
 
     POSTGRES_USER: str
     POSTGRES_PASSWORD: str
     POSTGRES_DB: str
     POSTGRES_HOST: str
     POSTGRES_PORT: int
+    # Для локального запуска без отдельного шага `python -m db.init_db`
+    DB_BOOTSTRAP_ON_STARTUP: bool = False
 
     SECRET_KEY: str
     ALGORITHM: str
@@ -51,6 +63,14 @@ class Settings(BaseSettings):
     ACCESS_TOKEN_EXPIRE_MINUTES: int
     VERIFY_EMAIL_TOKEN_EXPIRE_MINUTES: int
     REFRESH_TOKEN_EXPIRE_DAYS: int
+    PASSWORD_RESET_TOKEN_EXPIRE_MINUTES: int = 120
+    # Подписанные самоистекающие токены подтверждения email и сброса пароля
+    # вместо строк в verification_tokens / password_reset_tokens
+    STATELESS_EMAIL_TOKENS: bool = False
+
+    # Счётчик SQL-запросов на HTTP-запрос: off, warn или raise
+    QUERY_COUNTER_MODE: str = "off"
+    QUERY_BUDGET_DEFAULT: int = 10
 
     LIMIT_5_PER_MINUTE: str = "5/minute"
     LIMIT_10_PER_MINUTE: str = "10/minute"
@@ -59,6 +79,69 @@ class Settings(BaseSettings):
     LIMIT_100_PER_MINUTE: str = "100/minute"
     LIMIT_1000_PER_DAY: str = "1000/day"
 
+    # argon2 требует установленного пакета argon2-cffi
+    PASSWORD_HASH_SCHEME: str = "bcrypt"
+    BCRYPT_ROUNDS: int = 12
+    ARGON2_TIME_COST: int = 3
+    ARGON2_MEMORY_COST: int = 65536
+    ARGON2_PARALLELISM: int = 2
+
+    PERMISSIONS_CACHE_TTL_SECONDS: float = 30.0
+    AUTH_CACHE_TTL_SECONDS: float = 30.0
+    # Встраивать права пользователя и версию политики в access-токен
+    EMBED_PERMISSIONS_IN_TOKENS: bool = False
+    API_KEY_CACHE_TTL_SECONDS: float = 300.0
+    # Хранилище сессий токенов: postgres (таблица user_sessions), memory
+    # (только для одного воркера) или redis
+    SESSION_STORE_BACKEND: str = "postgres"
+    REDIS_URL: str = "redis://localhost:6379/0"
+    REDIS_POOL_SIZE: int = 20
+    REDIS_TIMEOUT_SECONDS: float = 1.0
+    # Повтор ответа по Idempotency-Key для register, password/forgot и refresh;
+    # хранилище memory (в пределах воркера) или redis (REDIS_URL)
+    IDEMPOTENCY_ENABLED: bool = True
+    IDEMPOTENCY_STORE_BACKEND: str = "memory"
+    IDEMPOTENCY_TTL_SECONDS: float = 300.0
+    IDEMPOTENCY_LOCK_SECONDS: float = 30.0
+    # Тело запроса с ключом читается в память целиком до обработчика
+    IDEMPOTENCY_MAX_BODY_BYTES: int = 64 * 1024
+    INVALIDATION_BUS_ENABLED: bool = True
+    INVALIDATION_CHANNEL: str = "auth_invalidation"
+
+    AUDIT_MAX_BUFFER: int = 50_000
+    AUDIT_BATCH_SIZE: int = 500
+    AUDIT_FLUSH_INTERVAL_SECONDS: float = 2.0
+
+    # Мониторинг задержки event loop и поиск блокирующих обработчиков
+    LOOP_MONITOR_ENABLED: bool = True
+    LOOP_MONITOR_INTERVAL_SECONDS: float = 0.05
+    LOOP_BLOCK_THRESHOLD_SECONDS: float = 0.1
+
+    # Адаптивные лимиты параллельности по классам маршрутов (core/load_shedding.py)
+    LOAD_SHEDDING_ENABLED: bool = True
+    LOAD_SHEDDING_QUEUE_TIMEOUT_SECONDS: float = 2.0
+    LOAD_SHEDDING_MAX_LOOP_LAG_SECONDS: float = 0.1
+    LOAD_SHEDDING_TARGET_SECONDS: float = 0.25
+    LOAD_SHEDDING_CREDENTIAL_LIMIT: int = 4
+    LOAD_SHEDDING_CREDENTIAL_QUEUE: int = 32
+    LOAD_SHEDDING_CREDENTIAL_TARGET_SECONDS: float = 1.0
+    LOAD_SHEDDING_TOKEN_LIMIT: int = 16
+    LOAD_SHEDDING_TOKEN_QUEUE: int = 128
+    LOAD_SHEDDING_READ_LIMIT: int = 32
+    LOAD_SHEDDING_READ_QUEUE: int = 256
+
+    # Сэмплирующий профилировщик; пустой токен отключает профилирование по заголовку X-Profile
+    PROFILER_INTERVAL_SECONDS: float = 0.005
+    PROFILER_MAX_SECONDS: int = 60
+    PROFILER_REQUEST_TOKEN: str = ""
+    PROFILER_MAX_REQUEST_PROFILES: int = 50
+
+    LOGIN_MAX_FREE_ATTEMPTS: int = 5
+    LOGIN_IP_MAX_FREE_ATTEMPTS: int = 50
+    LOGIN_BACKOFF_BASE_SECONDS: float = 1.0
+    LOGIN_BACKOFF_MAX_SECONDS: float = 900.0
+    LOGIN_ATTEMPTS_RESET_SECONDS: float = 900.0
+
     model_config = SettingsConfigDict(env_file=".env")
 
 
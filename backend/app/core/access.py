@@ -0,0 +1,186 @@
+from dataclasses import dataclass
+
+from sqlalchemy import ColumnElement, Select, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.app.config import settings
+from backend.app.core.cache import TTLCache
+from backend.app.core.invalidation import EventType, invalidation_bus
+from backend.app.core.singleflight import SingleFlight
+from backend.app.models.access import AccessRule, BusinessObject, Role, UserRole
+from backend.app.models.system import PolicyVersion
+
+ACTIONS = (
+    "read",
+    "read_all",
+    "create",
+    "update",
+    "update_all",
+    "delete",
+    "delete_all",
+)
+
+Permissions = dict[str, frozenset[str]]
+
+permissions_cache = TTLCache(ttl=settings.PERMISSIONS_CACHE_TTL_SECONDS)
+roles_cache = TTLCache(ttl=settings.PERMISSIONS_CACHE_TTL_SECONDS)
+# Текущая глобальная версия политики доступа (единственный ключ)
+policy_version_cache = TTLCache(ttl=settings.PERMISSIONS_CACHE_TTL_SECONDS)
+# Одновременные промахи кэша по одному ключу идут в БД одним запросом
+permissions_flight = SingleFlight()
+roles_flight = SingleFlight()
+policy_version_flight = SingleFlight()
+
+
+def _evict_user(event) -> None:
+    permissions_cache.pop(int(event.key))
+    roles_cache.pop(int(event.key))
+
+
+def _on_rules_changed(event) -> None:
+    permissions_cache.clear()
+    known = policy_version_cache.get("version")
+    if event.key is None or known is None:
+        policy_version_cache.clear()
+    else:
+        policy_version_cache.set("version", max(known, int(event.key)))
+
+
+def _clear_caches() -> None:
+    permissions_cache.clear()
+    roles_cache.clear()
+    policy_version_cache.clear()
+
+
+invalidation_bus.subscribe(EventType.USER_CHANGED, _evict_user)
+invalidation_bus.subscribe(EventType.RULES_CHANGED, _on_rules_changed)
+invalidation_bus.on_resync(_clear_caches)
+
+
+def rule_allows(rule: AccessRule, action: str) -> bool:
+    return action in ACTIONS and bool(getattr(rule, f"can_{action}"))
+
+
+async def load_user_permissions(db: AsyncSession, user_id: int) -> Permissions:
+    """Все разрешения пользователя одним запросом: {объект: {действия}}"""
+    cached = permissions_cache.get(user_id)
+    if cached is not None:
+        return cached
+    return await permissions_flight.do(
+        user_id, lambda: _query_user_permissions(db, user_id)
+    )
+
+
+async def _query_user_permissions(db: AsyncSession, user_id: int) -> Permissions:
+    result = await db.execute(
+        select(
+            BusinessObject.name,
+            *(getattr(AccessRule, f"can_{action}") for action in ACTIONS),
+        )
+        .join(AccessRule, AccessRule.object_id == BusinessObject.id)
+        .join(UserRole, UserRole.role_id == AccessRule.role_id)
+        .where(UserRole.user_id == user_id)
+    )
+
+    granted: dict[str, set[str]] = {}
+    for object_name, *flags in result.all():
+        actions = granted.setdefault(object_name, set())
+        actions.update(action for action, flag in zip(ACTIONS, flags) if flag)
+
+    permissions = {name: frozenset(actions) for name, actions in granted.items()}
+    permissions_cache.set(user_id, permissions)
+    return permissions
+
+
+async def get_policy_version(db: AsyncSession) -> int:
+    version = policy_version_cache.get("version")
+    if version is None:
+        version = await policy_version_flight.do(
+            "version", lambda: _query_policy_version(db)
+        )
+    return version
+
+
+async def _query_policy_version(db: AsyncSession) -> int:
+    result = await db.execute(
+        select(PolicyVersion.version).where(PolicyVersion.id == 1)
+    )
+    version = result.scalar_one_or_none() or 0
+    policy_version_cache.set("version", version)
+    return version
+
+
+def encode_permissions(permissions: Permissions) -> dict[str, int]:
+    """Компактное представление прав для JWT: {объект: битовая маска ACTIONS}"""
+    return {
+        name: sum(1 << i for i, action in enumerate(ACTIONS) if action in actions)
+        for name, actions in permissions.items()
+    }
+
+
+def decode_permissions(encoded: dict[str, int]) -> Permissions:
+    return {
+        name: frozenset(
+            action for i, action in enumerate(ACTIONS) if int(mask) & (1 << i)
+        )
+        for name, mask in encoded.items()
+    }
+
+
+async def load_user_roles(db: AsyncSession, user_id: int) -> tuple[str, ...]:
+    cached = roles_cache.get(user_id)
+    if cached is not None:
+        return cached
+    return await roles_flight.do(user_id, lambda: _query_user_roles(db, user_id))
+
+
+async def _query_user_roles(db: AsyncSession, user_id: int) -> tuple[str, ...]:
+    result = await db.execute(
+        select(Role.name)
+        .join(UserRole, UserRole.role_id == Role.id)
+        .where(UserRole.user_id == user_id)
+        .order_by(Role.name)
+    )
+    roles = tuple(result.scalars().all())
+    roles_cache.set(user_id, roles)
+    return roles
+
+
+@dataclass(frozen=True)
+class RowScope:
+    """Область строк, доступных пользователю для действия над объектом"""
+
+    user_id: int
+    all_rows: bool
+
+    def apply(self, stmt: Select, owner_column: ColumnElement) -> Select:
+        """
+        Добавляет в запрос условие owner_column == user_id, если есть только право
+        на свои записи. Фильтрация выполняется в Postgres, поэтому колонка
+        владельца должна быть проиндексирована.
+        """
+        if self.all_rows:
+            return stmt
+        return stmt.where(owner_column == self.user_id)
+
+    def allows(self, owner_id: int | None) -> bool:
+        return self.all_rows or owner_id == self.user_id
+
+
+def resolve_row_scope(
+    user_id: int,
+    is_superuser: bool,
+    permissions: Permissions,
+    object_name: str,
+    action: str,
+) -> RowScope | None:
+    """Определяет область по флагам can_<action> / can_<action>_all, None — нет доступа"""
+    if is_superuser:
+        return RowScope(user_id=user_id, all_rows=True)
+
+    granted = permissions.get(object_name, frozenset())
+    if f"{action}_all" in granted:
+        return RowScope(user_id=user_id, all_rows=True)
+    if action in granted:
+        return RowScope(user_id=user_id, all_rows=False)
+    return None
@@ -0,0 +1,86 @@
+import hashlib
+import hmac
+import secrets
+from datetime import datetime, timezone
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.app.config import settings
+from backend.app.core.cache import TTLCache
+from backend.app.core.invalidation import EventType, invalidation_bus
+from backend.app.core.singleflight import SingleFlight
+from backend.app.models import ApiKey
+
+API_KEY_MARKER = "ak_"
+
+# sha256(ключа) -> (id ключа, id пользователя)
+api_key_cache = TTLCache(ttl=settings.API_KEY_CACHE_TTL_SECONDS)
+api_key_flight = SingleFlight()
+
+invalidation_bus.subscribe(
+    EventType.API_KEY_REVOKED, lambda event: api_key_cache.pop(event.key)
+)
+invalidation_bus.on_resync(api_key_cache.clear)
+
+
+def is_api_key(token: str) -> bool:
+    return token.startswith(API_KEY_MARKER)
+
+
+def hash_api_key(key: str) -> str:
+    return hashlib.sha256(key.encode()).hexdigest()
+
+
+def generate_api_key() -> tuple[str, str, str]:
+    """Возвращает (ключ, префикс, хэш); сам ключ показывается только один раз"""
+    prefix = secrets.token_hex(6)
+    key = f"{API_KEY_MARKER}{prefix}_{secrets.token_urlsafe(32)}"
+    return key, prefix, hash_api_key(key)
+
+
+def _parse_prefix(key: str) -> str | None:
+    parts = key.split("_", 2)
+    if len(parts) != 3 or not parts[1] or not parts[2]:
+        return None
+    return parts[1]
+
+
+async def resolve_api_key(db: AsyncSession, key: str) -> tuple[int, int] | None:
+    """
+    Находит (id ключа, id пользователя) по ключу: без bcrypt, поиском по
+    индексированному префиксу и сравнением SHA-256, с кэшем по хэшу ключа.
+    """
+    key_hash = hash_api_key(key)
+    cached = api_key_cache.get(key_hash)
+    if cached is not None:
+        return cached
+    return await api_key_flight.do(key_hash, lambda: _query_api_key(db, key, key_hash))
+
+
+async def _query_api_key(
+    db: AsyncSession, key: str, key_hash: str
+) -> tuple[int, int] | None:
+    prefix = _parse_prefix(key)
+    if prefix is None:
+        return None
+
+    result = await db.execute(
+        select(ApiKey.id, ApiKey.user_id, ApiKey.key_hash, ApiKey.expires_at).where(
+            ApiKey.prefix == prefix, ApiKey.revoked_at.is_(None)
+        )
+    )
+    row = result.first()
+    if row is None or not hmac.compare_digest(row.key_hash, key_hash):
+        return None
+
+    ttl = None
+    if row.expires_at is not None:
+        remaining = (row.expires_at - datetime.now(timezone.utc)).total_seconds()
+        if remaining <= 0:
+            return None
+        ttl = min(remaining, api_key_cache.ttl)
+
+    principal = (row.id, row.user_id)
+    api_key_cache.set(key_hash, principal, ttl)
+    return principal
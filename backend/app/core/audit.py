@@ -0,0 +1,158 @@
+import asyncio
+import logging
+from datetime import datetime, timezone
+
+from sqlalchemy import insert
+
+from backend.app.config import settings
+from backend.app.models import AuthEvent
+from db.session import engine
+
+logger = logging.getLogger(__name__)
+
+LOGIN_SUCCEEDED = "login_succeeded"
+LOGIN_FAILED = "login_failed"
+LOGIN_THROTTLED = "login_throttled"
+TOKENS_REFRESHED = "tokens_refreshed"
+LOGGED_OUT = "logged_out"
+PASSWORD_RESET_REQUESTED = "password_reset_requested"
+PASSWORD_RESET = "password_reset"
+PERMISSION_DENIED = "permission_denied"
+
+
+class AuditLog:
+    """
+    Буферизованный журнал событий аутентификации.
+
+    record() только добавляет событие в память и не делает запросов к БД;
+    фоновая задача периодически пишет буфер в auth_events одним многострочным
+    INSERT. Буфер ограничен max_buffer (AUDIT_MAX_BUFFER): если БД не успевает
+    или недоступна, новые события сверх лимита теряются — журнал никогда не
+    замедляет обработку запросов. Потерянные события считаются в dropped и
+    видны в GET /v1/superusers/debug/audit; рост счётчика — сигнал тревоги.
+    """
+
+    def __init__(self, max_buffer: int, batch_size: int, flush_interval: float):
+        self.max_buffer = max_buffer
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.dropped = 0
+        self.written = 0
+        self.failed_flushes = 0
+        self._buffer: list[dict] = []
+        self._wakeup = asyncio.Event()
+        self._stopping = False
+        self._task: asyncio.Task | None = None
+
+    def record(
+        self,
+        event_type: str,
+        user_id: int | None = None,
+        email: str | None = None,
+        ip: str | None = None,
+        detail: str | None = None,
+    ) -> None:
+        if len(self._buffer) >= self.max_buffer:
+            self.dropped += 1
+            if self.dropped % 1000 == 1:
+                logger.warning(f"Audit buffer is full, dropped {self.dropped} events")
+            return
+
+        self._buffer.append(
+            {
+                "created_at": datetime.now(timezone.utc),
+                "event_type": event_type,
+                "user_id": user_id,
+                "email": str(email) if email is not None else None,
+                "ip": ip,
+                "detail": detail[:255] if detail else None,
+            }
+        )
+        if len(self._buffer) >= self.batch_size:
+            self._wakeup.set()
+
+    async def flush(self) -> int:
+        written = 0
+        while self._buffer:
+            batch = self._buffer[: self.batch_size]
+            del self._buffer[: self.batch_size]
+            try:
+                async with engine.begin() as conn:
+                    await conn.execute(insert(AuthEvent).values(batch))
+                written += len(batch)
+                self.written += len(batch)
+            except asyncio.CancelledError:
+                self._buffer[:0] = batch
+                raise
+            except Exception as e:
+                self.failed_flushes += 1
+                # Пачка возвращается в начало буфера до следующей попытки; то, что
+                # не помещается в max_buffer вместе с новыми событиями, теряется
+                self._buffer[:0] = batch
+                lost = len(self._buffer) - self.max_buffer
+                if lost > 0:
+                    del self._buffer[self.max_buffer :]
+                    self.dropped += lost
+                logger.error(
+                    f"Failed to write {len(batch)} audit events, will retry: {e}; "
+                    f"dropped {max(lost, 0)} events"
+                )
+                break
+        return written
+
+    def snapshot(self) -> dict:
+        return {
+            "buffered": len(self._buffer),
+            "max_buffer": self.max_buffer,
+            "written": self.written,
+            "dropped": self.dropped,
+            "failed_flushes": self.failed_flushes,
+        }
+
+    def prometheus(self) -> str:
+        lines = []
+        for name, value, help_text in (
+            ("audit_events_written_total", self.written, "Events written"),
+            ("audit_events_dropped_total", self.dropped, "Events lost"),
+            ("audit_flush_failures_total", self.failed_flushes, "Failed flushes"),
+        ):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} counter")
+            lines.append(f"{name} {value}")
+        lines.append("# TYPE audit_events_buffered gauge")
+        lines.append(f"audit_events_buffered {len(self._buffer)}")
+        return "\n".join(lines) + "\n"
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._stopping = False
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """
+        Останавливает фоновую задачу без cancel(): начатая запись пачки
+        завершается, а затем буфер дописывается до конца.
+        """
+        if self._task is not None:
+            self._stopping = True
+            self._wakeup.set()
+            await self._task
+            self._task = None
+        await self.flush()
+
+    async def _run(self) -> None:
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            if not self._stopping:
+                await self.flush()
+
+
+audit_log = AuditLog(
+    max_buffer=settings.AUDIT_MAX_BUFFER,
+    batch_size=settings.AUDIT_BATCH_SIZE,
+    flush_interval=settings.AUDIT_FLUSH_INTERVAL_SECONDS,
+)
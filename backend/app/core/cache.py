@@ -0,0 +1,38 @@
+import time
+from typing import Any, Hashable
+
+
+class TTLCache:
+    """Простой кэш процесса с ограничением по времени жизни и размеру"""
+
+    def __init__(self, ttl: float, max_size: int = 10_000):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._data: dict[Hashable, tuple[float, Any]] = {}
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        item = self._data.get(key)
+        if item is None:
+            return default
+        expires_at, value = item
+        if expires_at <= time.monotonic():
+            self._data.pop(key, None)
+            return default
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: float | None = None) -> None:
+        if self.ttl <= 0 and ttl is None:
+            return
+        self._data.pop(key, None)
+        self._data[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), value)
+        while len(self._data) > self.max_size:
+            del self._data[next(iter(self._data))]
+
+    def pop(self, key: Hashable) -> None:
+        self._data.pop(key, None)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
@@ -0,0 +1,184 @@
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import Row, delete, select, tuple_, update
+
+from backend.app.config import settings
+from backend.app.core.send_email import send_email
+from backend.app.models import EmailOutbox
+from db.session import AsyncSessionLocal, engine
+
+logger = logging.getLogger(__name__)
+
+
+async def claim_batch(batch_size: int) -> list[Row]:
+    """
+    Забирает пачку готовых к отправке писем короткой транзакцией.
+
+    Строки выбираются через FOR UPDATE SKIP LOCKED и переводятся в sending
+    с арендой до available_at, поэтому несколько отправителей разбирают
+    очередь параллельно, а блокировки снимаются до обращения к SMTP. Письма
+    упавшего отправителя забираются снова после окончания аренды. Момент
+    окончания аренды (lease_until) служит меткой захвата для _update_claimed.
+    """
+    now = datetime.now(timezone.utc)
+    due = (
+        select(EmailOutbox.id)
+        .where(
+            EmailOutbox.status.in_(("pending", "sending")),
+            EmailOutbox.available_at <= now,
+        )
+        .order_by(EmailOutbox.available_at, EmailOutbox.id)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+    )
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            update(EmailOutbox)
+            .where(EmailOutbox.id.in_(due))
+            .values(
+                status="sending",
+                attempts=EmailOutbox.attempts + 1,
+                available_at=now
+                + timedelta(seconds=settings.EMAIL_OUTBOX_LEASE_SECONDS),
+            )
+            .returning(
+                EmailOutbox.id,
+                EmailOutbox.to_email,
+                EmailOutbox.subject,
+                EmailOutbox.body,
+                EmailOutbox.attempts,
+                EmailOutbox.available_at.label("lease_until"),
+            )
+            .execution_options(synchronize_session=False)
+        )
+        messages = result.all()
+        await db.commit()
+    return sorted(messages, key=lambda m: m.id)
+
+
+async def _update_claimed(messages: list[Row], **values) -> None:
+    """
+    Итог отправки. Строка обновляется, только если она всё ещё в нашей аренде:
+    повторный захват другим отправителем записывает новый available_at, и
+    итог опоздавшего отправителя его не перезаписывает.
+    """
+    claims = [(m.id, m.lease_until) for m in messages]
+    async with AsyncSessionLocal() as db:
+        await db.execute(
+            update(EmailOutbox)
+            .where(
+                tuple_(EmailOutbox.id, EmailOutbox.available_at).in_(claims),
+                EmailOutbox.status == "sending",
+            )
+            .values(**values)
+            .execution_options(synchronize_session=False)
+        )
+        await db.commit()
+
+
+def _result_values(attempts: int, sent: bool) -> dict:
+    now = datetime.now(timezone.utc)
+    if sent:
+        return {"status": "sent", "sent_at": now, "last_error": None}
+    if attempts >= settings.EMAIL_OUTBOX_MAX_ATTEMPTS:
+        return {"status": "failed", "last_error": "Delivery failed, giving up"}
+    delay = settings.EMAIL_OUTBOX_RETRY_BASE_SECONDS * 2 ** (attempts - 1)
+    return {
+        "status": "pending",
+        "available_at": now + timedelta(seconds=delay),
+        "last_error": "Delivery failed, will retry",
+    }
+
+
+async def drain_once(batch_size: int = settings.EMAIL_OUTBOX_BATCH_SIZE) -> int:
+    """
+    Отправляет пачку писем: захват, отправка вне транзакции, итог каждого
+    письма отдельной короткой транзакцией.
+    """
+    messages = await claim_batch(batch_size)
+    # Запас до конца аренды, чтобы письмо не забрал и не отправил второй процесс
+    deadline = time.monotonic() + settings.EMAIL_OUTBOX_LEASE_SECONDS * 0.8
+
+    for index, message in enumerate(messages):
+        if time.monotonic() > deadline:
+            rest = messages[index:]
+            logger.warning(f"Аренда истекает, {len(rest)} писем возвращены в очередь")
+            await _update_claimed(
+                rest,
+                status="pending",
+                attempts=EmailOutbox.attempts - 1,
+                available_at=datetime.now(timezone.utc),
+            )
+            break
+
+        sent = await send_email(message.to_email, message.subject, message.body)
+        if not sent and message.attempts >= settings.EMAIL_OUTBOX_MAX_ATTEMPTS:
+            logger.error(
+                f"Письмо {message.id} не отправлено после {message.attempts} попыток"
+            )
+        await _update_claimed([message], **_result_values(message.attempts, sent))
+    return len(messages)
+
+
+async def purge_sent(
+    retention_days: int = settings.EMAIL_OUTBOX_RETENTION_DAYS,
+    batch_size: int = 5000,
+) -> int:
+    """Удаляет отправленные письма старше retention_days пачками по batch_size"""
+    cutoff = datetime.now(timezone.utc) - timedelta(days=retention_days)
+    total = 0
+    while True:
+        expired = (
+            select(EmailOutbox.id)
+            .where(EmailOutbox.status == "sent", EmailOutbox.sent_at < cutoff)
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+        )
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                delete(EmailOutbox)
+                .where(EmailOutbox.id.in_(expired))
+                .execution_options(synchronize_session=False)
+            )
+            await db.commit()
+        total += result.rowcount
+        if result.rowcount < batch_size:
+            return total
+
+
+async def run_drainer():
+    logger.info("Email outbox drainer started")
+    next_purge = 0.0
+    while True:
+        try:
+            processed = await drain_once()
+        except Exception as e:
+            logger.error(f"Ошибка обработки email outbox: {e}")
+            processed = 0
+
+        if time.monotonic() >= next_purge:
+            next_purge = time.monotonic() + settings.EMAIL_OUTBOX_PURGE_INTERVAL_SECONDS
+            try:
+                purged = await purge_sent()
+                if purged:
+                    logger.info(f"Удалено {purged} отправленных писем из email outbox")
+            except Exception as e:
+                logger.error(f"Ошибка очистки email outbox: {e}")
+
+        if processed < settings.EMAIL_OUTBOX_BATCH_SIZE:
+            await asyncio.sleep(settings.EMAIL_OUTBOX_POLL_INTERVAL_SECONDS)
+
+
+async def main():
+    logging.basicConfig(level=logging.INFO)
+    try:
+        await run_drainer()
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,381 @@
+import base64
+import hashlib
+import json
+import logging
+import math
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+
+from redis.asyncio import Redis
+from starlette.requests import cookie_parser
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from backend.app.config import settings
+from backend.app.core.cache import TTLCache
+from backend.app.core.redis_client import build_redis_client
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENCY_HEADER = b"idempotency-key"
+REPLAYED_HEADER = b"idempotent-replayed"
+MAX_KEY_LENGTH = 255
+MAX_RESPONSE_BYTES = 64 * 1024
+
+# Неидемпотентные маршруты, которые мобильные клиенты повторяют при обрыве связи
+IDEMPOTENT_PATHS = (
+    "/v1/auth/register",
+    "/v1/auth/refresh",
+    "/v1/users/password/forgot",
+)
+# Ответы, после которых повтор должен выполниться заново
+UNCACHED_STATUSES = (408, 409, 429)
+
+SUPPORTED_BACKENDS = ("memory", "redis")
+
+
+@dataclass
+class IdempotencyRecord:
+    """Отпечаток запроса и сохранённый ответ; status None — запрос ещё выполняется"""
+
+    fingerprint: str
+    status: int | None = None
+    headers: list[tuple[bytes, bytes]] = field(default_factory=list)
+    body: bytes = b""
+
+    def dumps(self) -> str:
+        return json.dumps(
+            {
+                "fingerprint": self.fingerprint,
+                "status": self.status,
+                "headers": [
+                    [name.decode("latin-1"), value.decode("latin-1")]
+                    for name, value in self.headers
+                ],
+                "body": base64.b64encode(self.body).decode(),
+            }
+        )
+
+    @classmethod
+    def loads(cls, data: bytes | str) -> "IdempotencyRecord":
+        raw = json.loads(data)
+        return cls(
+            fingerprint=raw["fingerprint"],
+            status=raw["status"],
+            headers=[
+                (name.encode("latin-1"), value.encode("latin-1"))
+                for name, value in raw["headers"]
+            ],
+            body=base64.b64decode(raw["body"]),
+        )
+
+
+class IdempotencyStore(ABC):
+    @abstractmethod
+    async def reserve(
+        self, key: str, record: IdempotencyRecord, ttl: float
+    ) -> IdempotencyRecord | None:
+        """Занимает свободный ключ записью record, иначе возвращает существующую"""
+
+    @abstractmethod
+    async def save(self, key: str, record: IdempotencyRecord, ttl: float) -> None:
+        pass
+
+    @abstractmethod
+    async def release(self, key: str) -> None:
+        pass
+
+    async def close(self) -> None:
+        pass
+
+
+class MemoryIdempotencyStore(IdempotencyStore):
+    """Ответы в памяти воркера: повтор, попавший в другой воркер, выполнится заново"""
+
+    def __init__(self, max_size: int = 10_000):
+        self._records = TTLCache(ttl=0, max_size=max_size)
+
+    async def reserve(
+        self, key: str, record: IdempotencyRecord, ttl: float
+    ) -> IdempotencyRecord | None:
+        existing = self._records.get(key)
+        if existing is None:
+            self._records.set(key, record, ttl=ttl)
+        return existing
+
+    async def save(self, key: str, record: IdempotencyRecord, ttl: float) -> None:
+        self._records.set(key, record, ttl=ttl)
+
+    async def release(self, key: str) -> None:
+        self._records.pop(key)
+
+
+class RedisIdempotencyStore(IdempotencyStore):
+    """Ответы в Redis, общие для всех воркеров"""
+
+    def __init__(self, client: Redis, prefix: str = "idempotency:"):
+        self.client = client
+        self.prefix = prefix
+
+    async def reserve(
+        self, key: str, record: IdempotencyRecord, ttl: float
+    ) -> IdempotencyRecord | None:
+        async with self.client.pipeline(transaction=False) as pipe:
+            pipe.set(self.prefix + key, record.dumps(), nx=True, ex=math.ceil(ttl))
+            pipe.get(self.prefix + key)
+            reserved, existing = await pipe.execute()
+        if reserved or existing is None:
+            return None
+        return IdempotencyRecord.loads(existing)
+
+    async def save(self, key: str, record: IdempotencyRecord, ttl: float) -> None:
+        await self.client.set(self.prefix + key, record.dumps(), ex=math.ceil(ttl))
+
+    async def release(self, key: str) -> None:
+        await self.client.delete(self.prefix + key)
+
+    async def close(self) -> None:
+        await self.client.aclose()
+
+
+def build_idempotency_store(
+    backend: str = settings.IDEMPOTENCY_STORE_BACKEND,
+) -> IdempotencyStore:
+    if backend == "memory":
+        return MemoryIdempotencyStore()
+    if backend == "redis":
+        return RedisIdempotencyStore(build_redis_client())
+    raise ValueError(f"Unsupported idempotency store backend: {backend}")
+
+
+idempotency_store = build_idempotency_store()
+
+
+def _header(scope: Scope, name: bytes) -> bytes | None:
+    for header, value in scope.get("headers", ()):
+        if header == name:
+            return value
+    return None
+
+
+def _storage_key(scope: Scope, key: bytes) -> str:
+    """
+    Ключ клиента привязан к маршруту и учётным данным запроса: ответ refresh
+    с новыми токенами не достанется тому, у кого нет того же refresh-токена.
+    """
+    credential = _header(scope, b"authorization") or b""
+    cookie = _header(scope, b"cookie")
+    if cookie:
+        refresh_token = cookie_parser(cookie.decode("latin-1")).get("refresh_token")
+        credential += (refresh_token or "").encode()
+    digest = hashlib.sha256()
+    for part in (scope["path"].encode(), key, credential):
+        digest.update(part + b"\0")
+    return digest.hexdigest()
+
+
+def _fingerprint(scope: Scope, body: bytes) -> str:
+    digest = hashlib.sha256()
+    for part in (scope["method"].encode(), scope["query_string"], body):
+        digest.update(part + b"\0")
+    return digest.hexdigest()
+
+
+def _cacheable(status: int | None) -> bool:
+    return status is not None and status < 500 and status not in UNCACHED_STATUSES
+
+
+class _BodyTooLarge(Exception):
+    pass
+
+
+async def _buffer_request(
+    receive: Receive, max_bytes: int
+) -> tuple[bytes | None, Receive]:
+    """
+    Читает тело запроса целиком и возвращает receive, отдающий его приложению
+    повторно. Если клиент отключился, не дочитав тело, вместо тела — None;
+    тело больше max_bytes не дочитывается (_BodyTooLarge).
+    """
+    messages: list[Message] = []
+    complete = False
+    size = 0
+    while not complete:
+        message = await receive()
+        messages.append(message)
+        if message["type"] != "http.request":
+            break
+        size += len(message.get("body", b""))
+        if size > max_bytes:
+            raise _BodyTooLarge
+        complete = not message.get("more_body", False)
+
+    async def replay() -> Message:
+        if messages:
+            return messages.pop(0)
+        return await receive()
+
+    body = b"".join(m.get("body", b"") for m in messages) if complete else None
+    return body, replay
+
+
+async def _send_json(
+    send: Send, status: int, detail: str, headers: list | None = None
+) -> None:
+    body = json.dumps({"detail": detail}).encode()
+    await send(
+        {
+            "type": "http.response.start",
+            "status": status,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                *(headers or []),
+            ],
+        }
+    )
+    await send({"type": "http.response.body", "body": body})
+
+
+class IdempotencyMiddleware:
+    """
+    Заголовок Idempotency-Key для register, password/forgot и refresh.
+
+    Первый запрос с ключом выполняется как обычно, а его ответ (статус,
+    заголовки вместе с Set-Cookie, тело) хранится IDEMPOTENCY_TTL_SECONDS.
+    Повтор с тем же ключом и тем же запросом получает сохранённый ответ с
+    заголовком Idempotent-Replayed без обращения к обработчику — без записи в
+    БД, bcrypt и отправки писем. Повтор с тем же ключом, но другим телом или
+    параметрами получает 422, а повтор, пришедший до окончания первого
+    запроса, — 409. Ответы 5xx не сохраняются. Тело запроса с ключом больше
+    IDEMPOTENCY_MAX_BODY_BYTES не читается в память и получает 413.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (
+            scope["type"] != "http"
+            or scope["method"] != "POST"
+            or scope["path"] not in IDEMPOTENT_PATHS
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        key = _header(scope, IDEMPOTENCY_HEADER)
+        if key is None:
+            await self.app(scope, receive, send)
+            return
+        if not key.strip() or len(key) > MAX_KEY_LENGTH:
+            await _send_json(send, 400, "Invalid Idempotency-Key header")
+            return
+
+        max_body = settings.IDEMPOTENCY_MAX_BODY_BYTES
+        content_length = _header(scope, b"content-length") or b""
+        too_large = content_length.isdigit() and int(content_length) > max_body
+        if not too_large:
+            try:
+                body, receive = await _buffer_request(receive, max_body)
+            except _BodyTooLarge:
+                too_large = True
+        if too_large:
+            await _send_json(
+                send, 413, "Request body is too large for an idempotent request"
+            )
+            return
+        if body is None:
+            await self.app(scope, receive, send)
+            return
+
+        storage_key = _storage_key(scope, key)
+        record = IdempotencyRecord(fingerprint=_fingerprint(scope, body))
+        try:
+            existing = await idempotency_store.reserve(
+                storage_key, record, settings.IDEMPOTENCY_LOCK_SECONDS
+            )
+        except Exception:
+            # Недоступное хранилище не должно останавливать вход и регистрацию
+            logger.exception("Idempotency store is unavailable")
+            await self.app(scope, receive, send)
+            return
+
+        if existing is not None:
+            await self._send_existing(send, existing, record)
+            return
+        await self._run(scope, receive, send, storage_key, record)
+
+    @staticmethod
+    async def _send_existing(
+        send: Send, existing: IdempotencyRecord, record: IdempotencyRecord
+    ) -> None:
+        if existing.fingerprint != record.fingerprint:
+            await _send_json(
+                send, 422, "Idempotency-Key was already used for a different request"
+            )
+        elif existing.status is None:
+            await _send_json(
+                send,
+                409,
+                "A request with this Idempotency-Key is still in progress",
+                [(b"retry-after", b"1")],
+            )
+        else:
+            await send(
+                {
+                    "type": "http.response.start",
+                    "status": existing.status,
+                    "headers": [*existing.headers, (REPLAYED_HEADER, b"true")],
+                }
+            )
+            await send({"type": "http.response.body", "body": existing.body})
+
+    async def _run(
+        self,
+        scope: Scope,
+        receive: Receive,
+        send: Send,
+        storage_key: str,
+        record: IdempotencyRecord,
+    ) -> None:
+        chunks: list[bytes] = []
+        size = 0
+        saved = False
+
+        async def send_capturing(message: Message) -> None:
+            nonlocal size, saved
+            if message["type"] == "http.response.start":
+                record.status = message["status"]
+                record.headers = list(message.get("headers", []))
+            elif message["type"] == "http.response.body":
+                chunk = message.get("body", b"")
+                chunks.append(chunk)
+                size += len(chunk)
+            await send(message)
+
+            final = message["type"] == "http.response.body" and not message.get(
+                "more_body", False
+            )
+            # Сохраняем сразу после ответа, не дожидаясь фоновых задач обработчика
+            if final and _cacheable(record.status) and size <= MAX_RESPONSE_BYTES:
+                record.body = b"".join(chunks)
+                saved = await self._store(
+                    idempotency_store.save,
+                    storage_key,
+                    record,
+                    settings.IDEMPOTENCY_TTL_SECONDS,
+                )
+
+        try:
+            await self.app(scope, receive, send_capturing)
+        finally:
+            if not saved:
+                await self._store(idempotency_store.release, storage_key)
+
+    @staticmethod
+    async def _store(operation, *args) -> bool:
+        try:
+            await operation(*args)
+        except Exception:
+            logger.exception("Idempotency store is unavailable")
+            return False
+        return True
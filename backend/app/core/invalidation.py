@@ -0,0 +1,193 @@
+import asyncio
+import json
+import logging
+import os
+import secrets
+from dataclasses import dataclass
+from enum import Enum
+from typing import Callable
+
+import asyncpg
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from backend.app.config import settings
+from db.session import SYNC_DB_URL
+
+logger = logging.getLogger(__name__)
+
+# Postgres ограничивает payload NOTIFY 8000 байтами
+MAX_PAYLOAD_BYTES = 7000
+
+
+class EventType(str, Enum):
+    JTI_REVOKED = "jti_revoked"
+    USER_CHANGED = "user_changed"
+    RULES_CHANGED = "rules_changed"
+    API_KEY_REVOKED = "api_key_revoked"
+
+
+@dataclass(frozen=True)
+class InvalidationEvent:
+    type: EventType
+    key: str | None = None
+
+
+EventHandler = Callable[[InvalidationEvent], None]
+ResyncHandler = Callable[[], None]
+
+
+class InvalidationBus:
+    """
+    Шина инвалидации локальных кэшей между воркерами поверх Postgres LISTEN/NOTIFY.
+
+    События публикуются через pg_notify в транзакции вызывающего кода и
+    доставляются подписчикам — и других воркеров, и текущего — только после
+    её коммита. Иначе параллельный запрос успел бы прочитать ещё не изменённую
+    строку и вернуть её в только что очищенный кэш. Если соединение слушателя
+    было потеряно, после переподключения все кэши сбрасываются целиком,
+    поскольку пропущенные уведомления Postgres не хранит.
+    """
+
+    def __init__(
+        self,
+        dsn: str,
+        channel: str,
+        reconnect_delay: float = 1.0,
+        health_check_interval: float = 30.0,
+    ):
+        self.dsn = dsn
+        self.channel = channel
+        self.reconnect_delay = reconnect_delay
+        self.health_check_interval = health_check_interval
+        self._handlers: dict[EventType, list[EventHandler]] = {}
+        self._resync_handlers: list[ResyncHandler] = []
+        self._task: asyncio.Task | None = None
+        self._origin = f"{os.getpid()}-{secrets.token_hex(4)}"
+        self._pending_key = f"invalidation_events_{self._origin}"
+        event.listen(Session, "after_commit", self._after_commit)
+        event.listen(Session, "after_rollback", self._after_rollback)
+
+    def subscribe(self, event_type: EventType, handler: EventHandler) -> None:
+        self._handlers.setdefault(event_type, []).append(handler)
+
+    def on_resync(self, handler: ResyncHandler) -> None:
+        self._resync_handlers.append(handler)
+
+    async def publish(
+        self, db: AsyncSession, event_type: EventType, key: str | int | None = None
+    ) -> None:
+        """Ставит событие в транзакцию db; уходит подписчикам при коммите"""
+        await self.publish_many(db, event_type, [key])
+
+    async def publish_many(
+        self, db: AsyncSession, event_type: EventType, keys: list[str | int | None]
+    ) -> None:
+        """Несколько событий одного типа одним NOTIFY (или несколькими, если не влезают)"""
+        events = [
+            InvalidationEvent(type=event_type, key=str(k) if k is not None else None)
+            for k in keys
+        ]
+        for payload in self._payloads(event_type, events):
+            await db.execute(
+                text("SELECT pg_notify(:channel, :payload)"),
+                {"channel": self.channel, "payload": payload},
+            )
+        db.info.setdefault(self._pending_key, []).extend(events)
+
+    def _payloads(self, event_type: EventType, events: list[InvalidationEvent]):
+        keys: list[str | None] = []
+        size = 0
+        for e in events:
+            key_size = len(e.key or "") + 4
+            if keys and size + key_size > MAX_PAYLOAD_BYTES:
+                yield self._payload(event_type, keys)
+                keys, size = [], 0
+            keys.append(e.key)
+            size += key_size
+        if keys:
+            yield self._payload(event_type, keys)
+
+    def _payload(self, event_type: EventType, keys: list[str | None]) -> str:
+        return json.dumps(
+            {"type": event_type.value, "keys": keys, "origin": self._origin}
+        )
+
+    def _after_commit(self, session: Session) -> None:
+        for e in session.info.pop(self._pending_key, ()):
+            self._dispatch(e)
+
+    def _after_rollback(self, session: Session) -> None:
+        session.info.pop(self._pending_key, None)
+
+    def _dispatch(self, event: InvalidationEvent) -> None:
+        for handler in self._handlers.get(event.type, ()):
+            try:
+                handler(event)
+            except Exception:
+                logger.exception(f"Invalidation handler failed for {event}")
+
+    def _resync(self) -> None:
+        for handler in self._resync_handlers:
+            try:
+                handler()
+            except Exception:
+                logger.exception("Invalidation resync handler failed")
+
+    def _on_notification(self, connection, pid, channel, payload: str) -> None:
+        try:
+            data = json.loads(payload)
+            if data.get("origin") == self._origin:
+                return
+            event_type = EventType(data["type"])
+            keys = data["keys"] if "keys" in data else [data.get("key")]
+            events = [InvalidationEvent(type=event_type, key=key) for key in keys]
+        except (ValueError, KeyError, TypeError):
+            logger.warning(f"Malformed invalidation payload: {payload!r}")
+            return
+        for e in events:
+            self._dispatch(e)
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            connection = None
+            try:
+                connection = await asyncpg.connect(self.dsn)
+                lost = asyncio.Event()
+                connection.add_termination_listener(lambda _: lost.set())
+                await connection.add_listener(self.channel, self._on_notification)
+                # Пока слушателя не было, события могли быть пропущены
+                self._resync()
+                logger.info(f"Listening for cache invalidations on '{self.channel}'")
+                while not lost.is_set():
+                    try:
+                        await asyncio.wait_for(lost.wait(), self.health_check_interval)
+                    except asyncio.TimeoutError:
+                        # Обрыв TCP без закрытия соединения termination listener не замечает
+                        await connection.fetchval("SELECT 1", timeout=5)
+                logger.warning("Invalidation listener connection lost, reconnecting")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Invalidation listener error: {e}")
+            finally:
+                if connection is not None and not connection.is_closed():
+                    await connection.close()
+            await asyncio.sleep(self.reconnect_delay)
+
+
+invalidation_bus = InvalidationBus(SYNC_DB_URL, settings.INVALIDATION_CHANNEL)
@@ -0,0 +1,265 @@
+import asyncio
+import json
+import logging
+import math
+import time
+from collections import deque
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from backend.app.config import settings
+from backend.app.core.loop_monitor import loop_monitor
+
+logger = logging.getLogger(__name__)
+
+CREDENTIAL = "credential"
+TOKEN = "token"
+READ = "read"
+
+# Маршруты с bcrypt и отправкой писем
+CREDENTIAL_PREFIXES = (
+    "/v1/auth/login",
+    "/v1/auth/register",
+    "/v1/users/password/",
+)
+TOKEN_PREFIXES = (
+    "/v1/auth/refresh",
+    "/v1/auth/logout",
+    "/v1/auth/validate",
+)
+# Диагностика должна отвечать и при перегрузке, а выгрузки стримят ответ минутами
+EXEMPT_PREFIXES = (
+    "/v1/superusers/debug/",
+    "/v1/superusers/export/",
+)
+
+
+def classify(path: str) -> str | None:
+    if path.startswith(EXEMPT_PREFIXES):
+        return None
+    if path.startswith(CREDENTIAL_PREFIXES):
+        return CREDENTIAL
+    if path.startswith(TOKEN_PREFIXES):
+        return TOKEN
+    return READ
+
+
+class Overloaded(Exception):
+    def __init__(self, retry_after: int):
+        self.retry_after = retry_after
+
+
+class AdaptiveLimiter:
+    """
+    Ограничение числа одновременных запросов одного класса с очередью.
+
+    Лимит подстраивается по AIMD: после каждого быстрого ответа растёт примерно
+    на единицу за окно из limit запросов, а если ответ медленнее target_latency
+    или задержка event loop выше max_loop_lag (если задан) — уменьшается в
+    decrease_factor раз, но не чаще раза в target_latency. Запросы сверх лимита ждут в очереди
+    не дольше queue_timeout; при полной очереди сразу получают отказ.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        limit: int,
+        max_queue: int,
+        target_latency: float,
+        queue_timeout: float,
+        max_loop_lag: float | None = None,
+        min_limit: int = 1,
+        max_limit: int | None = None,
+        decrease_factor: float = 0.9,
+    ):
+        self.name = name
+        self.limit = float(limit)
+        self.min_limit = min_limit
+        self.max_limit = max_limit or limit * 4
+        self.max_queue = max_queue
+        self.target_latency = target_latency
+        self.queue_timeout = queue_timeout
+        self.max_loop_lag = max_loop_lag
+        self.decrease_factor = decrease_factor
+        self.in_flight = 0
+        self.rejected = 0
+        self.avg_latency = target_latency
+        self._waiters: deque[asyncio.Future] = deque()
+        self._last_decrease = 0.0
+
+    def _has_capacity(self) -> bool:
+        return self.in_flight < max(self.min_limit, int(self.limit))
+
+    def retry_after(self) -> int:
+        """Оценка времени, за которое освободится место для нового запроса"""
+        backlog = len(self._waiters) + 1
+        return max(1, math.ceil(self.avg_latency * backlog / max(self.limit, 1)))
+
+    def _reject(self) -> Overloaded:
+        self.rejected += 1
+        if self.rejected % 100 == 1:
+            logger.warning(
+                f"Shedding '{self.name}' requests: limit {int(self.limit)}, "
+                f"queue {len(self._waiters)}, rejected {self.rejected}"
+            )
+        return Overloaded(self.retry_after())
+
+    async def acquire(self) -> None:
+        if self._has_capacity() and not self._waiters:
+            self.in_flight += 1
+            return
+        if len(self._waiters) >= self.max_queue:
+            raise self._reject()
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(waiter, self.queue_timeout)
+        except asyncio.TimeoutError:
+            raise self._reject()
+        except asyncio.CancelledError:
+            # Место могло быть уже передано этому запросу
+            if waiter.done() and not waiter.cancelled():
+                self.release(None)
+            raise
+        finally:
+            if not waiter.done() or waiter.cancelled():
+                try:
+                    self._waiters.remove(waiter)
+                except ValueError:
+                    pass
+
+    def release(self, latency: float | None) -> None:
+        self.in_flight -= 1
+        if latency is not None:
+            self._adjust(latency)
+        while self._waiters and self._has_capacity():
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self.in_flight += 1
+                waiter.set_result(None)
+
+    def _adjust(self, latency: float) -> None:
+        self.avg_latency += (latency - self.avg_latency) * 0.1
+        now = time.monotonic()
+        overloaded = latency > self.target_latency or (
+            self.max_loop_lag is not None
+            and loop_monitor.recent_lag > self.max_loop_lag
+        )
+        if overloaded:
+            if now - self._last_decrease >= self.target_latency:
+                self._last_decrease = now
+                self.limit = max(self.min_limit, self.limit * self.decrease_factor)
+        else:
+            self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+
+    def snapshot(self) -> dict:
+        return {
+            "limit": int(self.limit),
+            "in_flight": self.in_flight,
+            "queued": len(self._waiters),
+            "rejected": self.rejected,
+            "avg_latency_seconds": self.avg_latency,
+        }
+
+
+def _limiter(
+    name: str,
+    limit: int,
+    queue: int,
+    target: float,
+    max_loop_lag: float | None = None,
+) -> AdaptiveLimiter:
+    return AdaptiveLimiter(
+        name,
+        limit=limit,
+        max_queue=queue,
+        target_latency=target,
+        queue_timeout=settings.LOAD_SHEDDING_QUEUE_TIMEOUT_SECONDS,
+        max_loop_lag=max_loop_lag,
+    )
+
+
+# Задержку event loop создаёт хэширование паролей при входе и регистрации (и в
+# потоке оно конкурирует за GIL), поэтому по ней сокращается только лимит этого
+# класса; токены и чтение подстраиваются по собственному времени ответа
+limiters = {
+    CREDENTIAL: _limiter(
+        CREDENTIAL,
+        settings.LOAD_SHEDDING_CREDENTIAL_LIMIT,
+        settings.LOAD_SHEDDING_CREDENTIAL_QUEUE,
+        settings.LOAD_SHEDDING_CREDENTIAL_TARGET_SECONDS,
+        max_loop_lag=settings.LOAD_SHEDDING_MAX_LOOP_LAG_SECONDS,
+    ),
+    TOKEN: _limiter(
+        TOKEN,
+        settings.LOAD_SHEDDING_TOKEN_LIMIT,
+        settings.LOAD_SHEDDING_TOKEN_QUEUE,
+        settings.LOAD_SHEDDING_TARGET_SECONDS,
+    ),
+    READ: _limiter(
+        READ,
+        settings.LOAD_SHEDDING_READ_LIMIT,
+        settings.LOAD_SHEDDING_READ_QUEUE,
+        settings.LOAD_SHEDDING_TARGET_SECONDS,
+    ),
+}
+
+
+class LoadSheddingMiddleware:
+    """
+    Раздельные лимиты параллельности для входа/регистрации, операций с токенами
+    и остальных запросов: шторм логинов упирается в свой лимит и не отнимает
+    пул соединений и CPU у дешёвых запросов. Сверх лимита и очереди — 503.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        request_class = classify(scope["path"]) if scope["type"] == "http" else None
+        if request_class is None:
+            await self.app(scope, receive, send)
+            return
+
+        limiter = limiters[request_class]
+        try:
+            await limiter.acquire()
+        except Overloaded as e:
+            await self._send_overloaded(send, e.retry_after)
+            return
+
+        started = time.monotonic()
+        latency = None
+
+        async def send_timed(message: Message) -> None:
+            nonlocal latency
+            # Время до начала ответа: медленный клиент или длинное тело не
+            # должны выглядеть как перегрузка сервера
+            if message["type"] == "http.response.start":
+                latency = time.monotonic() - started
+            await send(message)
+
+        completed = False
+        try:
+            await self.app(scope, receive, send_timed)
+            completed = True
+        finally:
+            # Ошибки и обрывы не учитываются в подстройке лимита
+            limiter.release(latency if completed else None)
+
+    @staticmethod
+    async def _send_overloaded(send: Send, retry_after: int) -> None:
+        body = json.dumps({"detail": "Server is overloaded, retry later"}).encode()
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 503,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode()),
+                    (b"retry-after", str(retry_after).encode()),
+                ],
+            }
+        )
+        await send({"type": "http.response.body", "body": body})
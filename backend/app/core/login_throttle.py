@@ -0,0 +1,112 @@
+import math
+import time
+from dataclasses import dataclass
+
+from fastapi import HTTPException, status
+
+from backend.app.config import settings
+
+
+@dataclass
+class _Attempts:
+    failures: int = 0
+    last_failure: float = 0.0
+    locked_until: float = 0.0
+
+
+class LoginThrottle:
+    """Счётчик неудачных попыток входа с экспоненциальной блокировкой ключа"""
+
+    def __init__(
+        self,
+        free_attempts: int,
+        base_delay: float,
+        max_delay: float,
+        reset_after: float,
+        max_entries: int = 100_000,
+    ):
+        self.free_attempts = free_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.reset_after = reset_after
+        self.max_entries = max_entries
+        self._entries: dict[str, _Attempts] = {}
+
+    def retry_after(self, key: str) -> float:
+        entry = self._entries.get(key)
+        if entry is None:
+            return 0.0
+        return max(0.0, entry.locked_until - time.monotonic())
+
+    def register_failure(self, key: str) -> None:
+        now = time.monotonic()
+        entry = self._entries.pop(key, None) or _Attempts()
+        if now - entry.last_failure > self.reset_after:
+            entry.failures = 0
+
+        entry.failures += 1
+        entry.last_failure = now
+        if entry.failures > self.free_attempts:
+            exponent = entry.failures - self.free_attempts - 1
+            delay = min(self.max_delay, self.base_delay * 2 ** min(exponent, 32))
+            entry.locked_until = now + delay
+
+        # Переставляем ключ в конец, чтобы самые старые записи вытеснялись первыми
+        self._entries[key] = entry
+        if len(self._entries) > self.max_entries:
+            self._prune(now)
+
+    def reset(self, key: str) -> None:
+        self._entries.pop(key, None)
+
+    def _prune(self, now: float) -> None:
+        stale = [
+            key
+            for key, entry in self._entries.items()
+            if entry.locked_until <= now and now - entry.last_failure > self.reset_after
+        ]
+        for key in stale:
+            del self._entries[key]
+        while len(self._entries) > self.max_entries:
+            del self._entries[next(iter(self._entries))]
+
+
+account_throttle = LoginThrottle(
+    free_attempts=settings.LOGIN_MAX_FREE_ATTEMPTS,
+    base_delay=settings.LOGIN_BACKOFF_BASE_SECONDS,
+    max_delay=settings.LOGIN_BACKOFF_MAX_SECONDS,
+    reset_after=settings.LOGIN_ATTEMPTS_RESET_SECONDS,
+)
+ip_throttle = LoginThrottle(
+    free_attempts=settings.LOGIN_IP_MAX_FREE_ATTEMPTS,
+    base_delay=settings.LOGIN_BACKOFF_BASE_SECONDS,
+    max_delay=settings.LOGIN_BACKOFF_MAX_SECONDS,
+    reset_after=settings.LOGIN_ATTEMPTS_RESET_SECONDS,
+)
+
+
+def _account_key(email: str) -> str:
+    return email.strip().lower()
+
+
+def ensure_login_allowed(email: str, ip: str | None) -> None:
+    """Отклоняет попытку входа до обращения к БД и bcrypt, если ключ заблокирован"""
+    retry_after = account_throttle.retry_after(_account_key(email))
+    if ip:
+        retry_after = max(retry_after, ip_throttle.retry_after(ip))
+    if retry_after > 0:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many login attempts",
+            headers={"Retry-After": str(math.ceil(retry_after))},
+        )
+
+
+def register_login_failure(email: str, ip: str | None) -> None:
+    account_throttle.register_failure(_account_key(email))
+    if ip:
+        ip_throttle.register_failure(ip)
+
+
+def register_login_success(email: str) -> None:
+    account_throttle.reset(_account_key(email))
@@ -0,0 +1,188 @@
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+from bisect import bisect_left
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime, timezone
+
+from backend.app.config import settings
+
+logger = logging.getLogger(__name__)
+
+LAG_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+class LagHistogram:
+    """Гистограмма задержек с фиксированными границами в формате Prometheus"""
+
+    def __init__(self, buckets: tuple[float, ...] = LAG_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def cumulative(self) -> list[tuple[str, int]]:
+        result = []
+        total = 0
+        for bound, count in zip((*self.buckets, "+Inf"), self.counts):
+            total += count
+            result.append((str(bound), total))
+        return result
+
+    def quantile(self, q: float) -> float:
+        """Оценка квантиля по верхней границе корзины"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        total = 0
+        for bound, count in zip(self.buckets, self.counts):
+            total += count
+            if total >= rank:
+                return bound
+        return self.max
+
+
+@dataclass(frozen=True)
+class BlockedLoop:
+    detected_at: datetime
+    blocked_for: float
+    stack: str
+
+
+class LoopMonitor:
+    """
+    Измерение задержки event loop и поиск блокирующего кода.
+
+    Фоновая задача просыпается каждые interval секунд и записывает в гистограмму,
+    насколько позже запланированного она получила управление. Отдельный
+    поток-наблюдатель проверяет, как давно задача отмечалась: если loop занят
+    дольше threshold, он снимает стек потока loop через sys._current_frames —
+    в нём видно, какой обработчик или колбэк блокирует выполнение.
+    """
+
+    def __init__(self, interval: float, threshold: float, max_reports: int = 50):
+        self.interval = interval
+        self.threshold = threshold
+        self.histogram = LagHistogram()
+        self.blocked: deque[BlockedLoop] = deque(maxlen=max_reports)
+        self.blocked_total = 0
+        # Сглаженная задержка последних замеров, для подстройки лимитов нагрузки
+        self.recent_lag = 0.0
+        self._heartbeat = time.monotonic()
+        self._loop_thread_id: int | None = None
+        self._task: asyncio.Task | None = None
+        self._watchdog: threading.Thread | None = None
+        self._stopped = threading.Event()
+
+    async def start(self) -> None:
+        if self._task is not None:
+            return
+        self._loop_thread_id = threading.get_ident()
+        self._heartbeat = time.monotonic()
+        self._stopped.clear()
+        self._task = asyncio.create_task(self._run())
+        self._watchdog = threading.Thread(
+            target=self._watch, name="loop-monitor", daemon=True
+        )
+        self._watchdog.start()
+
+    async def stop(self) -> None:
+        self._stopped.set()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._watchdog is not None:
+            self._watchdog.join(timeout=self.interval * 2)
+            self._watchdog = None
+
+    async def _run(self) -> None:
+        while True:
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            self._heartbeat = now
+            lag = max(0.0, now - expected)
+            self.histogram.observe(lag)
+            self.recent_lag += (lag - self.recent_lag) * 0.2
+
+    def _watch(self) -> None:
+        reported_beat = None
+        while not self._stopped.wait(self.threshold / 2):
+            beat = self._heartbeat
+            blocked_for = time.monotonic() - beat - self.interval
+            # Об одной остановке loop сообщаем один раз
+            if blocked_for < self.threshold or beat == reported_beat:
+                continue
+            reported_beat = beat
+            self.blocked_total += 1
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is None:
+                continue
+            stack = "".join(traceback.format_stack(frame))
+            self.blocked.append(
+                BlockedLoop(
+                    detected_at=datetime.now(timezone.utc),
+                    blocked_for=blocked_for,
+                    stack=stack,
+                )
+            )
+            logger.warning(
+                f"Event loop blocked for more than {blocked_for * 1000:.0f} ms:\n{stack}"
+            )
+
+    def snapshot(self) -> dict:
+        histogram = self.histogram
+        return {
+            "interval_seconds": self.interval,
+            "threshold_seconds": self.threshold,
+            "count": histogram.count,
+            "sum_seconds": histogram.sum,
+            "max_seconds": histogram.max,
+            "p50_seconds": histogram.quantile(0.5),
+            "p99_seconds": histogram.quantile(0.99),
+            "buckets": dict(histogram.cumulative()),
+            "blocked_total": self.blocked_total,
+            "blocked": [
+                {
+                    "detected_at": report.detected_at,
+                    "blocked_for_seconds": report.blocked_for,
+                    "stack": report.stack,
+                }
+                for report in reversed(self.blocked)
+            ],
+        }
+
+    def prometheus(self) -> str:
+        name = "event_loop_lag_seconds"
+        lines = [
+            f"# HELP {name} Delay between scheduled and actual wakeups of the event loop",
+            f"# TYPE {name} histogram",
+        ]
+        for bound, count in self.histogram.cumulative():
+            lines.append(f'{name}_bucket{{le="{bound}"}} {count}')
+        lines.append(f"{name}_sum {self.histogram.sum}")
+        lines.append(f"{name}_count {self.histogram.count}")
+        lines.append("# TYPE event_loop_blocked_total counter")
+        lines.append(f"event_loop_blocked_total {self.blocked_total}")
+        return "\n".join(lines) + "\n"
+
+
+loop_monitor = LoopMonitor(
+    interval=settings.LOOP_MONITOR_INTERVAL_SECONDS,
+    threshold=settings.LOOP_BLOCK_THRESHOLD_SECONDS,
+)
@@ -0,0 +1,127 @@
+import argparse
+import asyncio
+import secrets
+import time
+
+from passlib.context import CryptContext
+
+from backend.app.config import settings
+
+SUPPORTED_SCHEMES = ("bcrypt", "argon2")
+
+
+def build_password_context(
+    scheme: str = settings.PASSWORD_HASH_SCHEME,
+    bcrypt_rounds: int = settings.BCRYPT_ROUNDS,
+    argon2_time_cost: int = settings.ARGON2_TIME_COST,
+    argon2_memory_cost: int = settings.ARGON2_MEMORY_COST,
+    argon2_parallelism: int = settings.ARGON2_PARALLELISM,
+) -> CryptContext:
+    """
+    Контекст хэширования паролей.
+
+    Схема по умолчанию стоит первой, остальные помечаются устаревшими, а хэши
+    с другой стоимостью считаются требующими обновления — verify_and_update
+    перехэширует их при ближайшем успешном входе.
+    """
+    if scheme not in SUPPORTED_SCHEMES:
+        raise ValueError(f"Unsupported password hash scheme: {scheme}")
+
+    schemes = [scheme] + [s for s in SUPPORTED_SCHEMES if s != scheme]
+    context = CryptContext(
+        schemes=schemes,
+        default=scheme,
+        deprecated="auto",
+        bcrypt__default_rounds=bcrypt_rounds,
+        bcrypt__min_rounds=bcrypt_rounds,
+        bcrypt__max_rounds=bcrypt_rounds,
+        argon2__type="ID",
+        argon2__default_rounds=argon2_time_cost,
+        argon2__min_rounds=argon2_time_cost,
+        argon2__max_rounds=argon2_time_cost,
+        argon2__memory_cost=argon2_memory_cost,
+        argon2__parallelism=argon2_parallelism,
+    )
+    # passlib ищет библиотеку схемы только при первом хэшировании
+    if not context.handler(scheme).has_backend():
+        raise RuntimeError(
+            f"Password hash scheme {scheme} has no backend installed; "
+            f"install passlib[{scheme}]"
+        )
+    return context
+
+
+pwd_context = build_password_context()
+
+
+# bcrypt и argon2 занимают CPU на сотни миллисекунд и отпускают GIL, поэтому
+# выполняются в пуле потоков и не останавливают event loop воркера
+async def hash_password(password: str) -> str:
+    return await asyncio.to_thread(pwd_context.hash, password)
+
+
+async def verify_password(password: str, password_hash: str) -> bool:
+    return await asyncio.to_thread(pwd_context.verify, password, password_hash)
+
+
+async def verify_and_update_password(
+    password: str, password_hash: str
+) -> tuple[bool, str | None]:
+    """Проверяет пароль и возвращает новый хэш, если текущий устарел"""
+    return await asyncio.to_thread(
+        pwd_context.verify_and_update, password, password_hash
+    )
+
+
+def _measure_verify_ms(context: CryptContext, samples: int) -> float:
+    password = secrets.token_urlsafe(16)
+    password_hash = context.hash(password)
+    started = time.perf_counter()
+    for _ in range(samples):
+        context.verify(password, password_hash)
+    return (time.perf_counter() - started) * 1000 / samples
+
+
+def calibrate(scheme: str, target_ms: float, samples: int = 3) -> tuple[int, float]:
+    """Подбирает максимальную стоимость, при которой проверка укладывается в target_ms"""
+    if scheme == "bcrypt":
+        candidates = range(4, 32)
+    else:
+        candidates = range(1, 64)
+
+    best = None
+    for cost in candidates:
+        if scheme == "bcrypt":
+            context = build_password_context(scheme, bcrypt_rounds=cost)
+        else:
+            context = build_password_context(scheme, argon2_time_cost=cost)
+        elapsed = _measure_verify_ms(context, samples)
+        print(f"{scheme} cost={cost}: {elapsed:.1f} ms")
+        if elapsed > target_ms:
+            break
+        best = (cost, elapsed)
+
+    if best is None:
+        best = (candidates[0], elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Calibrate password hash cost for the current hardware"
+    )
+    parser.add_argument(
+        "--scheme", choices=SUPPORTED_SCHEMES, default=settings.PASSWORD_HASH_SCHEME
+    )
+    parser.add_argument("--target-ms", type=float, default=250.0)
+    parser.add_argument("--samples", type=int, default=3)
+    args = parser.parse_args()
+
+    cost, elapsed = calibrate(args.scheme, args.target_ms, args.samples)
+    setting = "BCRYPT_ROUNDS" if args.scheme == "bcrypt" else "ARGON2_TIME_COST"
+    print(f"\nRecommended: PASSWORD_HASH_SCHEME={args.scheme} {setting}={cost}")
+    print(f"Expected verify time: {elapsed:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
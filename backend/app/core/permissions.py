@@ -1,70 +1,74 @@
-from fastapi import HTTPException, status, Depends
-from sqlalchemy import select
+from fastapi import HTTPException, Request, status, Depends
+from slowapi.util import get_remote_address
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from backend.app.core.security import get_current_user
-from backend.app.models.access import AccessRule, BusinessObject, UserRole
-from backend.app.models.user import User
+from backend.app.core.access import RowScope, load_user_permissions
+from backend.app.core.audit import PERMISSION_DENIED, audit_log
+from backend.app.core.principal import Principal
+from backend.app.core.security import AuthContext, get_auth_context
 from db.session import get_db
 
 
 async def check_permission(
-    user: User, db: AsyncSession, object_name: str, action: str
+    user: Principal, db: AsyncSession, object_name: str, action: str
 ) -> bool:
     if user.is_superuser:
         return True
 
-    user_roles = await db.execute(select(UserRole).where(UserRole.user_id == user.id))
-    user_roles = user_roles.scalars().all()
-    role_ids = [ur.role_id for ur in user_roles]
+    permissions = await load_user_permissions(db, user.id)
+    return action in permissions.get(object_name, ())
 
-    if not role_ids:
-        return False
 
-    business_object = await db.execute(
-        select(BusinessObject).where(BusinessObject.name == object_name)
+def _permission_denied(
+    request: Request, auth: AuthContext, target: str
+) -> HTTPException:
+    audit_log.record(
+        PERMISSION_DENIED,
+        user_id=auth.user.id,
+        ip=get_remote_address(request),
+        detail=target,
     )
-    business_object = business_object.scalar_one_or_none()
-
-    if not business_object:
-        return False
-
-    access_rules = await db.execute(
-        select(AccessRule)
-        .where(AccessRule.role_id.in_(role_ids))
-        .where(AccessRule.object_id == business_object.id)
+    return HTTPException(
+        status_code=status.HTTP_403_FORBIDDEN, detail="Insufficient permissions"
     )
-    access_rules = access_rules.scalars().all()
-
-    for rule in access_rules:
-        if action == "read" and rule.can_read:
-            return True
-        elif action == "read_all" and rule.can_read_all:
-            return True
-        elif action == "create" and rule.can_create:
-            return True
-        elif action == "update" and rule.can_update:
-            return True
-        elif action == "update_all" and rule.can_update_all:
-            return True
-        elif action == "delete" and rule.can_delete:
-            return True
-        elif action == "delete_all" and rule.can_delete_all:
-            return True
-
-    return False
 
 
 def require_permission(object_name: str, action: str):
     async def permission_dependency(
-        current_user: User = Depends(get_current_user),
+        request: Request,
+        auth: AuthContext = Depends(get_auth_context),
         db: AsyncSession = Depends(get_db),
     ):
-        has_permission = await check_permission(current_user, db, object_name, action)
+        has_permission = await auth.has_permission(db, object_name, action)
         if not has_permission:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN, detail="Insufficient permissions"
-            )
-        return current_user
+            raise _permission_denied(request, auth, f"{object_name}:{action}")
+        return auth.user
 
     return permission_dependency
+
+
+async def require_superuser(
+    request: Request, auth: AuthContext = Depends(get_auth_context)
+) -> Principal:
+    if not auth.user.is_superuser:
+        raise _permission_denied(request, auth, f"superuser:{request.url.path}")
+    return auth.user
+
+
+def require_row_scope(object_name: str, action: str):
+    """
+    Как require_permission, но возвращает RowScope: при наличии только права
+    на свои записи запросы ограничиваются условием по owner_id.
+    """
+
+    async def row_scope_dependency(
+        request: Request,
+        auth: AuthContext = Depends(get_auth_context),
+        db: AsyncSession = Depends(get_db),
+    ) -> RowScope:
+        scope = await auth.get_row_scope(db, object_name, action)
+        if scope is None:
+            raise _permission_denied(request, auth, f"{object_name}:{action}")
+        return scope
+
+    return row_scope_dependency
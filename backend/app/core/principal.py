@@ -0,0 +1,93 @@
+from dataclasses import dataclass
+
+from sqlalchemy import Row, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.app.config import settings
+from backend.app.core.cache import TTLCache
+from backend.app.core.invalidation import EventType, invalidation_bus
+from backend.app.core.singleflight import SingleFlight
+from backend.app.models import User
+
+
+@dataclass(frozen=True, slots=True)
+class Principal:
+    """
+    Неизменяемый снимок пользователя для слоя аутентификации. Загружается
+    выборкой только нужных колонок, без identity map и ленивых связей ORM,
+    и безопасно хранится в кэшах процесса. Изменение данных пользователя
+    по-прежнему выполняется через модель User.
+    """
+
+    id: int
+    email: str
+    first_name: str | None
+    last_name: str | None
+    patronymic: str | None
+    is_active: bool
+    is_verified: bool
+    is_superuser: bool
+
+    @classmethod
+    def from_row(cls, row: Row) -> "Principal":
+        return cls(
+            id=row.id,
+            email=row.email,
+            first_name=row.first_name,
+            last_name=row.last_name,
+            patronymic=row.patronymic,
+            is_active=bool(row.is_active),
+            is_verified=bool(row.is_verified),
+            is_superuser=bool(row.is_superuser),
+        )
+
+
+PRINCIPAL_COLUMNS = (
+    User.id,
+    User.email,
+    User.first_name,
+    User.last_name,
+    User.patronymic,
+    User.is_active,
+    User.is_verified,
+    User.is_superuser,
+)
+
+# id пользователя -> Principal
+principal_cache = TTLCache(ttl=settings.AUTH_CACHE_TTL_SECONDS)
+# jti действующей сессии -> id пользователя
+session_cache = TTLCache(ttl=settings.AUTH_CACHE_TTL_SECONDS)
+# Одновременные промахи кэша по одному ключу идут в БД одним запросом
+principal_flight = SingleFlight()
+session_flight = SingleFlight()
+
+
+def _clear_caches() -> None:
+    principal_cache.clear()
+    session_cache.clear()
+
+
+invalidation_bus.subscribe(
+    EventType.USER_CHANGED, lambda event: principal_cache.pop(int(event.key))
+)
+invalidation_bus.subscribe(
+    EventType.JTI_REVOKED, lambda event: session_cache.pop(event.key)
+)
+invalidation_bus.on_resync(_clear_caches)
+
+
+async def load_principal(db: AsyncSession, user_id: int) -> Principal | None:
+    principal = principal_cache.get(user_id)
+    if principal is not None:
+        return principal
+    return await principal_flight.do(user_id, lambda: _query_principal(db, user_id))
+
+
+async def _query_principal(db: AsyncSession, user_id: int) -> Principal | None:
+    result = await db.execute(select(*PRINCIPAL_COLUMNS).where(User.id == user_id))
+    row = result.first()
+    if row is None:
+        return None
+    principal = Principal.from_row(row)
+    principal_cache.set(user_id, principal)
+    return principal
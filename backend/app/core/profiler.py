@@ -0,0 +1,239 @@
+import asyncio
+import inspect
+import itertools
+import os
+import secrets
+import sys
+import threading
+import time
+from collections import Counter, deque
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from backend.app.config import settings
+
+PROFILE_HEADER = b"x-profile"
+PROFILE_ID_HEADER = b"x-profile-id"
+
+# Пути модулей в стеках сокращаются до пути относительно sys.path
+_PATH_PREFIXES = sorted(
+    {os.path.abspath(p) + os.sep for p in sys.path if p} | {os.getcwd() + os.sep},
+    key=len,
+    reverse=True,
+)
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    filename = code.co_filename
+    for prefix in _PATH_PREFIXES:
+        if filename.startswith(prefix):
+            filename = filename[len(prefix) :]
+            break
+    return f"{filename}:{code.co_qualname}"
+
+
+LOOP_FRAME_LABEL = "[event loop]"
+
+_COROUTINE_FLAGS = (
+    inspect.CO_COROUTINE | inspect.CO_ITERABLE_COROUTINE | inspect.CO_ASYNC_GENERATOR
+)
+
+
+def loop_entry_code():
+    """
+    Код кадра, из которого loop вызывает задачи: первый кадр вне корутин
+    вызывающей задачи. Для стандартного loop это Handle._run, для uvloop,
+    который крутится в C, — Runner.run или код, вызвавший run_until_complete.
+    """
+    frame = sys._getframe(1)
+    while frame is not None and not frame.f_code.co_flags & _COROUTINE_FLAGS:
+        frame = frame.f_back
+    while frame is not None and frame.f_code.co_flags & _COROUTINE_FLAGS:
+        frame = frame.f_back
+    return frame.f_code if frame is not None else None
+
+
+def _collapse(frame, entry_code=None) -> str:
+    """Стек от корня к вершине; кадры запуска loop заменяются одной меткой"""
+    labels = []
+    while frame is not None:
+        if frame.f_code is entry_code:
+            labels.append(LOOP_FRAME_LABEL)
+            break
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    return ";".join(reversed(labels))
+
+
+def _waits_in_selector(frame) -> bool:
+    code = frame.f_code
+    return code.co_name == "select" and code.co_filename.endswith("selectors.py")
+
+
+def format_collapsed(stacks: Counter) -> str:
+    """Формат collapsed stacks для flamegraph.pl и speedscope"""
+    return "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
+
+
+class SamplingProfiler:
+    """
+    Сэмплирующий профилировщик потока event loop.
+
+    Отдельный поток раз в interval снимает стек потока loop через
+    sys._current_frames и считает одинаковые стеки, не вмешиваясь в
+    выполнение кода. Если задана task, учитываются только сэмплы, снятые
+    пока loop выполнял именно эту задачу. Создаётся из задачи в потоке loop.
+    """
+
+    def __init__(self, thread_id: int, interval: float):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.loop = asyncio.get_running_loop()
+        self.entry_code = loop_entry_code()
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self.idle = 0
+
+    def sample_once(self, task: asyncio.Task | None = None) -> None:
+        frame = sys._current_frames().get(self.thread_id)
+        if frame is None:
+            return
+        if task is not None and asyncio.current_task(self.loop) is not task:
+            return
+        self.samples += 1
+        if self._is_idle(frame):
+            self.idle += 1
+            return
+        self.stacks[_collapse(frame, self.entry_code)] += 1
+
+    def _is_idle(self, frame) -> bool:
+        """Поток loop ждёт событий и не выполняет ни задачу, ни Python-колбэк"""
+        if _waits_in_selector(frame):
+            return True
+        # uvloop ждёт событий в C: сверху остаётся только кадр запуска loop
+        return (
+            frame.f_code is self.entry_code and asyncio.current_task(self.loop) is None
+        )
+
+    def run(self, stop: threading.Event, task: asyncio.Task | None = None) -> None:
+        while not stop.wait(self.interval):
+            self.sample_once(task)
+
+
+_profile_lock = asyncio.Lock()
+
+
+async def profile_worker(seconds: float, interval: float) -> SamplingProfiler:
+    """Профилирует текущий воркер seconds секунд, пока он обслуживает трафик"""
+    profiler = SamplingProfiler(threading.get_ident(), interval)
+    stop = threading.Event()
+    sampler = threading.Thread(target=profiler.run, args=(stop,), daemon=True)
+    async with _profile_lock:
+        sampler.start()
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            stop.set()
+            await asyncio.to_thread(sampler.join)
+    return profiler
+
+
+def profiling_in_progress() -> bool:
+    return _profile_lock.locked()
+
+
+@dataclass
+class RequestProfile:
+    id: int
+    method: str
+    path: str
+    started_at: datetime
+    duration: float = 0.0
+    samples: int = 0
+    stacks: Counter = field(default_factory=Counter)
+
+
+class RequestProfiles:
+    """Кольцевой буфер профилей последних запросов, запросивших трассировку"""
+
+    def __init__(self, max_size: int):
+        self._profiles: deque[RequestProfile] = deque(maxlen=max_size)
+        self._ids = itertools.count(1)
+
+    def new(self, method: str, path: str) -> RequestProfile:
+        profile = RequestProfile(
+            id=next(self._ids),
+            method=method,
+            path=path,
+            started_at=datetime.now(timezone.utc),
+        )
+        self._profiles.append(profile)
+        return profile
+
+    def get(self, profile_id: int) -> RequestProfile | None:
+        for profile in self._profiles:
+            if profile.id == profile_id:
+                return profile
+        return None
+
+    def list(self) -> list[RequestProfile]:
+        return list(reversed(self._profiles))
+
+
+request_profiles = RequestProfiles(settings.PROFILER_MAX_REQUEST_PROFILES)
+
+
+def _profile_requested(scope: Scope) -> bool:
+    token = settings.PROFILER_REQUEST_TOKEN
+    if not token:
+        return False
+    for name, value in scope.get("headers", ()):
+        if name == PROFILE_HEADER:
+            return secrets.compare_digest(value, token.encode())
+    return False
+
+
+class RequestProfilerMiddleware:
+    """
+    Профилирование отдельного запроса по заголовку X-Profile с секретом из
+    PROFILER_REQUEST_TOKEN. Номер профиля возвращается в X-Profile-Id,
+    сам профиль — через /v1/superusers/debug/profile/requests/{id}.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not _profile_requested(scope):
+            await self.app(scope, receive, send)
+            return
+
+        profile = request_profiles.new(scope["method"], scope["path"])
+        profiler = SamplingProfiler(
+            threading.get_ident(), settings.PROFILER_INTERVAL_SECONDS
+        )
+        stop = threading.Event()
+        sampler = threading.Thread(
+            target=profiler.run, args=(stop, asyncio.current_task()), daemon=True
+        )
+
+        async def send_with_id(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((PROFILE_ID_HEADER, str(profile.id).encode()))
+                message["headers"] = headers
+            await send(message)
+
+        started = time.monotonic()
+        sampler.start()
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            stop.set()
+            await asyncio.to_thread(sampler.join)
+            profile.duration = time.monotonic() - started
+            profile.samples = profiler.samples
+            profile.stacks = profiler.stacks
@@ -0,0 +1,113 @@
+import logging
+from collections import Counter
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+
+from fastapi import Depends
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from backend.app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class QueryBudgetExceeded(RuntimeError):
+    pass
+
+
+@dataclass
+class QueryStats:
+    budget: int = settings.QUERY_BUDGET_DEFAULT
+    statements: int = 0
+    commits: int = 0
+    by_sql: Counter = field(default_factory=Counter)
+
+
+_current_stats: ContextVar[QueryStats | None] = ContextVar("query_stats", default=None)
+
+
+def current_query_stats() -> QueryStats | None:
+    return _current_stats.get()
+
+
+def query_budget(limit: int):
+    """Зависимость, задающая маршруту собственный лимит SQL-запросов на запрос"""
+
+    async def set_budget():
+        stats = _current_stats.get()
+        if stats is not None:
+            stats.budget = limit
+
+    return Depends(set_budget)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current_stats.get()
+    if stats is None:
+        return
+    stats.statements += 1
+    stats.by_sql[statement] += 1
+    if stats.statements > stats.budget and settings.QUERY_COUNTER_MODE == "raise":
+        raise QueryBudgetExceeded(
+            f"Query budget of {stats.budget} statements exceeded: {statement[:200]}"
+        )
+
+
+def _on_commit(conn):
+    stats = _current_stats.get()
+    if stats is not None:
+        stats.commits += 1
+
+
+def install_query_counter(engine: AsyncEngine) -> None:
+    event.listen(engine.sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine.sync_engine, "commit", _on_commit)
+
+
+class QueryCounterMiddleware:
+    """
+    Режим разработки: считает SQL-запросы и коммиты каждого HTTP-запроса,
+    отдаёт их в заголовках X-DB-Statements / X-DB-Commits и предупреждает о
+    превышении бюджета и о повторяющихся одинаковых запросах (признак N+1).
+    """
+
+    def __init__(self, app: ASGIApp, repeat_threshold: int = 3):
+        self.app = app
+        self.repeat_threshold = repeat_threshold
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats()
+        token = _current_stats.set(stats)
+
+        async def send_with_stats(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"x-db-statements", str(stats.statements).encode()))
+                headers.append((b"x-db-commits", str(stats.commits).encode()))
+                message["headers"] = headers
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_stats)
+        finally:
+            _current_stats.reset(token)
+            self._report(scope, stats)
+
+    def _report(self, scope: Scope, stats: QueryStats) -> None:
+        route = f"{scope.get('method')} {scope.get('path')}"
+        if stats.statements > stats.budget:
+            logger.warning(
+                f"{route}: {stats.statements} SQL statements, budget {stats.budget}"
+            )
+        for statement, count in stats.by_sql.items():
+            if count >= self.repeat_threshold:
+                logger.warning(
+                    f"{route}: possible N+1, statement executed {count} times: "
+                    f"{statement[:200]}"
+                )
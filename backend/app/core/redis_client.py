@@ -0,0 +1,19 @@
+from redis.asyncio import BlockingConnectionPool, Redis
+
+from backend.app.config import settings
+
+
+def build_redis_client() -> Redis:
+    """
+    Клиент redis-py с общим пулом соединений воркера. URL задаёт пароль,
+    базу и TLS (rediss://). При занятом пуле запрос ждёт свободное соединение
+    не дольше REDIS_TIMEOUT_SECONDS, как и ответа сервера.
+    """
+    pool = BlockingConnectionPool.from_url(
+        settings.REDIS_URL,
+        max_connections=settings.REDIS_POOL_SIZE,
+        timeout=settings.REDIS_TIMEOUT_SECONDS,
+        socket_timeout=settings.REDIS_TIMEOUT_SECONDS,
+        socket_connect_timeout=settings.REDIS_TIMEOUT_SECONDS,
+    )
+    return Redis(connection_pool=pool)
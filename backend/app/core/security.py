@@ -1,58 +1,221 @@
+from dataclasses import dataclass, field
 from datetime import datetime, timedelta, timezone
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from jose import JWTError, jwt
-from sqlalchemy import select
+from sqlalchemy import and_, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from backend.app.config import settings
+from backend.app.core.access import (
+    Permissions,
+    RowScope,
+    decode_permissions,
+    get_policy_version,
+    load_user_permissions,
+    load_user_roles,
+    resolve_row_scope,
+)
+from backend.app.core.api_keys import is_api_key, resolve_api_key
+from backend.app.core.principal import (
+    PRINCIPAL_COLUMNS,
+    Principal,
+    load_principal,
+    principal_cache,
+    session_cache,
+    session_flight,
+)
+from backend.app.core.session_store import session_store
 from backend.app.models import User, UserSession
 from db.session import get_db
 
 security = HTTPBearer()
+optional_security = HTTPBearer(auto_error=False)
 
 
-async def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: AsyncSession = Depends(get_db),
-) -> User:
+@dataclass
+class AuthContext:
+    """Результат аутентификации запроса, общий для всех зависимостей и обработчика"""
+
+    user: Principal
+    token_payload: dict
+    _permissions: Permissions | None = field(default=None, repr=False)
+    _roles: tuple[str, ...] | None = field(default=None, repr=False)
+
+    async def get_roles(self, db: AsyncSession) -> tuple[str, ...]:
+        if self._roles is None:
+            self._roles = await load_user_roles(db, self.user.id)
+        return self._roles
+
+    async def get_permissions(self, db: AsyncSession) -> Permissions:
+        if self._permissions is None:
+            self._permissions = await self._permissions_from_claims(db)
+        if self._permissions is None:
+            self._permissions = await load_user_permissions(db, self.user.id)
+        return self._permissions
+
+    async def _permissions_from_claims(self, db: AsyncSession) -> Permissions | None:
+        """Права из токена, если он выпущен при актуальной версии политики"""
+        encoded = self.token_payload.get("perm")
+        token_version = self.token_payload.get("pv")
+        if not settings.EMBED_PERMISSIONS_IN_TOKENS or encoded is None:
+            return None
+        if not isinstance(token_version, int):
+            return None
+        if token_version < await get_policy_version(db):
+            return None
+        return decode_permissions(encoded)
+
+    async def has_permission(
+        self, db: AsyncSession, object_name: str, action: str
+    ) -> bool:
+        if self.user.is_superuser:
+            return True
+        permissions = await self.get_permissions(db)
+        return action in permissions.get(object_name, ())
+
+    async def get_row_scope(
+        self, db: AsyncSession, object_name: str, action: str
+    ) -> RowScope | None:
+        permissions = {} if self.user.is_superuser else await self.get_permissions(db)
+        return resolve_row_scope(
+            self.user.id, self.user.is_superuser, permissions, object_name, action
+        )
+
+
+async def _authenticate_api_key(key: str, db: AsyncSession) -> AuthContext:
+    principal = await resolve_api_key(db, key)
+    if principal is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid API key"
+        )
+
+    key_id, user_id = principal
+    user = await load_principal(db, user_id)
+    if user is None or not user.is_active:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="User not found or inactive",
+        )
+
+    return AuthContext(
+        user=user,
+        token_payload={"sub": str(user_id), "type": "api_key", "key_id": key_id},
+    )
+
+
+async def _authenticate(token: str, db: AsyncSession) -> AuthContext:
+    if is_api_key(token):
+        return await _authenticate_api_key(token, db)
+
     try:
-        token = credentials.credentials
         payload = jwt.decode(
             token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
         )
-        user_id = payload.get("sub")
-        if user_id is None:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid authentication credentials",
-            )
+    except JWTError:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token"
+        )
+
+    user_id = payload.get("sub")
+    if user_id is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid authentication credentials",
+        )
 
-        session = await db.execute(
-            select(UserSession).where(UserSession.jti == payload.get("jti"))
+    user_id = int(user_id)
+    jti = payload.get("jti")
+    user = principal_cache.get(user_id)
+    if user is None or session_cache.get(jti) != user_id:
+        user = await session_flight.do(
+            (user_id, jti), lambda: _load_session_principal(db, user_id, jti)
         )
-        if not session.scalar_one_or_none():
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED, detail="Token revoked"
-            )
 
-        user = await db.get(User, int(user_id))
-        if user is None or not user.is_active:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="User not found or inactive",
-            )
+    if user is None or not user.is_active:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="User not found or inactive",
+        )
 
-        return user
-    except JWTError:
+    return AuthContext(user=user, token_payload=payload)
+
+
+async def _load_session_principal(
+    db: AsyncSession, user_id: int, jti: str | None
+) -> Principal | None:
+    """Снимок пользователя и наличие сессии токена одним запросом по колонкам"""
+    if not session_store.in_database:
+        return await _load_store_session_principal(db, user_id, jti)
+
+    result = await db.execute(
+        select(*PRINCIPAL_COLUMNS, UserSession.id.label("session_id"))
+        .outerjoin(
+            UserSession,
+            and_(UserSession.user_id == User.id, UserSession.jti == jti),
+        )
+        .where(User.id == user_id)
+    )
+    row = result.first()
+    if row is None:
+        return None
+    if row.session_id is None:
         raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token"
+            status_code=status.HTTP_401_UNAUTHORIZED, detail="Token revoked"
+        )
+
+    user = Principal.from_row(row)
+    principal_cache.set(user_id, user)
+    session_cache.set(jti, user_id)
+    return user
+
+
+async def _load_store_session_principal(
+    db: AsyncSession, user_id: int, jti: str | None
+) -> Principal | None:
+    """Пользователь из БД или кэша, сессия токена — из внешнего хранилища"""
+    user = await load_principal(db, user_id)
+    if user is None:
+        return None
+    if jti is None or not await session_store.exists(db, user_id, jti):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED, detail="Token revoked"
         )
 
+    session_cache.set(jti, user_id)
+    return user
+
+
+async def authenticate_request(
+    request: Request, token: str, db: AsyncSession
+) -> AuthContext:
+    auth = getattr(request.state, "auth", None)
+    if auth is None:
+        auth = await _authenticate(token, db)
+        request.state.auth = auth
+    return auth
+
+
+async def get_auth_context(
+    request: Request,
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: AsyncSession = Depends(get_db),
+) -> AuthContext:
+    return await authenticate_request(request, credentials.credentials, db)
+
+
+async def get_current_user(
+    auth: AuthContext = Depends(get_auth_context),
+) -> Principal:
+    return auth.user
+
 
-def create_access_token(user_id: int, jti: str) -> str:
+def create_access_token(
+    user_id: int, jti: str, extra_claims: dict | None = None
+) -> str:
     expires_delta = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     to_encode = {
+        **(extra_claims or {}),
         "sub": str(user_id),
         "exp": datetime.now(timezone.utc) + expires_delta,
         "type": "access",
@@ -1,3 +1,4 @@
+import asyncio
 import logging
 import smtplib
 from email.mime.application import MIMEApplication
@@ -7,8 +8,10 @@ from email.mime.text import MIMEText
 from email_validator import validate_email, EmailNotValidError
 from fastapi import BackgroundTasks, Request
 from pydantic import EmailStr, ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from backend.app.config import settings
+from backend.app.models import EmailOutbox
 
 logger = logging.getLogger(__name__)
 
@@ -19,10 +22,23 @@ async def send_email(
     body: str,
     file_content: bytes = None,
     filename: str = None,
-) -> None:
+) -> bool:
     """
-    Отправляет email через SMTP
+    Отправляет email через SMTP, возвращает True при успешной отправке.
+    smtplib блокирующий, поэтому отправка идёт в потоке, а не в event loop.
     """
+    return await asyncio.to_thread(
+        _send_email_sync, to_email, subject, body, file_content, filename
+    )
+
+
+def _send_email_sync(
+    to_email: EmailStr,
+    subject: str,
+    body: str,
+    file_content: bytes | None,
+    filename: str | None,
+) -> bool:
     try:
         valid = validate_email(str(to_email))
         to_email = valid.normalized
@@ -45,6 +61,7 @@ async def send_email(
             server.send_message(msg)
 
         logger.info(f"Письмо успешно отправлено на {to_email}")
+        return True
 
     except (EmailNotValidError, ValidationError) as e:
         logger.error(f"Ошибка валидации email: {e}")
@@ -54,10 +71,32 @@ async def send_email(
         logger.error(f"Ошибка SMTP: {e}")
     except Exception as e:
         logger.error(f"Неожиданная ошибка при отправке письма: {e}")
+    return False
+
+
+def deliver_email(
+    background_tasks: BackgroundTasks,
+    db: AsyncSession | None,
+    email: EmailStr,
+    subject: str,
+    body: str,
+) -> None:
+    """
+    В режиме outbox письмо записывается в email_outbox в текущей транзакции db
+    (вызывающий код делает commit), иначе отправляется фоновой задачей.
+    """
+    if settings.EMAIL_DELIVERY_MODE == "outbox" and db is not None:
+        db.add(EmailOutbox(to_email=str(email), subject=subject, body=body))
+    else:
+        background_tasks.add_task(send_email, email, subject, body)
 
 
 def send_verification_email(
-    background_tasks: BackgroundTasks, request: Request, email: EmailStr, token: str
+    background_tasks: BackgroundTasks,
+    request: Request,
+    email: EmailStr,
+    token: str,
+    db: AsyncSession | None = None,
 ):
 
     server_url = str(request.base_url).rstrip("/")
@@ -84,11 +123,15 @@ def send_verification_email(
     body = message
     logger.info(f"Письмо для верификации email отправлено на {email}")
 
-    background_tasks.add_task(send_email, email, subject, body)
+    deliver_email(background_tasks, db, email, subject, body)
 
 
 def send_password_reset_email(
-    background_tasks: BackgroundTasks, request: Request, email: EmailStr, token: str
+    background_tasks: BackgroundTasks,
+    request: Request,
+    email: EmailStr,
+    token: str,
+    db: AsyncSession | None = None,
 ):
     server_url = str(request.base_url).rstrip("/")
     reset_url = f"{server_url}/password/reset?token={token}"
@@ -120,4 +163,4 @@ def send_password_reset_email(
     body = message
     logger.info(f"Письмо для сброса пароля отправлено на {email}")
 
-    background_tasks.add_task(send_email, email, subject, body)
+    deliver_email(background_tasks, db, email, subject, body)
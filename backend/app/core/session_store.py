@@ -0,0 +1,204 @@
+import math
+import time
+from abc import ABC, abstractmethod
+from datetime import datetime, timezone
+
+from redis.asyncio import Redis
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.app.config import settings
+from backend.app.core.redis_client import build_redis_client
+from backend.app.models import UserSession
+
+SUPPORTED_BACKENDS = ("postgres", "memory", "redis")
+
+# Пары (jti, момент истечения)
+Sessions = list[tuple[str, datetime]]
+
+
+class SessionStore(ABC):
+    """
+    Хранилище сессий токенов: jti -> id пользователя с временем жизни.
+
+    Методы принимают сессию БД вызывающего кода: бэкенд postgres пишет в её
+    транзакцию, и изменения фиксирует commit() вызывающего кода. Остальные
+    бэкенды пишут сразу и сессию БД не используют.
+    """
+
+    # Сессии лежат в таблице user_sessions основной БД, поэтому проверку jti
+    # можно выполнить одним запросом вместе с загрузкой пользователя
+    in_database = False
+
+    @abstractmethod
+    async def add(self, db: AsyncSession, user_id: int, sessions: Sessions) -> None:
+        pass
+
+    @abstractmethod
+    async def exists(self, db: AsyncSession, user_id: int, jti: str) -> bool:
+        pass
+
+    @abstractmethod
+    async def revoke(self, db: AsyncSession, user_id: int, jti: str) -> list[str]:
+        """Удаляет сессию jti и все сессии пользователя, возвращает удалённые jti"""
+
+    async def close(self) -> None:
+        pass
+
+
+class PostgresSessionStore(SessionStore):
+    """Сессии в таблице user_sessions"""
+
+    in_database = True
+
+    async def add(self, db: AsyncSession, user_id: int, sessions: Sessions) -> None:
+        db.add_all(
+            UserSession(user_id=user_id, jti=jti, expires_at=expires_at)
+            for jti, expires_at in sessions
+        )
+
+    async def exists(self, db: AsyncSession, user_id: int, jti: str) -> bool:
+        result = await db.execute(
+            select(UserSession.id).where(
+                UserSession.jti == jti, UserSession.user_id == user_id
+            )
+        )
+        return result.first() is not None
+
+    async def revoke(self, db: AsyncSession, user_id: int, jti: str) -> list[str]:
+        revoked = []
+        session_q = await db.execute(select(UserSession).where(UserSession.jti == jti))
+        session = session_q.scalar_one_or_none()
+        if session:
+            await db.delete(session)
+            revoked.append(session.jti)
+
+        user_q = await db.execute(
+            select(UserSession).where(UserSession.user_id == user_id)
+        )
+        for session in user_q.scalars().all():
+            await db.delete(session)
+            revoked.append(session.jti)
+        return revoked
+
+
+class MemorySessionStore(SessionStore):
+    """
+    Сессии в памяти процесса. Не переживают перезапуск и не видны другим
+    воркерам, поэтому подходят только для одного воркера и локальных замеров.
+    """
+
+    def __init__(self):
+        # jti -> (id пользователя, unix-время истечения)
+        self._sessions: dict[str, tuple[int, float]] = {}
+        self._by_user: dict[int, set[str]] = {}
+        self._sweep_at = 1024
+
+    def _alive(self, jti: str, now: float) -> tuple[int, float] | None:
+        item = self._sessions.get(jti)
+        if item is not None and item[1] <= now:
+            self._forget(jti)
+            return None
+        return item
+
+    def _forget(self, jti: str) -> tuple[int, float] | None:
+        item = self._sessions.pop(jti, None)
+        if item is not None:
+            jtis = self._by_user.get(item[0])
+            if jtis is not None:
+                jtis.discard(jti)
+                if not jtis:
+                    del self._by_user[item[0]]
+        return item
+
+    def _sweep(self, now: float) -> None:
+        """Удаление истёкших сессий; порог растёт вместе с числом живых"""
+        for jti, (_, expires_at) in list(self._sessions.items()):
+            if expires_at <= now:
+                self._forget(jti)
+        self._sweep_at = max(1024, len(self._sessions) * 2)
+
+    async def add(self, db: AsyncSession, user_id: int, sessions: Sessions) -> None:
+        jtis = self._by_user.setdefault(user_id, set())
+        for jti, expires_at in sessions:
+            self._sessions[jti] = (user_id, expires_at.timestamp())
+            jtis.add(jti)
+        if len(self._sessions) >= self._sweep_at:
+            self._sweep(time.time())
+
+    async def exists(self, db: AsyncSession, user_id: int, jti: str) -> bool:
+        item = self._alive(jti, time.time())
+        return item is not None and item[0] == user_id
+
+    async def revoke(self, db: AsyncSession, user_id: int, jti: str) -> list[str]:
+        now = time.time()
+        revoked = []
+        for session_jti in [jti, *self._by_user.get(user_id, ())]:
+            item = self._forget(session_jti)
+            if item is not None and item[1] > now:
+                revoked.append(session_jti)
+        return revoked
+
+
+class RedisSessionStore(SessionStore):
+    """
+    Сессии в Redis: ключ сессии с TTL до истечения токена и множество jti
+    пользователя для отзыва всех его сессий.
+    """
+
+    def __init__(self, client: Redis, prefix: str = "auth:"):
+        self.client = client
+        self.prefix = prefix
+
+    def _session_key(self, jti: str) -> str:
+        return f"{self.prefix}session:{jti}"
+
+    def _user_key(self, user_id: int) -> str:
+        return f"{self.prefix}user_sessions:{user_id}"
+
+    async def add(self, db: AsyncSession, user_id: int, sessions: Sessions) -> None:
+        now = datetime.now(timezone.utc)
+        user_key = self._user_key(user_id)
+        max_ttl = 1
+        async with self.client.pipeline(transaction=False) as pipe:
+            for jti, expires_at in sessions:
+                ttl = max(1, math.ceil((expires_at - now).total_seconds()))
+                max_ttl = max(max_ttl, ttl)
+                pipe.set(self._session_key(jti), user_id, ex=ttl)
+            pipe.sadd(user_key, *(jti for jti, _ in sessions))
+            # Новая refresh-сессия живёт дольше всех прежних сессий пользователя
+            pipe.expire(user_key, max_ttl)
+            await pipe.execute()
+
+    async def exists(self, db: AsyncSession, user_id: int, jti: str) -> bool:
+        value = await self.client.get(self._session_key(jti))
+        return value == str(user_id).encode()
+
+    async def revoke(self, db: AsyncSession, user_id: int, jti: str) -> list[str]:
+        user_key = self._user_key(user_id)
+        members = await self.client.smembers(user_key)
+        jtis = [jti, *(m.decode() for m in members if m.decode() != jti)]
+        # Из множества убираются только прочитанные jti: сессия, созданная
+        # входом между SMEMBERS и удалением, остаётся в нём и может быть отозвана
+        async with self.client.pipeline(transaction=False) as pipe:
+            for j in jtis:
+                pipe.delete(self._session_key(j))
+            pipe.srem(user_key, *jtis)
+            deleted = await pipe.execute()
+        return [j for j, count in zip(jtis, deleted) if count]
+
+    async def close(self) -> None:
+        await self.client.aclose()
+
+
+def build_session_store(backend: str = settings.SESSION_STORE_BACKEND) -> SessionStore:
+    if backend == "postgres":
+        return PostgresSessionStore()
+    if backend == "memory":
+        return MemorySessionStore()
+    if backend == "redis":
+        return RedisSessionStore(build_redis_client())
+    raise ValueError(f"Unsupported session store backend: {backend}")
+
+
+session_store = build_session_store()
@@ -0,0 +1,65 @@
+import base64
+import hashlib
+import hmac
+import time
+from datetime import timedelta
+
+from backend.app.config import settings
+from backend.app.models import User
+
+VERIFY_EMAIL = "verify-email"
+RESET_PASSWORD = "reset-password"
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+
+def _b64decode(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+
+def _sign(purpose: str, payload: str) -> str:
+    digest = hmac.new(
+        settings.SECRET_KEY.encode(), f"{purpose}.{payload}".encode(), hashlib.sha256
+    ).digest()
+    return _b64encode(digest)
+
+
+def user_fingerprint(user: User) -> str:
+    """
+    Отпечаток состояния пользователя, которое меняет использование токена:
+    подтверждение email или смена пароля делают ранее выданные токены недействительными.
+    """
+    state = f"{user.id}:{user.password_hash}:{int(bool(user.is_verified))}"
+    digest = hmac.new(settings.SECRET_KEY.encode(), state.encode(), hashlib.sha256)
+    return digest.hexdigest()[:16]
+
+
+def is_signed_token(token: str) -> bool:
+    return "." in token
+
+
+def create_signed_token(purpose: str, user: User, expires_in: timedelta) -> str:
+    expires_at = int(time.time() + expires_in.total_seconds())
+    payload = _b64encode(f"{user.id}:{expires_at}:{user_fingerprint(user)}".encode())
+    return f"{payload}.{_sign(purpose, payload)}"
+
+
+def read_signed_token(purpose: str, token: str) -> tuple[int, str] | None:
+    """Возвращает (user_id, fingerprint) для валидного неистёкшего токена"""
+    payload, _, signature = token.partition(".")
+    # compare_digest не сравнивает строки с не-ASCII символами, поэтому байты
+    if not hmac.compare_digest(signature.encode(), _sign(purpose, payload).encode()):
+        return None
+    try:
+        user_id, expires_at, fingerprint = _b64decode(payload).decode().split(":")
+        if int(expires_at) < time.time():
+            return None
+        return int(user_id), fingerprint
+    except ValueError:
+        return None
+
+
+def fingerprint_matches(user: User, fingerprint: str) -> bool:
+    return hmac.compare_digest(user_fingerprint(user).encode(), fingerprint.encode())
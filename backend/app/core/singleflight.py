@@ -0,0 +1,57 @@
+import asyncio
+from typing import Awaitable, Callable, Hashable, TypeVar
+
+T = TypeVar("T")
+
+
+class _LeaderCancelled(Exception):
+    pass
+
+
+class SingleFlight:
+    """
+    Объединение одновременных одинаковых запросов внутри процесса.
+
+    Первый вызов do() для ключа выполняет fn, остальные вызовы с тем же ключом,
+    пришедшие до его завершения, ждут и получают тот же результат или то же
+    исключение. fn каждого вызывающего замкнута на его собственную сессию БД,
+    поэтому результат должен быть неизменяемым значением, а не ORM-объектом.
+    Если первый вызов отменён (клиент отключился), ожидающие повторяют вызов.
+    """
+
+    def __init__(self):
+        self._calls: dict[Hashable, asyncio.Future] = {}
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        call = self._calls.get(key)
+        if call is not None:
+            try:
+                return await asyncio.shield(call)
+            except _LeaderCancelled:
+                return await self.do(key, fn)
+
+        call = asyncio.get_running_loop().create_future()
+        self._calls[key] = call
+        try:
+            result = await fn()
+        except asyncio.CancelledError:
+            self._fail(call, _LeaderCancelled())
+            raise
+        except Exception as e:
+            self._fail(call, e)
+            raise
+        else:
+            call.set_result(result)
+            return result
+        finally:
+            del self._calls[key]
+
+    @staticmethod
+    def _fail(call: asyncio.Future, error: BaseException) -> None:
+        call.set_exception(error)
+        # Исключение уже получил ведущий вызов; без этого при отсутствии
+        # ожидающих asyncio пишет в лог "exception was never retrieved"
+        call.exception()
+
+    def __len__(self) -> int:
+        return len(self._calls)
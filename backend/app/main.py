@@ -10,9 +10,28 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 
-from backend.app.api.v1 import auth, user, example
+from backend.app.api.v1 import (
+    access,
+    admin_users,
+    api_keys,
+    audit,
+    auth,
+    debug,
+    user,
+    example,
+    export,
+)
 from backend.app.config import settings
-from db.init_db import init_db
+from backend.app.core.audit import audit_log
+from backend.app.core.idempotency import IdempotencyMiddleware, idempotency_store
+from backend.app.core.invalidation import invalidation_bus
+from backend.app.core.load_shedding import LoadSheddingMiddleware
+from backend.app.core.loop_monitor import loop_monitor
+from backend.app.core.profiler import RequestProfilerMiddleware
+from backend.app.core.query_counter import QueryCounterMiddleware, install_query_counter
+from backend.app.core.session_store import session_store
+from db.init_db import check_schema_version, init_db
+from db.session import engine
 
 
 def configure_logging(level=logging.INFO, log_file="logs/app.log") -> None:
@@ -66,8 +85,21 @@ configure_logging()
 async def lifespan(app: FastAPI):
     """Контекст жизненного цикла приложения"""
     logger.info("Starting Acti API application")
-    await init_db()
+    if settings.LOOP_MONITOR_ENABLED:
+        await loop_monitor.start()
+    if settings.DB_BOOTSTRAP_ON_STARTUP:
+        await init_db()
+    else:
+        await check_schema_version()
+    if settings.INVALIDATION_BUS_ENABLED:
+        await invalidation_bus.start()
+    await audit_log.start()
     yield
+    await audit_log.stop()
+    await invalidation_bus.stop()
+    await session_store.close()
+    await idempotency_store.close()
+    await loop_monitor.stop()
     logger.info("Shutting down Acti API application")
 
 
@@ -101,6 +133,32 @@ def configure_static_files(app: FastAPI) -> None:
     app.mount("/uploads", StaticFiles(directory=uploads_dir), name="uploads")
 
 
+def configure_query_counter(app: FastAPI) -> None:
+    """Подсчёт SQL-запросов на запрос и поиск N+1 в режиме разработки"""
+    if settings.QUERY_COUNTER_MODE == "off":
+        return
+    install_query_counter(engine)
+    app.add_middleware(QueryCounterMiddleware)
+
+
+def configure_load_shedding(app: FastAPI) -> None:
+    """Лимиты параллельности по классам маршрутов с отказом 503 при перегрузке"""
+    if settings.LOAD_SHEDDING_ENABLED:
+        app.add_middleware(LoadSheddingMiddleware)
+
+
+def configure_idempotency(app: FastAPI) -> None:
+    """Повтор сохранённого ответа на запросы с Idempotency-Key"""
+    if settings.IDEMPOTENCY_ENABLED:
+        app.add_middleware(IdempotencyMiddleware)
+
+
+def configure_profiler(app: FastAPI) -> None:
+    """Профилирование отдельных запросов по заголовку X-Profile"""
+    if settings.PROFILER_REQUEST_TOKEN:
+        app.add_middleware(RequestProfilerMiddleware)
+
+
 def configure_routers(app: FastAPI) -> None:
     """Регистрация всех роутеров"""
     html_routers = []
@@ -109,9 +167,16 @@ def configure_routers(app: FastAPI) -> None:
         (auth.router, "auth"),
         (user.router, "user"),
         (example.router, "example"),
+        (access.router, "access"),
     ]
 
-    superusers_routers = []
+    superusers_routers = [
+        (api_keys.router, "api-keys"),
+        (audit.router, "audit"),
+        (admin_users.router, "admin-users"),
+        (export.router, "export"),
+        (debug.router, "debug"),
+    ]
 
     websocket_routers = []
 
@@ -143,7 +208,12 @@ def create_app() -> FastAPI:
         openapi=custom_openapi,
     )
 
+    # До CORS, чтобы ответы 503 и повторённые ответы тоже получали CORS-заголовки
+    configure_idempotency(app)
+    configure_load_shedding(app)
     configure_cors(app, settings.CORS_ALLOWED_ORIGINS)
+    configure_query_counter(app)
+    configure_profiler(app)
     configure_routers(app)
     configure_static_files(app)
 
@@ -5,6 +5,10 @@ from backend.app.models.session import (
     VerificationToken,
     PasswordResetToken,
 )
+from backend.app.models.system import PolicyVersion, SchemaVersion
+from backend.app.models.api_key import ApiKey
+from backend.app.models.email_outbox import EmailOutbox
+from backend.app.models.audit import AuthEvent
 
 __all__ = [
     "User",
@@ -15,4 +19,9 @@ __all__ = [
     "UserSession",
     "VerificationToken",
     "PasswordResetToken",
+    "SchemaVersion",
+    "PolicyVersion",
+    "ApiKey",
+    "EmailOutbox",
+    "AuthEvent",
 ]
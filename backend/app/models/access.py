@@ -12,20 +12,20 @@ class Role(Base):
     name = Column(String(50), unique=True, nullable=False)
     description = Column(String)
 
-    users = relationship("UserRole", back_populates="role")
-    access_rules = relationship("AccessRule", back_populates="role")
+    users = relationship("UserRole", back_populates="role", lazy="raise")
+    access_rules = relationship("AccessRule", back_populates="role", lazy="raise")
 
 
 class UserRole(Base):
     __tablename__ = "user_roles"
 
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id"))
+    user_id = Column(Integer, ForeignKey("users.id"), index=True)
     role_id = Column(Integer, ForeignKey("roles.id"))
     created_at = Column(DateTime(timezone=True), default=func.now())
 
-    user = relationship("User", back_populates="roles")
-    role = relationship("Role", back_populates="users")
+    user = relationship("User", back_populates="roles", lazy="raise")
+    role = relationship("Role", back_populates="users", lazy="raise")
 
 
 class BusinessObject(Base):
@@ -36,7 +36,7 @@ class BusinessObject(Base):
     description = Column(String)
     created_at = Column(DateTime(timezone=True), default=func.now())
 
-    access_rules = relationship("AccessRule", back_populates="object")
+    access_rules = relationship("AccessRule", back_populates="object", lazy="raise")
 
 
 class AccessRule(Base):
@@ -54,5 +54,5 @@ class AccessRule(Base):
     can_delete_all = Column(Boolean, default=False)
     created_at = Column(DateTime(timezone=True), default=func.now())
 
-    role = relationship("Role", back_populates="access_rules")
-    object = relationship("BusinessObject", back_populates="access_rules")
+    role = relationship("Role", back_populates="access_rules", lazy="raise")
+    object = relationship("BusinessObject", back_populates="access_rules", lazy="raise")
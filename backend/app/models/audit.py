@@ -0,0 +1,23 @@
+from sqlalchemy import BigInteger, Column, DateTime, Identity, Index, Integer, String
+
+from db.session import Base
+
+
+class AuthEvent(Base):
+    """Журнал событий аутентификации, секционирован по месяцам (см. db/init_db.py)"""
+
+    __tablename__ = "auth_events"
+
+    id = Column(BigInteger, Identity(), primary_key=True)
+    created_at = Column(DateTime(timezone=True), primary_key=True, nullable=False)
+    event_type = Column(String(32), nullable=False)
+    user_id = Column(Integer, nullable=True)
+    email = Column(String, nullable=True)
+    ip = Column(String(64), nullable=True)
+    detail = Column(String(255), nullable=True)
+
+    __table_args__ = (
+        Index("ix_auth_events_created_at_id", "created_at", "id"),
+        Index("ix_auth_events_user_id_created_at", "user_id", "created_at"),
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
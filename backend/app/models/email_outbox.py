@@ -0,0 +1,37 @@
+from sqlalchemy import Column, DateTime, Index, Integer, String, Text, text
+from sqlalchemy.sql import func
+
+from db.session import Base
+
+
+class EmailOutbox(Base):
+    __tablename__ = "email_outbox"
+
+    id = Column(Integer, primary_key=True, index=True)
+    to_email = Column(String, nullable=False)
+    subject = Column(String(255), nullable=False)
+    body = Column(Text, nullable=False)
+    status = Column(String(16), nullable=False, default="pending")
+    attempts = Column(Integer, nullable=False, default=0)
+    last_error = Column(Text, nullable=True)
+    available_at = Column(
+        DateTime(timezone=True), nullable=False, server_default=func.now()
+    )
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    sent_at = Column(DateTime(timezone=True), nullable=True)
+
+    # pending — ждёт отправки, sending — забрано отправителем до available_at
+    # (аренда), sent / failed — итог
+    __table_args__ = (
+        Index(
+            "ix_email_outbox_due",
+            "available_at",
+            "id",
+            postgresql_where=text("status IN ('pending', 'sending')"),
+        ),
+        Index(
+            "ix_email_outbox_sent_at",
+            "sent_at",
+            postgresql_where=text("status = 'sent'"),
+        ),
+    )
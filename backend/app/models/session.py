@@ -10,13 +10,13 @@ class UserSession(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(
-        Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False
+        Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True
     )
     jti = Column(String(255), unique=True, nullable=False)
     expires_at = Column(DateTime(timezone=True), nullable=False)
     created_at = Column(DateTime(timezone=True), default=func.now())
 
-    user = relationship("User", back_populates="sessions")
+    user = relationship("User", back_populates="sessions", lazy="raise")
 
 
 class VerificationToken(Base):
@@ -30,7 +30,7 @@ class VerificationToken(Base):
     expires_at = Column(DateTime(timezone=True), nullable=False)
     created_at = Column(DateTime(timezone=True), default=func.now())
 
-    user = relationship("User", back_populates="verification_tokens")
+    user = relationship("User", back_populates="verification_tokens", lazy="raise")
 
 
 class PasswordResetToken(Base):
@@ -44,4 +44,4 @@ class PasswordResetToken(Base):
     expires_at = Column(DateTime(timezone=True), nullable=False)
     created_at = Column(DateTime(timezone=True), default=func.now())
 
-    user = relationship("User", back_populates="password_reset_tokens")
+    user = relationship("User", back_populates="password_reset_tokens", lazy="raise")
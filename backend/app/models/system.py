@@ -0,0 +1,29 @@
+from sqlalchemy import BigInteger, Column, DateTime, Integer
+from sqlalchemy.sql import func
+
+from db.session import Base
+
+
+class SchemaVersion(Base):
+    __tablename__ = "app_schema_version"
+
+    id = Column(Integer, primary_key=True)
+    version = Column(Integer, nullable=False)
+    applied_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+class PolicyVersion(Base):
+    """
+    Версия политики доступа, встроенная в access-токены (claim pv). Изменение
+    AccessRule или ролей существующих пользователей увеличивает её в той же
+    транзакции (см. _seed в db/init_db.py). Роль, выданная новому
+    пользователю, версию не меняет: токенов у него ещё нет.
+    """
+
+    __tablename__ = "app_policy_version"
+
+    id = Column(Integer, primary_key=True)
+    version = Column(BigInteger, nullable=False, default=1)
+    updated_at = Column(
+        DateTime(timezone=True), server_default=func.now(), onupdate=func.now()
+    )
@@ -1,4 +1,4 @@
-from sqlalchemy import Boolean, Column, DateTime, Integer, String
+from sqlalchemy import Boolean, Column, DateTime, Index, Integer, String
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 
@@ -17,31 +17,51 @@ class User(Base):
     is_active = Column(Boolean, default=False)
     is_verified = Column(Boolean, default=False)
     is_superuser = Column(Boolean, default=False)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    created_at = Column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False
+    )
     updated_at = Column(
         DateTime(timezone=True), server_default=func.now(), onupdate=func.now()
     )
     deleted_at = Column(DateTime(timezone=True), nullable=True)
 
-    roles = relationship("UserRole", back_populates="user")
+    roles = relationship("UserRole", back_populates="user", lazy="raise")
     sessions = relationship(
         "UserSession",
         back_populates="user",
         cascade="all, delete-orphan",
         passive_deletes=True,
+        lazy="raise",
     )
     verification_tokens = relationship(
         "VerificationToken",
         back_populates="user",
         cascade="all, delete-orphan",
         passive_deletes=True,
+        lazy="raise",
     )
     password_reset_tokens = relationship(
         "PasswordResetToken",
         back_populates="user",
         cascade="all, delete-orphan",
         passive_deletes=True,
+        lazy="raise",
+    )
+
+    __table_args__ = (
+        # Keyset-пагинация списка пользователей по (created_at, id)
+        Index("ix_users_created_at_id", "created_at", "id"),
     )
 
     def __repr__(self):
         return f"<User(id={self.id}, email={self.email})>"
+
+
+# Поиск по префиксу и подстроке (ILIKE): имя индекса -> колонка, требуется pg_trgm.
+# Индексы строит db/init_db.py через CREATE INDEX CONCURRENTLY вне транзакции
+# bootstrap, поэтому их нет в __table_args__ и create_all их не создаёт
+TRGM_INDEXES = {
+    "ix_users_email_trgm": "email",
+    "ix_users_first_name_trgm": "first_name",
+    "ix_users_last_name_trgm": "last_name",
+}
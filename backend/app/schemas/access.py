@@ -0,0 +1,20 @@
+from pydantic import BaseModel, Field
+
+
+class PermissionCheck(BaseModel):
+    object_name: str
+    action: str
+
+
+class AccessCheckRequest(BaseModel):
+    checks: list[PermissionCheck] = Field(min_length=1, max_length=500)
+
+
+class AccessCheckResponse(BaseModel):
+    bitmap: str
+    results: dict[str, bool]
+
+
+class EffectivePermissions(BaseModel):
+    is_superuser: bool
+    permissions: dict[str, list[str]]
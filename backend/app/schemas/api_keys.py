@@ -0,0 +1,25 @@
+from datetime import datetime
+
+from pydantic import BaseModel, Field
+
+
+class ApiKeyCreate(BaseModel):
+    user_id: int
+    name: str = Field(max_length=100)
+    expires_in_days: int | None = Field(default=None, gt=0, le=3650)
+
+
+class ApiKeyOut(BaseModel):
+    id: int
+    user_id: int
+    name: str
+    prefix: str
+    expires_at: datetime | None
+    revoked_at: datetime | None
+    created_at: datetime | None
+
+    model_config = {"from_attributes": True}
+
+
+class ApiKeyCreated(ApiKeyOut):
+    key: str
@@ -0,0 +1,20 @@
+from datetime import datetime
+
+from pydantic import BaseModel
+
+
+class AuthEventOut(BaseModel):
+    id: int
+    created_at: datetime
+    event_type: str
+    user_id: int | None
+    email: str | None
+    ip: str | None
+    detail: str | None
+
+    model_config = {"from_attributes": True}
+
+
+class AuthEventPage(BaseModel):
+    items: list[AuthEventOut]
+    next_cursor: str | None
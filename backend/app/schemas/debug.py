@@ -0,0 +1,49 @@
+from datetime import datetime
+
+from pydantic import BaseModel
+
+
+class BlockedLoopOut(BaseModel):
+    detected_at: datetime
+    blocked_for_seconds: float
+    stack: str
+
+
+class LoopLagStats(BaseModel):
+    interval_seconds: float
+    threshold_seconds: float
+    count: int
+    sum_seconds: float
+    max_seconds: float
+    p50_seconds: float
+    p99_seconds: float
+    buckets: dict[str, int]
+    blocked_total: int
+    blocked: list[BlockedLoopOut]
+
+
+class LimiterStats(BaseModel):
+    limit: int
+    in_flight: int
+    queued: int
+    rejected: int
+    avg_latency_seconds: float
+
+
+class AuditLogStats(BaseModel):
+    buffered: int
+    max_buffer: int
+    written: int
+    dropped: int
+    failed_flushes: int
+
+
+class RequestProfileOut(BaseModel):
+    id: int
+    method: str
+    path: str
+    started_at: datetime
+    duration: float
+    samples: int
+
+    model_config = {"from_attributes": True}
@@ -1,3 +1,5 @@
+from datetime import datetime
+
 from pydantic import BaseModel, EmailStr
 
 
@@ -21,4 +23,23 @@ class UserOut(BaseModel):
     is_active: bool
     is_verified: bool
 
-    model_config = {"from_attributes": True}
\ No newline at end of file
+    model_config = {"from_attributes": True}
+
+
+class UserListItem(BaseModel):
+    id: int
+    email: EmailStr
+    first_name: str | None
+    last_name: str | None
+    patronymic: str | None
+    is_active: bool | None
+    is_verified: bool | None
+    is_superuser: bool | None
+    created_at: datetime
+
+    model_config = {"from_attributes": True}
+
+
+class UserListPage(BaseModel):
+    items: list[UserListItem]
+    next_cursor: str | None
@@ -0,0 +1,69 @@
+from datetime import datetime, timedelta, timezone
+
+from fastapi import HTTPException
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.app.core.api_keys import generate_api_key
+from backend.app.core.invalidation import EventType, invalidation_bus
+from backend.app.models import ApiKey, User
+from backend.app.schemas.api_keys import ApiKeyCreate, ApiKeyCreated
+
+
+class ApiKeyService:
+    async def create_api_key(
+        self, db: AsyncSession, key_data: ApiKeyCreate
+    ) -> ApiKeyCreated:
+        user = await db.get(User, key_data.user_id)
+        if not user:
+            raise HTTPException(status_code=404, detail="User not found")
+
+        key, prefix, key_hash = generate_api_key()
+        expires_at = None
+        if key_data.expires_in_days:
+            expires_at = datetime.now(timezone.utc) + timedelta(
+                days=key_data.expires_in_days
+            )
+
+        api_key = ApiKey(
+            user_id=user.id,
+            name=key_data.name,
+            prefix=prefix,
+            key_hash=key_hash,
+            expires_at=expires_at,
+        )
+        db.add(api_key)
+        await db.commit()
+        await db.refresh(api_key)
+        return ApiKeyCreated(
+            id=api_key.id,
+            user_id=api_key.user_id,
+            name=api_key.name,
+            prefix=api_key.prefix,
+            expires_at=api_key.expires_at,
+            revoked_at=api_key.revoked_at,
+            created_at=api_key.created_at,
+            key=key,
+        )
+
+    async def list_api_keys(
+        self, db: AsyncSession, user_id: int | None = None
+    ) -> list[ApiKey]:
+        query = select(ApiKey).order_by(ApiKey.id)
+        if user_id is not None:
+            query = query.where(ApiKey.user_id == user_id)
+        result = await db.execute(query)
+        return result.scalars().all()
+
+    async def revoke_api_key(self, db: AsyncSession, key_id: int) -> dict:
+        api_key = await db.get(ApiKey, key_id)
+        if not api_key:
+            raise HTTPException(status_code=404, detail="API key not found")
+
+        if api_key.revoked_at is None:
+            api_key.revoked_at = datetime.now(timezone.utc)
+            await invalidation_bus.publish(
+                db, EventType.API_KEY_REVOKED, api_key.key_hash
+            )
+            await db.commit()
+        return {"detail": "API key revoked"}
@@ -0,0 +1,51 @@
+from datetime import datetime
+
+from sqlalchemy import select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.app.core.pagination import decode_cursor, encode_cursor
+from backend.app.models import AuthEvent
+from backend.app.schemas.audit import AuthEventOut, AuthEventPage
+
+
+class AuditService:
+    async def list_events(
+        self,
+        db: AsyncSession,
+        start: datetime,
+        end: datetime,
+        event_type: str | None = None,
+        user_id: int | None = None,
+        cursor: str | None = None,
+        limit: int = 100,
+    ) -> AuthEventPage:
+        """
+        События за интервал [start, end) от новых к старым. Постраничный вывод по
+        ключу (created_at, id): условие по диапазону отсекает лишние секции, а
+        курсор продолжает выборку по индексу без OFFSET.
+        """
+        query = (
+            select(AuthEvent)
+            .where(AuthEvent.created_at >= start, AuthEvent.created_at < end)
+            .order_by(AuthEvent.created_at.desc(), AuthEvent.id.desc())
+            .limit(limit + 1)
+        )
+        if event_type is not None:
+            query = query.where(AuthEvent.event_type == event_type)
+        if user_id is not None:
+            query = query.where(AuthEvent.user_id == user_id)
+        if cursor is not None:
+            query = query.where(
+                tuple_(AuthEvent.created_at, AuthEvent.id) < decode_cursor(cursor)
+            )
+
+        result = await db.execute(query)
+        events = result.scalars().all()
+        next_cursor = None
+        if len(events) > limit:
+            last = events[limit - 1]
+            next_cursor = encode_cursor(last.created_at, last.id)
+        return AuthEventPage(
+            items=[AuthEventOut.model_validate(e) for e in events[:limit]],
+            next_cursor=next_cursor,
+        )
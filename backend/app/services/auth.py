@@ -2,7 +2,7 @@ import secrets
 from datetime import datetime, timedelta, timezone
 
 from fastapi import BackgroundTasks, HTTPException, status, Response, Request
-from passlib.context import CryptContext
+from slowapi.util import get_remote_address
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -12,21 +12,56 @@ from backend.app.core.security import (
     create_refresh_token,
     get_user_id_and_jti_from_token,
 )
+from backend.app.core.access import (
+    encode_permissions,
+    get_policy_version,
+    load_user_permissions,
+)
+from backend.app.core.audit import (
+    LOGGED_OUT,
+    LOGIN_FAILED,
+    LOGIN_SUCCEEDED,
+    LOGIN_THROTTLED,
+    TOKENS_REFRESHED,
+    audit_log,
+)
+from backend.app.core.invalidation import EventType, invalidation_bus
+from backend.app.core.login_throttle import (
+    ensure_login_allowed,
+    register_login_failure,
+    register_login_success,
+)
+from backend.app.core.passwords import (
+    hash_password,
+    pwd_context,
+    verify_and_update_password,
+    verify_password,
+)
 from backend.app.core.send_email import send_verification_email
-from backend.app.models import User, VerificationToken, UserSession, Role, UserRole
+from backend.app.core.session_store import session_store
+from backend.app.core.signed_tokens import (
+    VERIFY_EMAIL,
+    create_signed_token,
+    fingerprint_matches,
+    is_signed_token,
+    read_signed_token,
+)
+from backend.app.models import User, VerificationToken, Role, UserRole
 from backend.app.schemas.auth import UserCreate, LoginRequest, TokenResponse
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Хэш для выравнивания времени ответа при входе с несуществующим email; считается
+# при импорте, чтобы первая такая попытка не тратила время на его создание
+DUMMY_PASSWORD_HASH = pwd_context.hash(secrets.token_urlsafe(16))
 
 
 class AuthService:
     @staticmethod
-    def verify_password(plain_password: str, hashed_password: str) -> bool:
-        return pwd_context.verify(plain_password, hashed_password)
+    async def verify_password(plain_password: str, hashed_password: str) -> bool:
+        return await verify_password(plain_password, hashed_password)
 
     @staticmethod
-    def get_password_hash(password: str) -> str:
-        return pwd_context.hash(password)
+    async def get_password_hash(password: str) -> str:
+        return await hash_password(password)
 
     async def register_user(
         self,
@@ -37,10 +72,10 @@ class AuthService:
     ) -> User:
         user = await self._create_user(db, user_data)
         await self._assign_default_role(db, user)
-        await self._create_verification_token(db, user)
-        send_verification_email(
-            background_tasks, request, user.email, user.verification_token.token
-        )
+        token = await self._create_verification_token(db, user)
+        # Токен и письмо в outbox сохраняются одной транзакцией
+        send_verification_email(background_tasks, request, user.email, token, db)
+        await db.commit()
         return user
 
     async def _create_user(self, db: AsyncSession, user_data: UserCreate) -> User:
@@ -50,7 +85,7 @@ class AuthService:
                 status_code=status.HTTP_400_BAD_REQUEST, detail="User already exists"
             )
 
-        hashed_password = self.get_password_hash(user_data.password)
+        hashed_password = await self.get_password_hash(user_data.password)
         user = User(
             email=user_data.email,
             password_hash=hashed_password,
@@ -63,7 +98,14 @@ class AuthService:
         await db.refresh(user)
         return user
 
-    async def _create_verification_token(self, db: AsyncSession, user: User):
+    async def _create_verification_token(self, db: AsyncSession, user: User) -> str:
+        if settings.STATELESS_EMAIL_TOKENS:
+            return create_signed_token(
+                VERIFY_EMAIL,
+                user,
+                timedelta(minutes=settings.VERIFY_EMAIL_TOKEN_EXPIRE_MINUTES),
+            )
+
         token = secrets.token_urlsafe(32)
         verification_token = VerificationToken(
             user_id=user.id,
@@ -71,10 +113,12 @@ class AuthService:
             expires_at=datetime.now(timezone.utc) + timedelta(hours=24),
         )
         db.add(verification_token)
-        await db.commit()
-        user.verification_token = verification_token
+        return token
 
     async def verify_email(self, db: AsyncSession, token: str) -> tuple[str, int]:
+        if settings.STATELESS_EMAIL_TOKENS and is_signed_token(token):
+            return await self._verify_email_signed(db, token)
+
         verification_token = await db.execute(
             select(VerificationToken).where(
                 VerificationToken.token == token,
@@ -92,27 +136,91 @@ class AuthService:
         user.is_verified = True
         user.is_active = True
         await db.delete(token_obj)
+        await invalidation_bus.publish(db, EventType.USER_CHANGED, user.id)
+        await db.commit()
+        return "Email verified successfully", status.HTTP_200_OK
+
+    async def _verify_email_signed(
+        self, db: AsyncSession, token: str
+    ) -> tuple[str, int]:
+        claims = read_signed_token(VERIFY_EMAIL, token)
+        if not claims:
+            return "Invalid or expired verification token", status.HTTP_400_BAD_REQUEST
+
+        user_id, fingerprint = claims
+        user = await db.get(User, user_id)
+        if not user:
+            return "User not found", status.HTTP_404_NOT_FOUND
+        if not fingerprint_matches(user, fingerprint):
+            return "Invalid or expired verification token", status.HTTP_400_BAD_REQUEST
+
+        user.is_verified = True
+        user.is_active = True
+        await invalidation_bus.publish(db, EventType.USER_CHANGED, user.id)
         await db.commit()
         return "Email verified successfully", status.HTTP_200_OK
 
     async def login_user(
-        self, db: AsyncSession, login_data: LoginRequest, response: Response
+        self,
+        db: AsyncSession,
+        login_data: LoginRequest,
+        response: Response,
+        request: Request,
     ) -> TokenResponse:
-        user = await self._get_user_by_credentials(db, login_data)
-        return await self._create_tokens_for_user(db, user, response)
+        client_ip = get_remote_address(request)
+        try:
+            ensure_login_allowed(login_data.email, client_ip)
+        except HTTPException:
+            audit_log.record(LOGIN_THROTTLED, email=login_data.email, ip=client_ip)
+            raise
+
+        user = await self._get_user_by_credentials(db, login_data, client_ip)
+        tokens = await self._create_tokens_for_user(db, user, response)
+        audit_log.record(
+            LOGIN_SUCCEEDED, user_id=user.id, email=user.email, ip=client_ip
+        )
+        return tokens
 
     async def _get_user_by_credentials(
-        self, db: AsyncSession, login_data: LoginRequest
+        self, db: AsyncSession, login_data: LoginRequest, client_ip: str | None
     ) -> User:
         user_q = await db.execute(select(User).where(User.email == login_data.email))
         user = user_q.scalar_one_or_none()
-        if not user or not self.verify_password(
-            login_data.password, user.password_hash
-        ):
+        password_hash = user.password_hash if user else DUMMY_PASSWORD_HASH
+        password_valid, new_hash = await verify_and_update_password(
+            login_data.password, password_hash
+        )
+        if not user or not password_valid:
+            register_login_failure(login_data.email, client_ip)
+            audit_log.record(
+                LOGIN_FAILED,
+                user_id=user.id if user else None,
+                email=login_data.email,
+                ip=client_ip,
+                detail="invalid_credentials",
+            )
             raise HTTPException(status_code=401, detail="Invalid credentials")
+        register_login_success(login_data.email)
+        if new_hash:
+            # Сохраняется вместе с сессиями в _create_sessions
+            user.password_hash = new_hash
         if not user.is_active:
+            audit_log.record(
+                LOGIN_FAILED,
+                user_id=user.id,
+                email=user.email,
+                ip=client_ip,
+                detail="inactive",
+            )
             raise HTTPException(status_code=401, detail="Account is not active")
         if not user.is_verified:
+            audit_log.record(
+                LOGIN_FAILED,
+                user_id=user.id,
+                email=user.email,
+                ip=client_ip,
+                detail="not_verified",
+            )
             raise HTTPException(status_code=401, detail="Email not verified")
         return user
 
@@ -122,7 +230,9 @@ class AuthService:
         access_jti = secrets.token_urlsafe(16)
         refresh_jti = secrets.token_urlsafe(16)
 
-        access_token = create_access_token(user.id, access_jti)
+        access_token = create_access_token(
+            user.id, access_jti, await self._access_token_claims(db, user.id)
+        )
         refresh_token = create_refresh_token(user.id, refresh_jti)
 
         await self._create_sessions(db, user.id, access_jti, refresh_jti)
@@ -133,21 +243,30 @@ class AuthService:
     async def _create_sessions(
         self, db: AsyncSession, user_id: int, access_jti: str, refresh_jti: str
     ):
-        access_session = UserSession(
-            user_id=user_id,
-            jti=access_jti,
-            expires_at=datetime.now(timezone.utc)
-            + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES),
-        )
-        refresh_session = UserSession(
-            user_id=user_id,
-            jti=refresh_jti,
-            expires_at=datetime.now(timezone.utc)
-            + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS),
+        now = datetime.now(timezone.utc)
+        await session_store.add(
+            db,
+            user_id,
+            [
+                (
+                    access_jti,
+                    now + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES),
+                ),
+                (refresh_jti, now + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)),
+            ],
         )
-        db.add_all([access_session, refresh_session])
+        # Коммит нужен и при хранилище вне БД: в нём же сохраняется новый хэш пароля
         await db.commit()
 
+    async def _access_token_claims(self, db: AsyncSession, user_id: int) -> dict | None:
+        if not settings.EMBED_PERMISSIONS_IN_TOKENS:
+            return None
+        # Версию читаем до прав: при гонке с изменением правил токен получит
+        # устаревшую версию и будет проверяться по БД
+        policy_version = await get_policy_version(db)
+        permissions = await load_user_permissions(db, user_id)
+        return {"perm": encode_permissions(permissions), "pv": policy_version}
+
     def _set_refresh_cookie(self, response: Response, refresh_token: str):
         response.set_cookie(
             key="refresh_token",
@@ -170,6 +289,7 @@ class AuthService:
         )
         await self._delete_user_sessions(db, user_id, refresh_jti)
         response.delete_cookie("refresh_token")
+        audit_log.record(LOGGED_OUT, user_id=user_id, ip=get_remote_address(request))
         return {"detail": "Successfully logged out"}
 
     async def refresh_tokens(
@@ -187,10 +307,15 @@ class AuthService:
         new_access_jti = secrets.token_urlsafe(16)
         new_refresh_jti = secrets.token_urlsafe(16)
 
-        new_access_token = create_access_token(user_id, new_access_jti)
+        new_access_token = create_access_token(
+            user_id, new_access_jti, await self._access_token_claims(db, user_id)
+        )
         new_refresh_token = create_refresh_token(user_id, new_refresh_jti)
         await self._create_sessions(db, user_id, new_access_jti, new_refresh_jti)
         self._set_refresh_cookie(response, new_refresh_token)
+        audit_log.record(
+            TOKENS_REFRESHED, user_id=user_id, ip=get_remote_address(request)
+        )
 
         return TokenResponse(
             access_token=new_access_token, refresh_token=new_refresh_token
@@ -199,18 +324,9 @@ class AuthService:
     async def _delete_user_sessions(
         self, db: AsyncSession, user_id: int, refresh_jti: str
     ):
-        session_q = await db.execute(
-            select(UserSession).where(UserSession.jti == refresh_jti)
-        )
-        refresh_session = session_q.scalar_one_or_none()
-        if refresh_session:
-            await db.delete(refresh_session)
-
-        access_q = await db.execute(
-            select(UserSession).where(UserSession.user_id == user_id)
-        )
-        for session in access_q.scalars().all():
-            await db.delete(session)
+        revoked = await session_store.revoke(db, user_id, refresh_jti)
+        if revoked:
+            await invalidation_bus.publish_many(db, EventType.JTI_REVOKED, revoked)
         await db.commit()
 
     async def _assign_default_role(self, db: AsyncSession, user: User):
@@ -224,4 +340,5 @@ class AuthService:
 
         user_role = UserRole(user_id=user.id, role_id=role_user.id)
         db.add(user_role)
+        await invalidation_bus.publish(db, EventType.USER_CHANGED, user.id)
         await db.commit()
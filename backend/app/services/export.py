@@ -0,0 +1,134 @@
+import argparse
+import asyncio
+import csv
+import io
+import json
+import sys
+import zlib
+from datetime import date, datetime
+from typing import AsyncIterator
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.app.models import User, UserRole, UserSession
+from db.session import AsyncSessionLocal, engine
+
+# Выгружаемые колонки; password_hash в выгрузку не попадает
+EXPORT_TABLES = {
+    "users": (
+        User.id,
+        User.email,
+        User.first_name,
+        User.last_name,
+        User.patronymic,
+        User.is_active,
+        User.is_verified,
+        User.is_superuser,
+        User.created_at,
+        User.updated_at,
+        User.deleted_at,
+    ),
+    "user_roles": (
+        UserRole.id,
+        UserRole.user_id,
+        UserRole.role_id,
+        UserRole.created_at,
+    ),
+    "user_sessions": (
+        UserSession.id,
+        UserSession.user_id,
+        UserSession.expires_at,
+        UserSession.created_at,
+    ),
+}
+
+EXPORT_FORMATS = ("csv", "jsonl")
+
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Unsupported type: {type(value)}")
+
+
+class ExportService:
+    def __init__(self, batch_size: int = 5000):
+        self.batch_size = batch_size
+
+    async def stream_rows(
+        self, db: AsyncSession, table: str
+    ) -> AsyncIterator[tuple[list[str], list[tuple]]]:
+        """
+        Читает таблицу серверным курсором пачками по batch_size строк, поэтому
+        память не зависит от размера таблицы.
+        """
+        columns = EXPORT_TABLES[table]
+        names = [column.key for column in columns]
+        stmt = (
+            select(*columns)
+            .order_by(columns[0])
+            .execution_options(yield_per=self.batch_size)
+        )
+        result = await db.stream(stmt)
+        async for partition in result.partitions():
+            yield names, partition
+
+    async def stream_export(
+        self, db: AsyncSession, table: str, fmt: str = "csv", gzip: bool = False
+    ) -> AsyncIterator[bytes]:
+        compressor = zlib.compressobj(wbits=31) if gzip else None
+        header_written = False
+
+        async for names, rows in self.stream_rows(db, table):
+            buffer = io.StringIO()
+            if fmt == "csv":
+                writer = csv.writer(buffer)
+                if not header_written:
+                    writer.writerow(names)
+                    header_written = True
+                writer.writerows(rows)
+            else:
+                for row in rows:
+                    buffer.write(
+                        json.dumps(dict(zip(names, row)), default=_json_default)
+                    )
+                    buffer.write("\n")
+
+            chunk = buffer.getvalue().encode()
+            if compressor is not None:
+                chunk = compressor.compress(chunk)
+            if chunk:
+                yield chunk
+
+        if fmt == "csv" and not header_written:
+            chunk = (
+                ",".join(column.key for column in EXPORT_TABLES[table]) + "\r\n"
+            ).encode()
+            yield compressor.compress(chunk) if compressor is not None else chunk
+        if compressor is not None:
+            yield compressor.flush()
+
+
+async def export_to_stdout(table: str, fmt: str, gzip: bool) -> None:
+    output = sys.stdout.buffer
+    async with AsyncSessionLocal() as db:
+        async for chunk in ExportService().stream_export(db, table, fmt, gzip):
+            output.write(chunk)
+    output.flush()
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Stream a table export to stdout")
+    parser.add_argument("table", choices=sorted(EXPORT_TABLES))
+    parser.add_argument("--format", choices=EXPORT_FORMATS, default="csv")
+    parser.add_argument("--gzip", action="store_true")
+    args = parser.parse_args()
+    try:
+        await export_to_stdout(args.table, args.format, args.gzip)
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -2,15 +2,28 @@ import secrets
 from datetime import datetime, timedelta, timezone
 
 from fastapi import HTTPException, BackgroundTasks, Request
-from passlib.context import CryptContext
-from sqlalchemy import select
+from sqlalchemy import exists, or_, select, tuple_
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from backend.app.core.audit import (
+    PASSWORD_RESET,
+    PASSWORD_RESET_REQUESTED,
+    audit_log,
+)
+from backend.app.core.invalidation import EventType, invalidation_bus
+from backend.app.core.passwords import hash_password, pwd_context
+from backend.app.config import settings
 from backend.app.core.send_email import send_password_reset_email
-from backend.app.models import User, PasswordResetToken
-from backend.app.schemas.users import UserUpdate
-
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+from backend.app.core.signed_tokens import (
+    RESET_PASSWORD,
+    create_signed_token,
+    fingerprint_matches,
+    is_signed_token,
+    read_signed_token,
+)
+from backend.app.core.pagination import decode_cursor, encode_cursor, escape_like
+from backend.app.models import User, PasswordResetToken, Role, UserRole
+from backend.app.schemas.users import UserListItem, UserListPage, UserUpdate
 
 
 class UserService:
@@ -28,6 +41,7 @@ class UserService:
             setattr(user, field, value)
 
         db.add(user)
+        await invalidation_bus.publish(db, EventType.USER_CHANGED, user.id)
         await db.commit()
         await db.refresh(user)
         return user
@@ -39,9 +53,77 @@ class UserService:
 
         user.is_active = False
         db.add(user)
+        await invalidation_bus.publish(db, EventType.USER_CHANGED, user.id)
         await db.commit()
         return {"detail": "User deactivated"}
 
+    async def search_users(
+        self,
+        db: AsyncSession,
+        query: str | None = None,
+        match: str = "prefix",
+        is_active: bool | None = None,
+        is_verified: bool | None = None,
+        role: str | None = None,
+        cursor: str | None = None,
+        limit: int = 50,
+    ) -> UserListPage:
+        """
+        Поиск пользователей для админки: ILIKE по email/имени/фамилии опирается на
+        trigram-индексы, страницы выбираются по ключу (created_at, id) без OFFSET,
+        загружаются только колонки списка.
+        """
+        stmt = (
+            select(
+                User.id,
+                User.email,
+                User.first_name,
+                User.last_name,
+                User.patronymic,
+                User.is_active,
+                User.is_verified,
+                User.is_superuser,
+                User.created_at,
+            )
+            .order_by(User.created_at.desc(), User.id.desc())
+            .limit(limit + 1)
+        )
+
+        if query:
+            pattern = escape_like(query)
+            pattern = f"{pattern}%" if match == "prefix" else f"%{pattern}%"
+            stmt = stmt.where(
+                or_(
+                    User.email.ilike(pattern, escape="\\"),
+                    User.first_name.ilike(pattern, escape="\\"),
+                    User.last_name.ilike(pattern, escape="\\"),
+                )
+            )
+        if is_active is not None:
+            stmt = stmt.where(User.is_active.is_(is_active))
+        if is_verified is not None:
+            stmt = stmt.where(User.is_verified.is_(is_verified))
+        if role is not None:
+            stmt = stmt.where(
+                exists()
+                .where(UserRole.user_id == User.id)
+                .where(UserRole.role_id == Role.id)
+                .where(Role.name == role)
+            )
+        if cursor is not None:
+            stmt = stmt.where(tuple_(User.created_at, User.id) < decode_cursor(cursor))
+
+        result = await db.execute(stmt)
+        rows = result.all()
+        next_cursor = None
+        if len(rows) > limit:
+            last = rows[limit - 1]
+            next_cursor = encode_cursor(last.created_at, last.id)
+        return UserListPage(
+            items=[UserListItem.model_validate(row) for row in rows[:limit]],
+            next_cursor=next_cursor,
+        )
+
     async def send_password_reset(
         self, db: AsyncSession, request: Request, email: str, background_tasks: BackgroundTasks
     ) -> dict:
@@ -50,21 +132,30 @@ class UserService:
         if not user:
             return {"detail": "If this email exists, a reset link will be sent"}
 
-        token = secrets.token_urlsafe(32)
-        reset_token = PasswordResetToken(
-            user_id=user.id,
-            token=token,
-            expires_at=datetime.now(timezone.utc) + timedelta(hours=2),
-        )
-        db.add(reset_token)
+        expires_in = timedelta(minutes=settings.PASSWORD_RESET_TOKEN_EXPIRE_MINUTES)
+        if settings.STATELESS_EMAIL_TOKENS:
+            token = create_signed_token(RESET_PASSWORD, user, expires_in)
+        else:
+            token = secrets.token_urlsafe(32)
+            reset_token = PasswordResetToken(
+                user_id=user.id,
+                token=token,
+                expires_at=datetime.now(timezone.utc) + expires_in,
+            )
+            db.add(reset_token)
+
+        # Токен и письмо в outbox сохраняются одной транзакцией
+        send_password_reset_email(background_tasks, request, user.email, token, db)
         await db.commit()
-
-        send_password_reset_email(background_tasks, request, user.email, token)
+        audit_log.record(PASSWORD_RESET_REQUESTED, user_id=user.id, email=user.email)
         return {"detail": "Password reset email sent"}
 
     async def reset_password(
         self, db: AsyncSession, token: str, new_password: str
     ) -> dict:
+        if settings.STATELESS_EMAIL_TOKENS and is_signed_token(token):
+            return await self._reset_password_signed(db, token, new_password)
+
         token_q = await db.execute(
             select(PasswordResetToken)
             .where(PasswordResetToken.token == token)
@@ -78,8 +169,31 @@ class UserService:
         if not user:
             raise HTTPException(status_code=404, detail="User not found")
 
-        user.password_hash = self.pwd_context.hash(new_password)
+        user.password_hash = await hash_password(new_password)
         db.add(user)
         await db.delete(reset_token)
+        await invalidation_bus.publish(db, EventType.USER_CHANGED, user.id)
+        await db.commit()
+        audit_log.record(PASSWORD_RESET, user_id=user.id, email=user.email)
+        return {"detail": "Password has been reset"}
+
+    async def _reset_password_signed(
+        self, db: AsyncSession, token: str, new_password: str
+    ) -> dict:
+        claims = read_signed_token(RESET_PASSWORD, token)
+        if not claims:
+            raise HTTPException(status_code=400, detail="Invalid or expired token")
+
+        user_id, fingerprint = claims
+        user = await db.get(User, user_id)
+        if not user:
+            raise HTTPException(status_code=404, detail="User not found")
+        if not fingerprint_matches(user, fingerprint):
+            raise HTTPException(status_code=400, detail="Invalid or expired token")
+
+        user.password_hash = await hash_password(new_password)
+        db.add(user)
+        await invalidation_bus.publish(db, EventType.USER_CHANGED, user.id)
         await db.commit()
+        audit_log.record(PASSWORD_RESET, user_id=user.id, email=user.email)
         return {"detail": "Password has been reset"}
@@ -0,0 +1,268 @@
+"""
+Замеры горячих запросов авторизации на объёме данных из db/synthetic.py.
+
+    python -m db.synthetic --users 1000000 --sessions-per-user 10
+    python -m db.benchmarks --iterations 500 --output benchmark_report.json
+
+Каждый сценарий вызывает настоящий код приложения (get_current_user,
+check_permission, _delete_user_sessions, поиск по email) на случайных
+пользователях и сессиях с холодными локальными кэшами. Для каждого сценария
+выводятся перцентили задержки и планы EXPLAIN (ANALYZE, BUFFERS) всех его
+SQL-запросов. Все сценарии выполняются в транзакции с откатом.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import statistics
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Awaitable, Callable
+
+from sqlalchemy import event, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.app.core.access import (
+    load_user_permissions,
+    load_user_roles,
+    permissions_cache,
+    roles_cache,
+)
+from backend.app.core.principal import principal_cache, session_cache
+from backend.app.core.security import _load_session_principal
+from backend.app.models import AccessRule, User, UserRole, UserSession
+from backend.app.services.auth import AuthService
+from db.session import engine
+
+logger = logging.getLogger(__name__)
+
+auth_service = AuthService()
+
+
+@dataclass
+class Sample:
+    user_id: int
+    jti: str
+    email: str
+
+
+@dataclass
+class BenchmarkResult:
+    name: str
+    iterations: int
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+    max_ms: float
+    plans: list[dict] = field(default_factory=list)
+
+
+async def _current_user(db: AsyncSession, sample: Sample) -> None:
+    await _load_session_principal(db, sample.user_id, sample.jti)
+
+
+async def _check_permission(db: AsyncSession, sample: Sample) -> None:
+    await load_user_permissions(db, sample.user_id)
+
+
+async def _user_roles(db: AsyncSession, sample: Sample) -> None:
+    await load_user_roles(db, sample.user_id)
+
+
+async def _email_lookup(db: AsyncSession, sample: Sample) -> None:
+    # Тот же запрос, что в login, register и password/forgot
+    user_q = await db.execute(select(User).where(User.email == sample.email))
+    user_q.scalar_one_or_none()
+
+
+async def _delete_user_sessions(db: AsyncSession, sample: Sample) -> None:
+    await auth_service._delete_user_sessions(db, sample.user_id, sample.jti)
+
+
+Scenario = Callable[[AsyncSession, Sample], Awaitable[None]]
+
+BENCHMARKS: dict[str, Scenario] = {
+    "get_current_user": _current_user,
+    "check_permission": _check_permission,
+    "load_user_roles": _user_roles,
+    "email_lookup": _email_lookup,
+    "_delete_user_sessions": _delete_user_sessions,
+}
+
+LOCAL_CACHES = (principal_cache, session_cache, permissions_cache, roles_cache)
+
+
+async def _load_samples(count: int, table_rows: int) -> list[Sample]:
+    """Случайные пары пользователь/сессия из разных частей таблицы"""
+    percent = min(100.0, count * 4 * 100 / max(table_rows, 1))
+    async with engine.connect() as conn:
+        result = await conn.execute(
+            text(
+                f"SELECT s.user_id, s.jti, u.email "
+                f"FROM {UserSession.__tablename__} s TABLESAMPLE BERNOULLI (:percent) "
+                f"JOIN {User.__tablename__} u ON u.id = s.user_id "
+                "ORDER BY random() LIMIT :count"
+            ),
+            {"percent": percent, "count": count},
+        )
+        return [Sample(*row) for row in result.all()]
+
+
+async def _run_once(scenario: Scenario, sample: Sample) -> None:
+    for cache in LOCAL_CACHES:
+        cache.clear()
+    async with engine.connect() as conn:
+        transaction = await conn.begin()
+        # commit() в сценарии фиксирует только SAVEPOINT, транзакция откатывается
+        db = AsyncSession(
+            bind=conn, expire_on_commit=False, join_transaction_mode="create_savepoint"
+        )
+        try:
+            await scenario(db, sample)
+        finally:
+            await db.close()
+            await transaction.rollback()
+
+
+def _percentile(values: list[float], q: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(q * len(ordered)) - 1))
+    return ordered[index]
+
+
+async def _capture_statements(
+    scenario: Scenario, sample: Sample
+) -> list[tuple[str, tuple]]:
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.upper().startswith(("SAVEPOINT", "RELEASE", "ROLLBACK")):
+            return
+        # Для executemany план строится по первому набору параметров
+        statements.append((statement, parameters[0] if executemany else parameters))
+
+    event.listen(engine.sync_engine, "before_cursor_execute", capture)
+    try:
+        await _run_once(scenario, sample)
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", capture)
+    return statements
+
+
+async def _explain(statements: list[tuple[str, tuple]]) -> list[dict]:
+    plans = []
+    async with engine.connect() as conn:
+        transaction = await conn.begin()
+        try:
+            for statement, parameters in statements:
+                if "pg_notify" in statement:
+                    continue
+                result = await conn.exec_driver_sql(
+                    f"EXPLAIN (ANALYZE, BUFFERS) {statement}", parameters
+                )
+                plans.append(
+                    {
+                        "sql": statement,
+                        "plan": "\n".join(row[0] for row in result.all()),
+                    }
+                )
+        finally:
+            await transaction.rollback()
+    return plans
+
+
+async def run_benchmark(
+    name: str, scenario: Scenario, samples: list[Sample], iterations: int
+) -> BenchmarkResult:
+    timings = []
+    for i in range(iterations):
+        sample = samples[i % len(samples)]
+        started = time.perf_counter()
+        await _run_once(scenario, sample)
+        timings.append((time.perf_counter() - started) * 1000)
+
+    statements = await _capture_statements(scenario, samples[0])
+    return BenchmarkResult(
+        name=name,
+        iterations=iterations,
+        p50_ms=statistics.median(timings),
+        p95_ms=_percentile(timings, 0.95),
+        p99_ms=_percentile(timings, 0.99),
+        max_ms=max(timings),
+        plans=await _explain(statements),
+    )
+
+
+async def _table_sizes() -> dict[str, int]:
+    tables = [User, UserSession, UserRole, AccessRule]
+    async with engine.connect() as conn:
+        result = await conn.execute(
+            text(
+                "SELECT relname, reltuples::bigint FROM pg_class "
+                "WHERE relname = ANY(:names)"
+            ),
+            {"names": [t.__tablename__ for t in tables]},
+        )
+        return dict(result.all())
+
+
+async def run_all(iterations: int, only: list[str] | None) -> dict:
+    tables = await _table_sizes()
+    samples = await _load_samples(iterations, tables[UserSession.__tablename__])
+    if not samples:
+        raise RuntimeError("No user sessions found; run `python -m db.synthetic` first")
+
+    report = {"tables": tables, "benchmarks": []}
+    for name, scenario in BENCHMARKS.items():
+        if only and name not in only:
+            continue
+        logger.info(f"Running {name}")
+        result = await run_benchmark(name, scenario, samples, iterations)
+        report["benchmarks"].append(asdict(result))
+    await engine.dispose()
+    return report
+
+
+def print_report(report: dict) -> None:
+    print(
+        "Rows (estimated): "
+        + ", ".join(f"{k}={v}" for k, v in report["tables"].items())
+    )
+    print(
+        f"\n{'benchmark':<24}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}"
+    )
+    for result in report["benchmarks"]:
+        print(
+            f"{result['name']:<24}{result['p50_ms']:>10.2f}{result['p95_ms']:>10.2f}"
+            f"{result['p99_ms']:>10.2f}{result['max_ms']:>10.2f}"
+        )
+    for result in report["benchmarks"]:
+        for plan in result["plans"]:
+            print(f"\n=== {result['name']} ===\n{plan['sql']}\n\n{plan['plan']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Measure latency and query plans of hot auth queries"
+    )
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument(
+        "--only",
+        nargs="*",
+        choices=list(BENCHMARKS),
+        help="run only the listed benchmarks",
+    )
+    parser.add_argument("--output", help="also write the report as JSON")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    report = asyncio.run(run_all(args.iterations, args.only))
+    print_report(report)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,67 +1,362 @@
 import asyncio
-from sqlalchemy import select
+import json
+import logging
+from datetime import date, datetime, timezone
 
-from db.session import engine, Base, AsyncSessionLocal
+from sqlalchemy import exists, literal, select, text, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from backend.app.config import settings
+from backend.app import models  # noqa: F401 — регистрирует все модели в Base.metadata
 from backend.app.models.access import Role, BusinessObject, AccessRule
+from backend.app.models.audit import AuthEvent
+from backend.app.models.system import PolicyVersion, SchemaVersion
+from backend.app.models.user import TRGM_INDEXES, User
+from db.session import engine, Base
+
+logger = logging.getLogger(__name__)
+
+# Увеличивается при изменениях схемы или начальных данных
+SCHEMA_VERSION = 9
+
+# Индексы, заменённые другими в новых версиях схемы
+OBSOLETE_INDEXES = ["ix_email_outbox_pending"]
+
+# На сколько месяцев вперёд заранее создаются секции auth_events
+AUDIT_PARTITION_MONTHS_AHEAD = 3
+
+# Ключ pg_advisory_lock, сериализующий одновременный запуск bootstrap
+BOOTSTRAP_LOCK_KEY = 7_140_221_001
+# Отдельный ключ для построения индексов: CONCURRENTLY ждёт завершения чужих
+# транзакций, и ожидание bootstrap-транзакции на общем ключе стало бы взаимным
+INDEX_LOCK_KEY = 7_140_221_002
+# Ключ для заполнения users.created_at вне bootstrap-транзакции
+BACKFILL_LOCK_KEY = 7_140_221_003
+
+# Сколько строк users.created_at заполняется одним UPDATE
+BACKFILL_BATCH_SIZE = 5000
+
+ROLES = [
+    {"name": "admin", "description": "Administrator with full access"},
+    {"name": "manager", "description": "Manager with limited admin access"},
+    {"name": "user", "description": "Regular user"},
+    {"name": "guest", "description": "Guest user with minimal access"},
+]
+
+BUSINESS_OBJECTS = [
+    {"name": "users", "description": "User management"},
+    {"name": "products", "description": "Product catalog"},
+    {"name": "orders", "description": "Customer orders"},
+    {"name": "access_rules", "description": "Access control rules"},
+]
+
+
+async def _seed(conn: AsyncConnection) -> None:
+    await conn.execute(
+        insert(Role).values(ROLES).on_conflict_do_nothing(index_elements=["name"])
+    )
+    await conn.execute(
+        insert(BusinessObject)
+        .values(BUSINESS_OBJECTS)
+        .on_conflict_do_nothing(index_elements=["name"])
+    )
+
+    flags = [
+        "can_read",
+        "can_read_all",
+        "can_create",
+        "can_update",
+        "can_update_all",
+        "can_delete",
+        "can_delete_all",
+    ]
+    admin_rules = (
+        select(Role.id, BusinessObject.id, *(literal(True) for _ in flags))
+        .where(Role.name == "admin")
+        .where(
+            ~exists().where(
+                AccessRule.role_id == Role.id,
+                AccessRule.object_id == BusinessObject.id,
+            )
+        )
+    )
+    result = await conn.execute(
+        insert(AccessRule).from_select(["role_id", "object_id", *flags], admin_rules)
+    )
+
+    await conn.execute(
+        insert(PolicyVersion)
+        .values(id=1, version=1)
+        .on_conflict_do_nothing(index_elements=["id"])
+    )
+
+    if result.rowcount:
+        # Новая версия политики и уведомление воркеров (см. core/access.py)
+        version_q = await conn.execute(
+            update(PolicyVersion)
+            .where(PolicyVersion.id == 1)
+            .values(version=PolicyVersion.version + 1)
+            .returning(PolicyVersion.version)
+        )
+        payload = json.dumps(
+            {"type": "rules_changed", "key": str(version_q.scalar_one())}
+        )
+        await conn.execute(
+            text("SELECT pg_notify(:channel, :payload)"),
+            {"channel": settings.INVALIDATION_CHANNEL, "payload": payload},
+        )
 
 
 async def init_db():
+    """
+    Разовый bootstrap БД: создание таблиц, начальные данные и отметка версии схемы.
+
+    Выполняется одной транзакцией под advisory lock, поэтому одновременный запуск
+    из нескольких контейнеров безопасен, а повторный — ничего не меняет.
+    Заполнение users.created_at и trigram-индексы выполняются после транзакции
+    (см. backfill_users_created_at и create_trgm_indexes).
+    """
     async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
-
-    async with AsyncSessionLocal() as db:
-        existing_roles = await db.execute(select(Role))
-        if existing_roles.scalars().first():
-            return
-
-        roles = [
-            Role(name="admin", description="Administrator with full access"),
-            Role(name="manager", description="Manager with limited admin access"),
-            Role(name="user", description="Regular user"),
-            Role(name="guest", description="Guest user with minimal access"),
-        ]
-
-        for role in roles:
-            db.add(role)
-
-        await db.commit()
-
-        objects = [
-            BusinessObject(name="users", description="User management"),
-            BusinessObject(name="products", description="Product catalog"),
-            BusinessObject(name="orders", description="Customer orders"),
-            BusinessObject(name="access_rules", description="Access control rules"),
-        ]
-
-        for obj in objects:
-            db.add(obj)
-
-        await db.commit()
-
-        admin_role_result = await db.execute(select(Role).where(Role.name == "admin"))
-        admin_role = admin_role_result.scalar_one()
-
-        objects_result = await db.execute(select(BusinessObject))
-        all_objects = objects_result.scalars().all()
-
-        for obj in all_objects:
-            access_rule = AccessRule(
-                role_id=admin_role.id,
-                object_id=obj.id,
-                can_read=True,
-                can_read_all=True,
-                can_create=True,
-                can_update=True,
-                can_update_all=True,
-                can_delete=True,
-                can_delete_all=True,
+        await conn.execute(
+            text("SELECT pg_advisory_xact_lock(:key)"), {"key": BOOTSTRAP_LOCK_KEY}
+        )
+        current = await _get_schema_version(conn)
+        if current is not None and current >= SCHEMA_VERSION:
+            logger.info(f"Database schema is up to date (version {current})")
+        else:
+            await conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+            await conn.run_sync(Base.metadata.create_all)
+            await conn.run_sync(_create_missing_indexes)
+            for index in OBSOLETE_INDEXES:
+                await conn.execute(text(f"DROP INDEX IF EXISTS {index}"))
+            await _seed(conn)
+            await conn.execute(
+                insert(SchemaVersion)
+                .values(id=1, version=SCHEMA_VERSION)
+                .on_conflict_do_update(
+                    index_elements=["id"], set_={"version": SCHEMA_VERSION}
+                )
+            )
+            logger.info(f"Database bootstrapped to schema version {SCHEMA_VERSION}")
+
+        await ensure_audit_partitions(conn)
+
+    await backfill_users_created_at()
+    await create_trgm_indexes()
+
+
+def _create_missing_indexes(sync_conn) -> None:
+    """create_all не добавляет новые индексы в уже существующие таблицы"""
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(sync_conn, checkfirst=True)
+
+
+async def backfill_users_created_at(
+    batch_size: int = BACKFILL_BATCH_SIZE,
+) -> None:
+    """
+    Делает users.created_at NOT NULL: keyset-пагинация по (created_at, id)
+    пропускала строки с NULL. Пустые значения заполняются временем последнего
+    изменения пачками по batch_size строк, каждая в своей транзакции, поэтому
+    блокировки строк держатся недолго. Ограничение вводится без полного
+    сканирования под ACCESS EXCLUSIVE: CHECK NOT VALID до заполнения (новые
+    строки с NULL уже не появятся), VALIDATE CONSTRAINT после него (не мешает
+    записи) и SET NOT NULL, который опирается на проверенный CHECK.
+    Вспомогательный CHECK после этого удаляется.
+    """
+    table = User.__tablename__
+    check = f"{table}_created_at_not_null"
+    async with engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        await conn.execute(
+            text("SELECT pg_advisory_lock(:key)"), {"key": BACKFILL_LOCK_KEY}
+        )
+        try:
+            not_null_q = await conn.execute(
+                text(
+                    "SELECT attnotnull FROM pg_attribute "
+                    "WHERE attrelid = to_regclass(:table) AND attname = 'created_at'"
+                ),
+                {"table": table},
+            )
+            if not_null_q.scalar():
+                return
+
+            check_q = await conn.execute(
+                text("SELECT 1 FROM pg_constraint WHERE conname = :name"),
+                {"name": check},
+            )
+            if check_q.scalar() is None:
+                await conn.execute(
+                    text(
+                        f"ALTER TABLE {table} ADD CONSTRAINT {check} "
+                        "CHECK (created_at IS NOT NULL) NOT VALID"
+                    )
+                )
+
+            filled = 0
+            while True:
+                batch = await conn.execute(
+                    text(
+                        f"UPDATE {table} SET created_at = coalesce(updated_at, now()) "
+                        f"WHERE id IN (SELECT id FROM {table} "
+                        "WHERE created_at IS NULL LIMIT :limit)"
+                    ),
+                    {"limit": batch_size},
+                )
+                filled += batch.rowcount
+                if batch.rowcount < batch_size:
+                    break
+            if filled:
+                logger.info(f"Filled created_at for {filled} users")
+
+            await conn.execute(text(f"ALTER TABLE {table} VALIDATE CONSTRAINT {check}"))
+            await conn.execute(
+                text(f"ALTER TABLE {table} ALTER COLUMN created_at SET NOT NULL")
+            )
+            await conn.execute(text(f"ALTER TABLE {table} DROP CONSTRAINT {check}"))
+        finally:
+            await conn.execute(
+                text("SELECT pg_advisory_unlock(:key)"), {"key": BACKFILL_LOCK_KEY}
+            )
+
+
+async def create_trgm_indexes() -> None:
+    """
+    Строит trigram-индексы users через CREATE INDEX CONCURRENTLY: на большой
+    таблице построение идёт минуты и не должно блокировать запись. CONCURRENTLY
+    не выполняется внутри транзакции, поэтому шаг идёт на отдельном соединении
+    в режиме autocommit. Индекс, оставшийся INVALID после прерванного
+    построения, удаляется и строится заново.
+    """
+    async with engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        await conn.execute(
+            text("SELECT pg_advisory_lock(:key)"), {"key": INDEX_LOCK_KEY}
+        )
+        try:
+            for name, column in TRGM_INDEXES.items():
+                valid_q = await conn.execute(
+                    text(
+                        "SELECT indisvalid FROM pg_index "
+                        "WHERE indexrelid = to_regclass(:name)"
+                    ),
+                    {"name": name},
+                )
+                valid = valid_q.scalar()
+                if valid:
+                    continue
+                if valid is not None:
+                    logger.warning(f"Rebuilding invalid index {name}")
+                    await conn.execute(text(f"DROP INDEX CONCURRENTLY {name}"))
+                logger.info(f"Building index {name}")
+                await conn.execute(
+                    text(
+                        f"CREATE INDEX CONCURRENTLY {name} ON {User.__tablename__} "
+                        f"USING gin ({column} gin_trgm_ops)"
+                    )
+                )
+        finally:
+            await conn.execute(
+                text("SELECT pg_advisory_unlock(:key)"), {"key": INDEX_LOCK_KEY}
+            )
+
+
+def _add_months(day: date, months: int) -> date:
+    month = day.month - 1 + months
+    return date(day.year + month // 12, month % 12 + 1, 1)
+
+
+async def ensure_audit_partitions(
+    conn: AsyncConnection, months_ahead: int = AUDIT_PARTITION_MONTHS_AHEAD
+) -> None:
+    """
+    Создаёт месячные секции auth_events на текущий и следующие месяцы.
+    Запускается при каждом bootstrap; при редких деплоях стоит выполнять
+    `python -m db.init_db` по расписанию. Секция DEFAULT принимает события,
+    для которых месячная секция ещё не создана.
+
+    Postgres не создаёт секцию, если подходящие ей строки уже лежат в DEFAULT,
+    поэтому на время создания новых секций DEFAULT отсоединяется, её строки
+    из диапазонов новых месяцев переносятся в них, и DEFAULT присоединяется
+    обратно.
+    """
+    table = AuthEvent.__tablename__
+    default = f"{table}_default"
+    first_month = datetime.now(timezone.utc).date().replace(day=1)
+    missing = []
+    for offset in range(months_ahead + 1):
+        start = _add_months(first_month, offset)
+        name = f"{table}_{start:%Y_%m}"
+        exists_q = await conn.execute(text("SELECT to_regclass(:name)"), {"name": name})
+        if exists_q.scalar() is None:
+            missing.append((name, start, _add_months(start, 1)))
+
+    default_q = await conn.execute(text("SELECT to_regclass(:name)"), {"name": default})
+    has_default = default_q.scalar() is not None
+    if missing and has_default:
+        await conn.execute(text(f"ALTER TABLE {table} DETACH PARTITION {default}"))
+
+    for name, start, end in missing:
+        bounds = f"FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+        await conn.execute(
+            text(f"CREATE TABLE {name} PARTITION OF {table} FOR VALUES {bounds}")
+        )
+        if has_default:
+            moved = await conn.execute(
+                text(
+                    f"WITH moved AS (DELETE FROM {default} "
+                    f"WHERE created_at >= '{start.isoformat()}' "
+                    f"AND created_at < '{end.isoformat()}' RETURNING *) "
+                    f"INSERT INTO {name} SELECT * FROM moved"
+                )
+            )
+            if moved.rowcount:
+                logger.info(f"Moved {moved.rowcount} rows from {default} to {name}")
+
+    if not has_default:
+        await conn.execute(text(f"CREATE TABLE {default} PARTITION OF {table} DEFAULT"))
+    elif missing:
+        await conn.execute(
+            text(f"ALTER TABLE {table} ATTACH PARTITION {default} DEFAULT")
+        )
+
+
+async def _get_schema_version(conn: AsyncConnection) -> int | None:
+    exists_q = await conn.execute(
+        text("SELECT to_regclass(:name)"), {"name": SchemaVersion.__tablename__}
+    )
+    if exists_q.scalar() is None:
+        return None
+    version_q = await conn.execute(
+        select(SchemaVersion.version).where(SchemaVersion.id == 1)
+    )
+    return version_q.scalar_one_or_none()
+
+
+async def check_schema_version():
+    """Дешёвая проверка при старте воркера вместо create_all и сидирования"""
+    try:
+        async with engine.connect() as conn:
+            version_q = await conn.execute(
+                select(SchemaVersion.version).where(SchemaVersion.id == 1)
             )
-            db.add(access_rule)
+            version = version_q.scalar_one_or_none()
+    except DBAPIError:
+        version = None
 
-        await db.commit()
+    if version is None or version < SCHEMA_VERSION:
+        raise RuntimeError(
+            f"Database schema version {version} is older than {SCHEMA_VERSION}; "
+            "run `python -m db.init_db` before starting workers"
+        )
 
 
 async def main():
+    logging.basicConfig(level=logging.INFO)
     await init_db()
     await engine.dispose()
 
@@ -0,0 +1,435 @@
+"""
+Бюджет SQL-запросов маршрутов /v1.
+
+Прогоняет сценарий по всем маршрутам приложения на локальной БД и сравнивает
+число SQL-запросов и коммитов каждого из них с db/query_budgets.json.
+Перед каждым запросом локальные кэши сбрасываются, поэтому измеряется
+холодный путь — тот, что проходит каждый запрос после деплоя или инвалидации.
+
+    python -m db.query_budget            # проверка, код 1 и diff при расхождении
+    python -m db.query_budget --update   # перезаписать файл бюджетов
+
+Нужна доступная БД из настроек (.env); bootstrap выполняется автоматически.
+"""
+
+import os
+
+# Счётчик и режим доставки писем фиксируются до импорта настроек приложения,
+# остальные флаги — чтобы результат не зависел от локального .env
+os.environ["QUERY_COUNTER_MODE"] = "warn"
+os.environ["EMAIL_DELIVERY_MODE"] = "outbox"
+os.environ["STATELESS_EMAIL_TOKENS"] = "false"
+os.environ["EMBED_PERMISSIONS_IN_TOKENS"] = "false"
+
+import argparse
+import asyncio
+import difflib
+import json
+import logging
+import secrets
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+from urllib.parse import urlencode
+
+from sqlalchemy import select, update
+
+from backend.app.core.access import (
+    permissions_cache,
+    policy_version_cache,
+    roles_cache,
+)
+from backend.app.core.api_keys import api_key_cache
+from backend.app.core.principal import principal_cache, session_cache
+from backend.app.core.query_counter import current_query_stats
+from backend.app.main import app
+from backend.app.models import PasswordResetToken, User, VerificationToken
+from backend.app.services.export import EXPORT_TABLES
+from db.init_db import init_db
+from db.session import AsyncSessionLocal, engine
+
+BUDGETS_FILE = Path(__file__).with_name("query_budgets.json")
+
+PASSWORD = "Budget-password-1"
+NEW_PASSWORD = "Budget-password-2"
+
+LOCAL_CACHES = (
+    principal_cache,
+    session_cache,
+    permissions_cache,
+    roles_cache,
+    policy_version_cache,
+    api_key_cache,
+)
+
+
+@dataclass
+class _Response:
+    status: int
+    headers: list[tuple[str, str]]
+    body: bytes
+    statements: int = 0
+    commits: int = 0
+
+    def header(self, name: str) -> str | None:
+        for key, value in self.headers:
+            if key == name:
+                return value
+        return None
+
+    def json(self):
+        return json.loads(self.body)
+
+
+class _AsgiClient:
+    """Минимальный HTTP-клиент, вызывающий ASGI-приложение в том же процессе"""
+
+    def __init__(self, asgi_app):
+        self.app = asgi_app
+        self.cookies: dict[str, str] = {}
+
+    async def request(
+        self,
+        method: str,
+        path: str,
+        *,
+        json_body=None,
+        params: dict | None = None,
+        token: str | None = None,
+    ) -> _Response:
+        body = b"" if json_body is None else json.dumps(json_body).encode()
+        headers = [(b"host", b"testserver")]
+        if json_body is not None:
+            headers.append((b"content-type", b"application/json"))
+        if token is not None:
+            headers.append((b"authorization", f"Bearer {token}".encode()))
+        if self.cookies:
+            cookie = "; ".join(f"{k}={v}" for k, v in self.cookies.items())
+            headers.append((b"cookie", cookie.encode()))
+
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": method,
+            "scheme": "http",
+            "path": path,
+            "raw_path": path.encode(),
+            "query_string": urlencode(params or {}).encode(),
+            "root_path": "",
+            "headers": headers,
+            "client": ("127.0.0.1", 50000),
+            "server": ("testserver", 80),
+        }
+        request_sent = False
+        response_complete = asyncio.Event()
+
+        async def receive():
+            nonlocal request_sent
+            if request_sent:
+                # Как настоящий сервер: отключение клиента только после ответа,
+                # иначе StreamingResponse прерывает поток на первом куске
+                await response_complete.wait()
+                return {"type": "http.disconnect"}
+            request_sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+
+        response = _Response(status=0, headers=[], body=b"")
+
+        async def send(message):
+            if message["type"] == "http.response.start":
+                response.status = message["status"]
+                response.headers = [
+                    (k.decode().lower(), v.decode()) for k, v in message["headers"]
+                ]
+            elif message["type"] == "http.response.body":
+                response.body += message.get("body", b"")
+                # Заголовки X-DB-* уходят до тела и не учитывают запросы
+                # потоковых ответов, поэтому итог снимается с последним куском
+                stats = current_query_stats()
+                if not message.get("more_body", False):
+                    if stats is not None:
+                        response.statements = stats.statements
+                        response.commits = stats.commits
+                    response_complete.set()
+
+        await self.app(scope, receive, send)
+        self._store_cookies(response)
+        return response
+
+    def _store_cookies(self, response: _Response) -> None:
+        for key, value in response.headers:
+            if key != "set-cookie":
+                continue
+            name, _, rest = value.partition("=")
+            cookie_value = rest.split(";", 1)[0].strip('"')
+            if not cookie_value or "max-age=0" in value.lower():
+                self.cookies.pop(name, None)
+            else:
+                self.cookies[name] = cookie_value
+
+
+class _Scenario:
+    def __init__(self, client: _AsgiClient):
+        self.client = client
+        self.results: dict[str, dict[str, int]] = {}
+
+    async def call(
+        self,
+        method: str,
+        route: str,
+        expected_status: int,
+        *,
+        measure: bool = True,
+        label: str | None = None,
+        **kwargs,
+    ) -> _Response:
+        """Выполняет запрос на холодных кэшах и записывает его счётчики под route"""
+        for cache in LOCAL_CACHES:
+            cache.clear()
+
+        path = route.format(**kwargs.pop("path_params", {}))
+        response = await self.client.request(method, path, **kwargs)
+        if response.status != expected_status:
+            raise RuntimeError(
+                f"{method} {path}: expected {expected_status}, got "
+                f"{response.status}: {response.body[:500]!r}"
+            )
+        if measure:
+            self.results[label or f"{method} {route}"] = {
+                "status": response.status,
+                "statements": response.statements,
+                "commits": response.commits,
+            }
+        return response
+
+
+async def _fetch_token(model, user_id: int) -> str:
+    async with AsyncSessionLocal() as db:
+        token_q = await db.execute(
+            select(model.token)
+            .where(model.user_id == user_id)
+            .order_by(model.id.desc())
+            .limit(1)
+        )
+        return token_q.scalar_one()
+
+
+async def _promote_to_superuser(user_id: int) -> None:
+    async with AsyncSessionLocal() as db:
+        await db.execute(
+            update(User).where(User.id == user_id).values(is_superuser=True)
+        )
+        await db.commit()
+
+
+async def run_scenario() -> dict[str, dict[str, int]]:
+    """Проходит все маршруты /v1 от регистрации до деактивации одного пользователя"""
+    scenario = _Scenario(_AsgiClient(app))
+    call = scenario.call
+    email = f"budget-{secrets.token_hex(6)}@example.com"
+    credentials = {"email": email, "password": PASSWORD}
+
+    user = await call(
+        "POST",
+        "/v1/auth/register",
+        200,
+        json_body={**credentials, "password_repeat": PASSWORD, "first_name": "Budget"},
+    )
+    user_id = user.json()["id"]
+    verification_token = await _fetch_token(VerificationToken, user_id)
+    await call(
+        "GET",
+        "/v1/auth/verify-email",
+        200,
+        params={"token": verification_token},
+    )
+
+    tokens = await call("POST", "/v1/auth/login", 200, json_body=credentials)
+    access_token = tokens.json()["access_token"]
+
+    await call("GET", "/v1/users/me", 200, token=access_token)
+    await call(
+        "PUT",
+        "/v1/users/me",
+        200,
+        token=access_token,
+        json_body={"last_name": "Budgetov"},
+    )
+    await call("GET", "/v1/products", 403, token=access_token)
+    await call("GET", "/v1/orders", 403, token=access_token)
+    await call(
+        "POST",
+        "/v1/access/check",
+        200,
+        token=access_token,
+        json_body={
+            "checks": [
+                {"object_name": "products", "action": "read"},
+                {"object_name": "orders", "action": "update"},
+            ]
+        },
+    )
+    await call("GET", "/v1/access/permissions", 200, token=access_token)
+    await call("GET", "/v1/auth/validate", 204, token=access_token)
+
+    tokens = await call("POST", "/v1/auth/refresh", 200)
+    access_token = tokens.json()["access_token"]
+
+    # Маршруты суперпользователя; права проверяются только флагом is_superuser
+    await _promote_to_superuser(user_id)
+    await call(
+        "GET",
+        "/v1/superusers/users",
+        200,
+        token=access_token,
+        params={"q": "budget", "limit": 20},
+    )
+    await call(
+        "GET",
+        "/v1/superusers/audit/events",
+        200,
+        token=access_token,
+        params={
+            "start": "2000-01-01T00:00:00+00:00",
+            "end": "2100-01-01T00:00:00+00:00",
+            "user_id": user_id,
+        },
+    )
+    api_key = await call(
+        "POST",
+        "/v1/superusers/api-keys",
+        200,
+        token=access_token,
+        json_body={"user_id": user_id, "name": "query-budget"},
+    )
+    key_id = api_key.json()["id"]
+    for table in EXPORT_TABLES:
+        await call(
+            "GET",
+            "/v1/superusers/export/{table}",
+            200,
+            token=access_token,
+            path_params={"table": table},
+            label=f"GET /v1/superusers/export/{table}",
+        )
+    await call(
+        "GET",
+        "/v1/superusers/export/{table}",
+        200,
+        token=access_token,
+        path_params={"table": "users"},
+        params={"format": "jsonl", "gzip": "true"},
+        label="GET /v1/superusers/export/users (jsonl, gzip)",
+    )
+    for route in ("loop", "load", "audit", "profile/requests"):
+        await call("GET", f"/v1/superusers/debug/{route}", 200, token=access_token)
+    await call(
+        "GET",
+        "/v1/superusers/debug/profile",
+        200,
+        token=access_token,
+        params={"seconds": 0.05},
+    )
+    await call(
+        "GET",
+        "/v1/superusers/debug/profile/requests/{profile_id}",
+        404,
+        token=access_token,
+        path_params={"profile_id": 0},
+    )
+    await call(
+        "GET",
+        "/v1/superusers/api-keys",
+        200,
+        token=access_token,
+        params={"user_id": user_id},
+    )
+    await call(
+        "GET",
+        "/v1/auth/validate",
+        204,
+        token=api_key.json()["key"],
+        label="GET /v1/auth/validate (api key)",
+    )
+    await call(
+        "DELETE",
+        "/v1/superusers/api-keys/{key_id}",
+        200,
+        token=access_token,
+        path_params={"key_id": key_id},
+    )
+
+    await call("POST", "/v1/users/password/forgot", 200, params={"email": email})
+    await call("GET", "/v1/users/password/reset", 200, params={"token": "x"})
+    await call("POST", "/v1/auth/logout", 200)
+    reset_token = await _fetch_token(PasswordResetToken, user_id)
+    await call(
+        "POST",
+        "/v1/users/password/reset",
+        200,
+        json_body={"token": reset_token, "new_password": NEW_PASSWORD},
+    )
+
+    tokens = await call(
+        "POST",
+        "/v1/auth/login",
+        200,
+        measure=False,
+        json_body={"email": email, "password": NEW_PASSWORD},
+    )
+    await call("DELETE", "/v1/users/me", 200, token=tokens.json()["access_token"])
+    return dict(sorted(scenario.results.items()))
+
+
+def _dump(budgets: dict) -> str:
+    return json.dumps(budgets, indent=2, sort_keys=True) + "\n"
+
+
+async def _measure() -> dict[str, dict[str, int]]:
+    await init_db()
+    try:
+        return await run_scenario()
+    finally:
+        await engine.dispose()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="Check SQL statement and commit budgets of /v1 routes"
+    )
+    parser.add_argument(
+        "--update", action="store_true", help=f"rewrite {BUDGETS_FILE.name}"
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    actual = _dump(asyncio.run(_measure()))
+
+    if args.update:
+        BUDGETS_FILE.write_text(actual, encoding="utf-8")
+        print(f"Query budgets written to {BUDGETS_FILE}")
+        return 0
+
+    expected = BUDGETS_FILE.read_text(encoding="utf-8") if BUDGETS_FILE.exists() else ""
+    if actual == expected:
+        print("Query budgets match")
+        return 0
+
+    sys.stdout.writelines(
+        difflib.unified_diff(
+            expected.splitlines(keepends=True),
+            actual.splitlines(keepends=True),
+            fromfile=f"{BUDGETS_FILE.name} (expected)",
+            tofile=f"{BUDGETS_FILE.name} (actual)",
+        )
+    )
+    print(
+        "\nSQL statement or commit counts changed. If the change is intended, "
+        "run `python -m db.query_budget --update` and commit the file."
+    )
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,315 @@
+"""
+Синтетические данные для нагрузочных замеров на реалистичном объёме.
+
+    python -m db.synthetic --users 1000000 --sessions-per-user 10
+
+Таблицы наполняются через COPY (asyncpg copy_records_to_table) пачками по
+--batch строк. Идентификаторы выдаются подряд после текущего максимума, так что
+генератор можно запускать повторно для наращивания объёма. Все пользователи
+получают один и тот же заранее посчитанный хэш пароля SYNTHETIC_PASSWORD —
+хэшировать миллионы паролей bcrypt нет смысла.
+
+Только для локальной БД: данные не удаляются, кроме как флагом --truncate.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import random
+import secrets
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Iterator
+
+import asyncpg
+
+from backend.app.config import settings
+from backend.app.core.access import ACTIONS
+from backend.app.core.passwords import hash_password
+from backend.app.models import (
+    AccessRule,
+    BusinessObject,
+    PolicyVersion,
+    Role,
+    User,
+    UserRole,
+    UserSession,
+)
+from db.init_db import init_db
+from db.session import SYNC_DB_URL, engine
+
+logger = logging.getLogger(__name__)
+
+SYNTHETIC_PASSWORD = "synthetic-password"
+EMAIL_DOMAIN = "synthetic.test"
+
+FIRST_NAMES = ["Иван", "Пётр", "Анна", "Мария", "Алексей", "Елена", "Олег", "Ольга"]
+LAST_NAMES = ["Иванов", "Петров", "Смирнов", "Кузнецов", "Попов", "Соколов", "Лебедев"]
+
+# Доли ролей среди пользователей; часть пользователей получает вторую роль
+ROLE_WEIGHTS = {"user": 0.9, "guest": 0.07, "manager": 0.025, "admin": 0.005}
+SECOND_ROLE_SHARE = 0.05
+
+# Права ролей на синтетические бизнес-объекты
+ROLE_GRANTS = {
+    "admin": ACTIONS,
+    "manager": ("read", "read_all", "create", "update", "update_all"),
+    "user": ("read", "create", "update", "delete"),
+    "guest": ("read",),
+}
+
+USER_COLUMNS = [
+    "id",
+    "email",
+    "password_hash",
+    "first_name",
+    "last_name",
+    "is_active",
+    "is_verified",
+    "is_superuser",
+    "created_at",
+]
+SESSION_COLUMNS = ["id", "user_id", "jti", "expires_at", "created_at"]
+USER_ROLE_COLUMNS = ["id", "user_id", "role_id", "created_at"]
+
+
+def _random_moment(rng: random.Random, now: datetime, days: int) -> datetime:
+    return now - timedelta(seconds=rng.randrange(days * 86400))
+
+
+def user_records(
+    rng: random.Random, first_id: int, count: int, password_hash: str
+) -> Iterator[tuple]:
+    now = datetime.now(timezone.utc)
+    for user_id in range(first_id, first_id + count):
+        yield (
+            user_id,
+            f"user{user_id}@{EMAIL_DOMAIN}",
+            password_hash,
+            rng.choice(FIRST_NAMES),
+            rng.choice(LAST_NAMES),
+            rng.random() < 0.97,
+            rng.random() < 0.9,
+            False,
+            _random_moment(rng, now, 730),
+        )
+
+
+def session_records(
+    rng: random.Random,
+    first_id: int,
+    user_ids: range,
+    per_user: int,
+) -> Iterator[tuple]:
+    """Сессии за последние 60 дней; большая часть истекла, как в таблице без очистки"""
+    now = datetime.now(timezone.utc)
+    session_id = first_id
+    for user_id in user_ids:
+        for _ in range(rng.randint(0, per_user * 2)):
+            created_at = _random_moment(rng, now, 60)
+            ttl = timedelta(days=7) if rng.random() < 0.5 else timedelta(minutes=15)
+            yield (
+                session_id,
+                user_id,
+                secrets.token_urlsafe(16),
+                created_at + ttl,
+                created_at,
+            )
+            session_id += 1
+
+
+def user_role_records(
+    rng: random.Random, first_id: int, user_ids: range, role_ids: dict[str, int]
+) -> Iterator[tuple]:
+    names = list(ROLE_WEIGHTS)
+    weights = list(ROLE_WEIGHTS.values())
+    now = datetime.now(timezone.utc)
+    row_id = first_id
+    for user_id in user_ids:
+        roles = {rng.choices(names, weights)[0]}
+        if rng.random() < SECOND_ROLE_SHARE:
+            roles.add(rng.choices(names, weights)[0])
+        for role in roles:
+            yield row_id, user_id, role_ids[role], now
+            row_id += 1
+
+
+def _batches(records: Iterator[tuple], size: int) -> Iterator[list[tuple]]:
+    batch = []
+    for record in records:
+        batch.append(record)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+async def _copy(
+    conn: asyncpg.Connection,
+    table: str,
+    columns: list[str],
+    records: Iterator[tuple],
+    batch_size: int,
+) -> int:
+    started = time.perf_counter()
+    total = 0
+    for batch in _batches(records, batch_size):
+        await conn.copy_records_to_table(table, records=batch, columns=columns)
+        total += len(batch)
+        logger.info(f"{table}: {total} rows")
+    elapsed = time.perf_counter() - started
+    logger.info(f"{table}: copied {total} rows in {elapsed:.1f}s")
+    return total
+
+
+async def _next_id(conn: asyncpg.Connection, table: str) -> int:
+    return await conn.fetchval(f"SELECT coalesce(max(id), 0) + 1 FROM {table}")
+
+
+async def _sync_sequence(conn: asyncpg.Connection, table: str) -> None:
+    await conn.execute(
+        f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), "
+        f"(SELECT coalesce(max(id), 1) FROM {table}))"
+    )
+
+
+async def _seed_objects(conn: asyncpg.Connection, count: int) -> None:
+    """Синтетические бизнес-объекты и правила всех ролей на них"""
+    await conn.executemany(
+        f"INSERT INTO {BusinessObject.__tablename__} (name, description) "
+        "VALUES ($1, $2) ON CONFLICT (name) DO NOTHING",
+        [(f"synthetic_{n}", "Synthetic business object") for n in range(count)],
+    )
+    for role, grants in ROLE_GRANTS.items():
+        flags = ", ".join(f"can_{action}" for action in grants)
+        values = ", ".join("true" for _ in grants)
+        await conn.execute(
+            f"INSERT INTO {AccessRule.__tablename__} (role_id, object_id, {flags}) "
+            f"SELECT r.id, o.id, {values} "
+            f"FROM {Role.__tablename__} r, {BusinessObject.__tablename__} o "
+            "WHERE r.name = $1 AND o.name LIKE 'synthetic\\_%' AND NOT EXISTS ("
+            f"  SELECT 1 FROM {AccessRule.__tablename__} a "
+            "  WHERE a.role_id = r.id AND a.object_id = o.id)",
+            role,
+        )
+    # Правила изменились: новая версия политики и уведомление воркеров, как в
+    # init_db._seed — токены со встроенными правами должны их перечитать
+    version = await conn.fetchval(
+        f"UPDATE {PolicyVersion.__tablename__} SET version = version + 1 "
+        "WHERE id = 1 RETURNING version"
+    )
+    payload = json.dumps({"type": "rules_changed", "key": str(version)})
+    await conn.execute(
+        "SELECT pg_notify($1, $2)", settings.INVALIDATION_CHANNEL, payload
+    )
+
+
+async def generate(
+    users: int,
+    sessions_per_user: int,
+    objects: int,
+    batch_size: int,
+    seed: int,
+    truncate: bool,
+) -> None:
+    await init_db()
+    await engine.dispose()
+
+    rng = random.Random(seed)
+    conn = await asyncpg.connect(SYNC_DB_URL)
+    try:
+        if truncate:
+            synthetic = f"SELECT id FROM {User.__tablename__} WHERE email LIKE $1"
+            pattern = f"%@{EMAIL_DOMAIN}"
+            await conn.execute(
+                f"DELETE FROM {UserRole.__tablename__} WHERE user_id IN ({synthetic})",
+                pattern,
+            )
+            # user_sessions удаляются каскадно
+            await conn.execute(
+                f"DELETE FROM {User.__tablename__} WHERE email LIKE $1", pattern
+            )
+
+        await _seed_objects(conn, objects)
+        role_rows = await conn.fetch(f"SELECT id, name FROM {Role.__tablename__}")
+        role_ids = {row["name"]: row["id"] for row in role_rows}
+
+        first_user = await _next_id(conn, User.__tablename__)
+        user_ids = range(first_user, first_user + users)
+        password_hash = await hash_password(SYNTHETIC_PASSWORD)
+
+        await _copy(
+            conn,
+            User.__tablename__,
+            USER_COLUMNS,
+            user_records(rng, first_user, users, password_hash),
+            batch_size,
+        )
+        await _copy(
+            conn,
+            UserRole.__tablename__,
+            USER_ROLE_COLUMNS,
+            user_role_records(
+                rng, await _next_id(conn, UserRole.__tablename__), user_ids, role_ids
+            ),
+            batch_size,
+        )
+        await _copy(
+            conn,
+            UserSession.__tablename__,
+            SESSION_COLUMNS,
+            session_records(
+                rng,
+                await _next_id(conn, UserSession.__tablename__),
+                user_ids,
+                sessions_per_user,
+            ),
+            batch_size,
+        )
+
+        for table in (User, UserRole, UserSession):
+            await _sync_sequence(conn, table.__tablename__)
+        logger.info("Running ANALYZE")
+        await conn.execute("ANALYZE")
+    finally:
+        await conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Fill the local database with synthetic users, roles and sessions"
+    )
+    parser.add_argument("--users", type=int, default=1_000_000)
+    parser.add_argument(
+        "--sessions-per-user",
+        type=int,
+        default=10,
+        help="average number of user_sessions rows per user",
+    )
+    parser.add_argument("--objects", type=int, default=50)
+    parser.add_argument("--batch", type=int, default=50_000)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument(
+        "--truncate",
+        action="store_true",
+        help=f"delete previously generated users (*@{EMAIL_DOMAIN}) first",
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(
+        generate(
+            args.users,
+            args.sessions_per_user,
+            args.objects,
+            args.batch,
+            args.seed,
+            args.truncate,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
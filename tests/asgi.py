@@ -0,0 +1,59 @@
+from dataclasses import dataclass, field
+
+
+@dataclass
+class AsgiResult:
+    status: int = 0
+    headers: dict[bytes, bytes] = field(default_factory=dict)
+    body: bytes = b""
+    # Сколько раз приложение вызвало receive()
+    reads: int = 0
+
+
+async def call_asgi(
+    app,
+    path: str,
+    *,
+    method: str = "POST",
+    chunks: list[bytes] | None = None,
+    headers: list[tuple[bytes, bytes]] | None = None,
+) -> AsgiResult:
+    """Вызывает ASGI-приложение одним HTTP-запросом с телом из chunks"""
+    chunks = [b""] if chunks is None else chunks
+    scope = {
+        "type": "http",
+        "method": method,
+        "path": path,
+        "query_string": b"",
+        "headers": headers or [],
+    }
+    result = AsgiResult()
+
+    async def receive():
+        result.reads += 1
+        if result.reads > len(chunks):
+            return {"type": "http.disconnect"}
+        return {
+            "type": "http.request",
+            "body": chunks[result.reads - 1],
+            "more_body": result.reads < len(chunks),
+        }
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            result.status = message["status"]
+            result.headers = dict(message.get("headers", []))
+        elif message["type"] == "http.response.body":
+            result.body += message.get("body", b"")
+
+    await app(scope, receive, send)
+    return result
+
+
+async def read_body(receive) -> bytes:
+    body = b""
+    while True:
+        message = await receive()
+        body += message.get("body", b"")
+        if not message.get("more_body", False):
+            return body
@@ -0,0 +1,32 @@
+import os
+
+# Обязательные настройки без значений по умолчанию. Тесты не обращаются ни к
+# Postgres, ни к SMTP, ни к Redis: движок SQLAlchemy создаётся без соединения
+REQUIRED_SETTINGS = {
+    "SMTP_SERVER": "localhost",
+    "SMTP_PORT": "25",
+    "SMTP_USERNAME": "test",
+    "SMTP_PASSWORD": "test",
+    "POSTGRES_USER": "test",
+    "POSTGRES_PASSWORD": "test",
+    "POSTGRES_DB": "test",
+    "POSTGRES_HOST": "localhost",
+    "POSTGRES_PORT": "5432",
+    "SECRET_KEY": "test-secret-key",
+    "ALGORITHM": "HS256",
+    "ACCESS_TOKEN_EXPIRE_MINUTES": "15",
+    "VERIFY_EMAIL_TOKEN_EXPIRE_MINUTES": "60",
+    "REFRESH_TOKEN_EXPIRE_DAYS": "7",
+    "BCRYPT_ROUNDS": "4",
+}
+for name, value in REQUIRED_SETTINGS.items():
+    os.environ.setdefault(name, value)
+# Хранилища в памяти, что бы ни было задано в локальном .env
+os.environ["IDEMPOTENCY_STORE_BACKEND"] = "memory"
+
+import pytest  # noqa: E402
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
@@ -0,0 +1,108 @@
+import asyncio
+from contextlib import asynccontextmanager
+
+import pytest
+
+from backend.app.core import audit
+from backend.app.core.audit import LOGIN_FAILED, AuditLog
+
+pytestmark = pytest.mark.anyio
+
+
+class FakeEngine:
+    """engine.begin(), записывающий пачки вместо INSERT в auth_events"""
+
+    def __init__(self):
+        self.statements = []
+        self.error: Exception | None = None
+        self.release = asyncio.Event()
+        self.release.set()
+
+    @asynccontextmanager
+    async def begin(self):
+        yield self
+
+    async def execute(self, statement):
+        await self.release.wait()
+        if self.error is not None:
+            raise self.error
+        self.statements.append(statement)
+
+
+@pytest.fixture
+def engine(monkeypatch):
+    engine = FakeEngine()
+    monkeypatch.setattr(audit, "engine", engine)
+    return engine
+
+
+def _record(log: AuditLog, count: int) -> None:
+    for _ in range(count):
+        log.record(LOGIN_FAILED, email="user@example.com")
+
+
+async def test_flush_writes_in_batches(engine):
+    log = AuditLog(max_buffer=100, batch_size=2, flush_interval=60)
+    _record(log, 5)
+
+    assert await log.flush() == 5
+    assert len(engine.statements) == 3
+    assert log.snapshot()["written"] == 5
+
+
+async def test_full_buffer_drops_new_events(engine):
+    log = AuditLog(max_buffer=3, batch_size=10, flush_interval=60)
+    _record(log, 5)
+
+    assert log.snapshot()["buffered"] == 3
+    assert log.dropped == 2
+    assert "audit_events_dropped_total 2" in log.prometheus()
+
+
+async def test_failed_flush_keeps_batch_within_limit(engine):
+    log = AuditLog(max_buffer=3, batch_size=2, flush_interval=60)
+    _record(log, 3)
+    engine.error = OSError("database is down")
+
+    assert await log.flush() == 0
+    assert log.snapshot() == {
+        "buffered": 3,
+        "max_buffer": 3,
+        "written": 0,
+        "dropped": 0,
+        "failed_flushes": 1,
+    }
+
+    engine.error = None
+    assert await log.flush() == 3
+
+
+async def test_cancelled_flush_returns_batch_to_buffer(engine):
+    log = AuditLog(max_buffer=100, batch_size=2, flush_interval=60)
+    _record(log, 3)
+    engine.release.clear()
+
+    flush = asyncio.create_task(log.flush())
+    await asyncio.sleep(0)
+    flush.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await flush
+
+    assert log.snapshot()["buffered"] == 3
+
+
+async def test_stop_finishes_in_flight_batch_and_drains_buffer(engine):
+    log = AuditLog(max_buffer=100, batch_size=2, flush_interval=60)
+    await log.start()
+    engine.release.clear()
+    _record(log, 5)
+    # Фоновая задача проснулась на полной пачке и ждёт записи
+    await asyncio.sleep(0)
+
+    stop = asyncio.create_task(log.stop())
+    await asyncio.sleep(0)
+    engine.release.set()
+    await asyncio.wait_for(stop, timeout=1)
+
+    assert log.written == 5
+    assert log.snapshot()["buffered"] == 0
@@ -0,0 +1,106 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from backend.app.core import cache
+from backend.app.core.cache import TTLCache
+from backend.app.core.singleflight import SingleFlight
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = SimpleNamespace(now=1000.0)
+    monkeypatch.setattr(cache, "time", SimpleNamespace(monotonic=lambda: clock.now))
+    return clock
+
+
+def test_ttl_cache_expires_entries(clock):
+    ttl_cache = TTLCache(ttl=10)
+    ttl_cache.set("a", 1)
+    ttl_cache.set("b", 2, ttl=30)
+
+    clock.now += 10
+    assert ttl_cache.get("a", "missing") == "missing"
+    assert ttl_cache.get("b") == 2
+    assert len(ttl_cache) == 1
+
+
+def test_ttl_cache_evicts_oldest_entry():
+    ttl_cache = TTLCache(ttl=10, max_size=2)
+    ttl_cache.set("a", 1)
+    ttl_cache.set("b", 2)
+    ttl_cache.set("a", 3)
+    ttl_cache.set("c", 4)
+
+    assert ttl_cache.get("b") is None
+    assert (ttl_cache.get("a"), ttl_cache.get("c")) == (3, 4)
+
+
+def test_disabled_ttl_cache_keeps_only_explicit_ttl():
+    ttl_cache = TTLCache(ttl=0)
+    ttl_cache.set("a", 1)
+    ttl_cache.set("b", 2, ttl=10)
+
+    assert ttl_cache.get("a") is None
+    assert ttl_cache.get("b") == 2
+
+
+@pytest.mark.anyio
+async def test_single_flight_runs_concurrent_calls_once():
+    flight = SingleFlight()
+    calls = 0
+
+    async def load():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return calls
+
+    results = await asyncio.gather(*(flight.do("key", load) for _ in range(5)))
+
+    assert results == [1] * 5
+    assert calls == 1
+    assert await flight.do("key", load) == 2
+
+
+@pytest.mark.anyio
+async def test_single_flight_shares_errors():
+    flight = SingleFlight()
+    calls = 0
+
+    async def fail():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        raise LookupError("boom")
+
+    results = await asyncio.gather(
+        *(flight.do("key", fail) for _ in range(3)), return_exceptions=True
+    )
+
+    assert calls == 1
+    assert all(isinstance(result, LookupError) for result in results)
+
+
+@pytest.mark.anyio
+async def test_single_flight_waiter_retries_after_leader_cancelled():
+    flight = SingleFlight()
+    started = asyncio.Event()
+
+    async def slow():
+        started.set()
+        await asyncio.sleep(10)
+
+    async def fast():
+        return "fresh"
+
+    leader = asyncio.create_task(flight.do("key", slow))
+    await started.wait()
+    follower = asyncio.create_task(flight.do("key", fast))
+    await asyncio.sleep(0)
+    leader.cancel()
+
+    assert await follower == "fresh"
+    with pytest.raises(asyncio.CancelledError):
+        await leader
@@ -0,0 +1,114 @@
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from backend.app.config import settings
+from backend.app.core import email_outbox
+from backend.app.core.email_outbox import _result_values, _update_claimed, drain_once
+
+LEASE = datetime(2025, 1, 1, 12, 0, tzinfo=timezone.utc)
+
+
+def _message(message_id: int, attempts: int = 1) -> SimpleNamespace:
+    return SimpleNamespace(
+        id=message_id,
+        to_email=f"user{message_id}@example.com",
+        subject="subject",
+        body="body",
+        attempts=attempts,
+        lease_until=LEASE,
+    )
+
+
+class FakeSession:
+    def __init__(self, statements: list):
+        self.statements = statements
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+    async def execute(self, statement):
+        self.statements.append(statement)
+
+    async def commit(self):
+        pass
+
+
+def test_sent_message_is_marked_sent():
+    values = _result_values(attempts=1, sent=True)
+
+    assert values["status"] == "sent"
+    assert values["last_error"] is None
+
+
+def test_failed_message_is_retried_with_backoff():
+    first = _result_values(attempts=1, sent=False)
+    third = _result_values(attempts=3, sent=False)
+
+    assert first["status"] == third["status"] == "pending"
+    delays = [
+        (values["available_at"] - datetime.now(timezone.utc)).total_seconds()
+        for values in (first, third)
+    ]
+    base = settings.EMAIL_OUTBOX_RETRY_BASE_SECONDS
+    assert delays == pytest.approx([base, base * 4], abs=1)
+
+
+def test_failed_message_gives_up_after_max_attempts():
+    values = _result_values(attempts=settings.EMAIL_OUTBOX_MAX_ATTEMPTS, sent=False)
+
+    assert values["status"] == "failed"
+
+
+@pytest.mark.anyio
+async def test_result_is_recorded_only_under_own_lease(monkeypatch):
+    statements = []
+    monkeypatch.setattr(
+        email_outbox, "AsyncSessionLocal", lambda: FakeSession(statements)
+    )
+
+    await _update_claimed([_message(7)], status="sent")
+
+    compiled = statements[0].compile(dialect=postgresql.dialect())
+    sql = str(compiled)
+    assert "(email_outbox.id, email_outbox.available_at) IN" in sql
+    assert "email_outbox.status =" in sql
+    assert [(7, LEASE)] in compiled.params.values()
+
+
+@pytest.mark.anyio
+async def test_drain_returns_unsent_messages_when_lease_runs_out(monkeypatch):
+    messages = [_message(1), _message(2), _message(3)]
+    clock = SimpleNamespace(now=0.0)
+    sent, updates = [], []
+
+    async def claim_batch(batch_size):
+        return messages
+
+    async def send_email(to_email, subject, body):
+        sent.append(to_email)
+        # Отправка первого письма съедает всю аренду
+        clock.now += settings.EMAIL_OUTBOX_LEASE_SECONDS
+        return True
+
+    async def update_claimed(claimed, **values):
+        updates.append(([m.id for m in claimed], values))
+
+    monkeypatch.setattr(email_outbox, "claim_batch", claim_batch)
+    monkeypatch.setattr(email_outbox, "send_email", send_email)
+    monkeypatch.setattr(email_outbox, "_update_claimed", update_claimed)
+    monkeypatch.setattr(
+        email_outbox, "time", SimpleNamespace(monotonic=lambda: clock.now)
+    )
+
+    assert await drain_once() == 3
+
+    assert sent == ["user1@example.com"]
+    assert [ids for ids, _ in updates] == [[1], [2, 3]]
+    assert updates[0][1]["status"] == "sent"
+    assert updates[1][1]["status"] == "pending"
@@ -0,0 +1,148 @@
+import asyncio
+
+import pytest
+
+from backend.app.config import settings
+from backend.app.core import idempotency
+from backend.app.core.idempotency import IdempotencyMiddleware, MemoryIdempotencyStore
+from tests.asgi import call_asgi, read_body
+
+pytestmark = pytest.mark.anyio
+
+PATH = "/v1/auth/register"
+
+
+class EchoApp:
+    """Обработчик, отвечающий телом запроса и номером вызова"""
+
+    def __init__(self, status: int = 201):
+        self.status = status
+        self.calls = 0
+        self.release = asyncio.Event()
+        self.release.set()
+
+    async def __call__(self, scope, receive, send):
+        self.calls += 1
+        body = await read_body(receive)
+        await self.release.wait()
+        await send(
+            {
+                "type": "http.response.start",
+                "status": self.status,
+                "headers": [(b"x-call", str(self.calls).encode())],
+            }
+        )
+        await send({"type": "http.response.body", "body": body})
+
+
+@pytest.fixture(autouse=True)
+def store(monkeypatch):
+    store = MemoryIdempotencyStore()
+    monkeypatch.setattr(idempotency, "idempotency_store", store)
+    return store
+
+
+def _key(value: bytes = b"key-1") -> list[tuple[bytes, bytes]]:
+    return [(b"idempotency-key", value)]
+
+
+async def test_repeat_is_replayed_without_calling_handler():
+    app = EchoApp()
+    middleware = IdempotencyMiddleware(app)
+
+    first = await call_asgi(middleware, PATH, chunks=[b"{}"], headers=_key())
+    second = await call_asgi(middleware, PATH, chunks=[b"{}"], headers=_key())
+
+    assert app.calls == 1
+    assert (second.status, second.body) == (first.status, first.body)
+    assert second.headers[b"x-call"] == b"1"
+    assert second.headers[b"idempotent-replayed"] == b"true"
+    assert b"idempotent-replayed" not in first.headers
+
+
+async def test_same_key_with_different_body_is_rejected():
+    app = EchoApp()
+    middleware = IdempotencyMiddleware(app)
+
+    await call_asgi(middleware, PATH, chunks=[b'{"a": 1}'], headers=_key())
+    response = await call_asgi(middleware, PATH, chunks=[b'{"a": 2}'], headers=_key())
+
+    assert response.status == 422
+    assert app.calls == 1
+
+
+async def test_repeat_during_first_request_gets_conflict():
+    app = EchoApp()
+    app.release.clear()
+    middleware = IdempotencyMiddleware(app)
+
+    first = asyncio.create_task(
+        call_asgi(middleware, PATH, chunks=[b"{}"], headers=_key())
+    )
+    while app.calls == 0:
+        await asyncio.sleep(0)
+    second = await call_asgi(middleware, PATH, chunks=[b"{}"], headers=_key())
+    app.release.set()
+
+    assert second.status == 409
+    assert second.headers[b"retry-after"] == b"1"
+    assert (await first).status == 201
+
+
+async def test_server_errors_are_not_cached():
+    app = EchoApp(status=500)
+    middleware = IdempotencyMiddleware(app)
+
+    await call_asgi(middleware, PATH, chunks=[b"{}"], headers=_key())
+    await call_asgi(middleware, PATH, chunks=[b"{}"], headers=_key())
+
+    assert app.calls == 2
+
+
+async def test_requests_without_key_are_passed_through():
+    app = EchoApp()
+    middleware = IdempotencyMiddleware(app)
+
+    await call_asgi(middleware, PATH, chunks=[b"{}"])
+    await call_asgi(middleware, PATH, chunks=[b"{}"])
+
+    assert app.calls == 2
+
+
+async def test_declared_oversized_body_is_rejected_unread(monkeypatch):
+    monkeypatch.setattr(settings, "IDEMPOTENCY_MAX_BODY_BYTES", 10)
+    app = EchoApp()
+    headers = [*_key(), (b"content-length", b"11")]
+
+    response = await call_asgi(
+        IdempotencyMiddleware(app), PATH, chunks=[b"x" * 11], headers=headers
+    )
+
+    assert response.status == 413
+    assert response.reads == 0
+    assert app.calls == 0
+
+
+async def test_streamed_oversized_body_stops_at_the_cap(monkeypatch):
+    monkeypatch.setattr(settings, "IDEMPOTENCY_MAX_BODY_BYTES", 10)
+    app = EchoApp()
+
+    response = await call_asgi(
+        IdempotencyMiddleware(app), PATH, chunks=[b"x" * 6] * 5, headers=_key()
+    )
+
+    assert response.status == 413
+    assert response.reads == 2
+    assert app.calls == 0
+
+
+async def test_body_within_cap_is_replayed_to_handler(monkeypatch):
+    monkeypatch.setattr(settings, "IDEMPOTENCY_MAX_BODY_BYTES", 10)
+    app = EchoApp()
+
+    response = await call_asgi(
+        IdempotencyMiddleware(app), PATH, chunks=[b"abc", b"def"], headers=_key()
+    )
+
+    assert response.status == 201
+    assert response.body == b"abcdef"
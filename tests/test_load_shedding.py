@@ -0,0 +1,144 @@
+import asyncio
+
+import pytest
+
+from backend.app.config import settings
+from backend.app.core import load_shedding
+from backend.app.core.load_shedding import (
+    CREDENTIAL,
+    READ,
+    TOKEN,
+    AdaptiveLimiter,
+    LoadSheddingMiddleware,
+    Overloaded,
+    classify,
+)
+from backend.app.core.loop_monitor import loop_monitor
+from tests.asgi import call_asgi
+
+pytestmark = pytest.mark.anyio
+
+
+def _limiter(**kwargs) -> AdaptiveLimiter:
+    options = {
+        "limit": 4,
+        "max_queue": 4,
+        "target_latency": 0.5,
+        "queue_timeout": 1.0,
+    }
+    options.update(kwargs)
+    return AdaptiveLimiter("test", **options)
+
+
+async def ok_app(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"ok"})
+
+
+def test_classify():
+    assert classify("/v1/auth/login") == CREDENTIAL
+    assert classify("/v1/users/password/reset") == CREDENTIAL
+    assert classify("/v1/auth/refresh") == TOKEN
+    assert classify("/v1/users/me") == READ
+    assert classify("/v1/superusers/debug/loop") is None
+    assert classify("/v1/superusers/export/users") is None
+
+
+def test_only_credential_limiter_watches_loop_lag():
+    limiters = load_shedding.limiters
+    assert limiters[CREDENTIAL].max_loop_lag == (
+        settings.LOAD_SHEDDING_MAX_LOOP_LAG_SECONDS
+    )
+    assert limiters[TOKEN].max_loop_lag is None
+    assert limiters[READ].max_loop_lag is None
+
+
+def test_loop_lag_shrinks_limit_only_when_configured(monkeypatch):
+    monkeypatch.setattr(loop_monitor, "recent_lag", 1.0)
+    watching = _limiter(max_loop_lag=0.1)
+    ignoring = _limiter()
+
+    for limiter in (watching, ignoring):
+        limiter._adjust(0.01)
+
+    assert watching.limit < 4
+    assert ignoring.limit > 4
+
+
+def test_slow_responses_shrink_limit_once_per_target_latency():
+    limiter = _limiter()
+
+    limiter._adjust(1.0)
+    limiter._adjust(1.0)
+
+    assert limiter.limit == pytest.approx(4 * limiter.decrease_factor)
+
+
+async def test_queued_request_gets_released_slot():
+    limiter = _limiter(limit=1)
+    await limiter.acquire()
+
+    waiter = asyncio.create_task(limiter.acquire())
+    await asyncio.sleep(0)
+    assert limiter.snapshot()["queued"] == 1
+
+    limiter.release(None)
+    await waiter
+    assert limiter.in_flight == 1
+    assert limiter.snapshot()["queued"] == 0
+
+
+async def test_full_queue_is_rejected_immediately():
+    limiter = _limiter(limit=1, max_queue=0)
+    await limiter.acquire()
+
+    with pytest.raises(Overloaded):
+        await limiter.acquire()
+    assert limiter.rejected == 1
+
+
+async def test_queue_timeout_rejects_and_forgets_waiter():
+    limiter = _limiter(limit=1, queue_timeout=0.01)
+    await limiter.acquire()
+
+    with pytest.raises(Overloaded):
+        await limiter.acquire()
+    assert limiter.snapshot()["queued"] == 0
+
+
+async def test_cancelled_waiter_does_not_leak_slot():
+    limiter = _limiter(limit=1)
+    await limiter.acquire()
+    waiter = asyncio.create_task(limiter.acquire())
+    await asyncio.sleep(0)
+
+    waiter.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
+    limiter.release(None)
+
+    assert limiter.in_flight == 0
+
+
+async def test_middleware_answers_503_when_overloaded(monkeypatch):
+    limiter = _limiter(limit=1, max_queue=0)
+    monkeypatch.setitem(load_shedding.limiters, READ, limiter)
+    await limiter.acquire()
+
+    response = await call_asgi(
+        LoadSheddingMiddleware(ok_app), "/v1/users/me", method="GET"
+    )
+
+    assert response.status == 503
+    assert int(response.headers[b"retry-after"]) >= 1
+
+
+async def test_middleware_releases_slot_after_response(monkeypatch):
+    limiter = _limiter(limit=1, max_queue=0)
+    monkeypatch.setitem(load_shedding.limiters, READ, limiter)
+    middleware = LoadSheddingMiddleware(ok_app)
+
+    for _ in range(3):
+        response = await call_asgi(middleware, "/v1/users/me", method="GET")
+        assert response.status == 200
+    assert limiter.in_flight == 0
@@ -0,0 +1,30 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi import HTTPException
+
+from backend.app.core.pagination import decode_cursor, encode_cursor, escape_like
+
+
+def test_cursor_round_trip_keeps_timezone():
+    created_at = datetime(2025, 3, 1, 12, 30, 15, 123456, timezone(timedelta(hours=3)))
+    cursor = encode_cursor(created_at, 17)
+
+    assert decode_cursor(cursor) == (created_at, 17)
+    # Курсор передаётся в query string без экранирования
+    assert not set(cursor) & set("+/=")
+
+
+@pytest.mark.parametrize(
+    "cursor",
+    ["", "not base64!", "////", encode_cursor(datetime.now(), 1)[:-4], "bm8tc2Vw"],
+)
+def test_invalid_cursor_is_bad_request(cursor):
+    with pytest.raises(HTTPException) as error:
+        decode_cursor(cursor)
+
+    assert error.value.status_code == 400
+
+
+def test_escape_like():
+    assert escape_like(r"50%_a\b") == r"50\%\_a\\b"
@@ -0,0 +1,64 @@
+from datetime import timedelta
+
+from backend.app.core.signed_tokens import (
+    RESET_PASSWORD,
+    VERIFY_EMAIL,
+    create_signed_token,
+    fingerprint_matches,
+    read_signed_token,
+    user_fingerprint,
+)
+from backend.app.models import User
+
+
+def _user(**kwargs) -> User:
+    return User(
+        id=kwargs.get("id", 42),
+        password_hash=kwargs.get("password_hash", "hash"),
+        is_verified=kwargs.get("is_verified", False),
+    )
+
+
+def test_token_round_trip():
+    user = _user()
+    token = create_signed_token(VERIFY_EMAIL, user, timedelta(minutes=5))
+
+    assert read_signed_token(VERIFY_EMAIL, token) == (42, user_fingerprint(user))
+
+
+def test_token_is_bound_to_purpose():
+    token = create_signed_token(VERIFY_EMAIL, _user(), timedelta(minutes=5))
+
+    assert read_signed_token(RESET_PASSWORD, token) is None
+
+
+def test_tampered_token_is_rejected():
+    token = create_signed_token(VERIFY_EMAIL, _user(), timedelta(minutes=5))
+    payload, _, signature = token.partition(".")
+
+    assert read_signed_token(VERIFY_EMAIL, f"{payload}x.{signature}") is None
+    assert read_signed_token(VERIFY_EMAIL, f"{payload}.{signature[:-1]}") is None
+
+
+def test_non_ascii_signature_is_rejected_without_error():
+    token = create_signed_token(VERIFY_EMAIL, _user(), timedelta(minutes=5))
+    payload, _, _ = token.partition(".")
+
+    assert read_signed_token(VERIFY_EMAIL, f"{payload}.подпись") is None
+    assert read_signed_token(VERIFY_EMAIL, "токен.подпись") is None
+
+
+def test_expired_token_is_rejected():
+    token = create_signed_token(VERIFY_EMAIL, _user(), timedelta(seconds=-1))
+
+    assert read_signed_token(VERIFY_EMAIL, token) is None
+
+
+def test_fingerprint_changes_with_password_and_verification():
+    user = _user()
+    fingerprint = user_fingerprint(user)
+
+    assert fingerprint_matches(user, fingerprint)
+    assert not fingerprint_matches(_user(password_hash="other"), fingerprint)
+    assert not fingerprint_matches(_user(is_verified=True), fingerprint)
+    assert not fingerprint_matches(user, "отпечаток")